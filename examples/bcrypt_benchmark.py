@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Measure bcrypt throughput for candidate work factors (BCRYPT_ROUNDS).
+
+For each cost it reports the time of one hash, hashes/sec on one core and
+hashes/sec with one process per core, i.e. roughly how many logins per
+second this machine can verify. A common target is 250-500 ms per hash.
+
+    python examples/bcrypt_benchmark.py --rounds 10 11 12 13 --seconds 2
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import bcrypt
+
+# Add parent directory to path to import from src
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+PASSWORD = b"benchmark-password"
+
+
+def hashes_in(rounds: int, seconds: float) -> int:
+    """Verify a hash of cost `rounds` repeatedly for `seconds`; returns the count (at least one)."""
+    hashed = bcrypt.hashpw(PASSWORD, bcrypt.gensalt(rounds=rounds))
+    count = 0
+    deadline = time.perf_counter() + seconds
+    while count == 0 or time.perf_counter() < deadline:
+        bcrypt.checkpw(PASSWORD, hashed)
+        count += 1
+    return count
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, nargs="+", default=[10, 11, 12, 13, 14], help="Costs to measure (4-31).")
+    parser.add_argument("--seconds", type=float, default=2.0, help="Measuring time per cost and mode.")
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1, help="Processes for the all-cores run.")
+    args = parser.parse_args()
+
+    try:
+        from src.config.settings import settings
+        configured = settings.BCRYPT_ROUNDS
+    except Exception:
+        configured = None
+
+    print(f"{'rounds':>6} {'ms/hash':>9} {'hashes/s/core':>14} {f'hashes/s x{args.processes}':>16}")
+    with ProcessPoolExecutor(args.processes) as pool:
+        for rounds in args.rounds:
+            start = time.perf_counter()
+            single = hashes_in(rounds, args.seconds)
+            per_core = single / (time.perf_counter() - start)
+
+            start = time.perf_counter()
+            total = sum(pool.map(hashes_in, [rounds] * args.processes, [args.seconds] * args.processes))
+            all_cores = total / (time.perf_counter() - start)
+
+            marker = "  <- BCRYPT_ROUNDS" if rounds == configured else ""
+            print(f"{rounds:>6} {1000 / per_core:>9.1f} {per_core:>14.2f} {all_cores:>16.2f}{marker}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,15 +1,32 @@
-from fastapi import FastAPI, Depends
-from src.routers import admin_router, technical_router, category_router, inventory_router, product_router, service_router
-from src.config.database import get_db, Base, engine, SessionLocal
+from fastapi import FastAPI, Depends, Request
+from fastapi.responses import JSONResponse
+from src.routers import admin_router, technical_router, category_router, inventory_router, product_router, service_router, catalog_router
+from src.config.database import get_db, Base, engine, SessionLocal, default_db
+from src.config.settings import settings
 from src.repositories.admin_repositories import  AdminRepository
 from sqlalchemy.orm import Session
 from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.orm import configure_mappers
+from anyio import to_thread
+from src.dependency.database import WRITE_METHODS, pin_to_primary
+from src.config.query_metrics import QueryStats, current_query_stats, warn_repeated_statements
 # Import all models to register them with SQLAlchemy Base
 from src.schemas.admin import adminModel
 from src.schemas.techincal import TechnicalModel
-from src.schemas.product import Product, Category, Inventory, Service, ServiceProductAssociation
+from src.schemas.product import Product, Category, Inventory, Service, ServiceProductAssociation, StockMovement
+from src.schemas.outbox import OutboxEvent
+from src.schemas.catalog_version import CatalogVersion
+from src.schemas.service_availability import ServiceAvailability
+from src.repositories.service_availability_repositories import ServiceAvailabilityRepository
+from src.service.stock_compaction import run_stock_compaction
+from src.service.notifications import OutboxDispatcher
+from src.service.cost_rollup import cost_rollup_refresher
+from src.service.cache_invalidation import run_invalidation_listener
+from src.service.password_hasher import PasswordHasherBusy, password_hasher
+from src.repositories.service_repositories import create_cost_rollup_view
+import asyncio
 # admin_repositories = AdminRepository()
 app = FastAPI(
     title="Fixing Service API",
@@ -27,7 +44,38 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],  # Allows all methods (GET, POST, etc.)
     allow_headers=["*"],  # Allows all headers
+    expose_headers=["Server-Timing", "X-DB-Queries", "ETag", "Last-Modified"],
 )
+
+@app.exception_handler(PasswordHasherBusy)
+async def password_hasher_busy(request: Request, exc: PasswordHasherBusy):
+    """The bcrypt pool's queue is full: shed the request instead of queueing it."""
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "1"})
+
+@app.middleware("http")
+async def read_your_writes(request: Request, call_next):
+    """Pin the client to the primary for a short window after a successful write."""
+    response = await call_next(request)
+    if request.method in WRITE_METHODS and response.status_code < 400 and default_db.replica_engines:
+        pin_to_primary(response)
+    return response
+
+@app.middleware("http")
+async def sql_query_stats(request: Request, call_next):
+    """Count statements/DB time per request and flag repeated statement shapes."""
+    if not settings.DB_QUERY_STATS_ENABLED:
+        return await call_next(request)
+    stats = QueryStats()
+    token = current_query_stats.set(stats)
+    try:
+        response = await call_next(request)
+    finally:
+        current_query_stats.reset(token)
+    response.headers["Server-Timing"] = f'db;dur={stats.total_ms:.1f};desc="{stats.count} queries"'
+    response.headers["X-DB-Queries"] = str(stats.count)
+    warn_repeated_statements(stats, settings.DB_N_PLUS_ONE_THRESHOLD, f"{request.method} {request.url.path}")
+    return response
+
 DEFAULT_ADMIN_USERNAME = "super_admin"
 DEFAULT_ADMIN_PASSWORD = "change_me_123"
 def init_db():
@@ -36,6 +84,18 @@ def init_db():
     try:
         # Create all tables
         Base.metadata.create_all(bind=engine)
+        # create_all skips existing tables, so add indexes introduced later
+        for table in (Inventory.__table__, StockMovement.__table__, OutboxEvent.__table__):
+            for index in table.indexes:
+                index.create(bind=engine, checkfirst=True)
+        create_cost_rollup_view(engine)
+        # rebuild the stock-aware availability index: services may predate
+        # the table and stock may have changed outside the API
+        with SessionLocal() as session:
+            try:
+                ServiceAvailabilityRepository(session).refresh_services()
+            except SQLAlchemyError as e:
+                print(f"⚠️  Warning: Could not rebuild service availability: {e}")
         db = SessionLocal()
         admin_repo = AdminRepository(db)
         try:
@@ -66,7 +126,33 @@ def init_db():
 # Initialize database on startup
 @app.on_event("startup")
 async def startup_event():
+    # Sync routes run in AnyIO's threadpool; size it from settings
+    to_thread.current_default_thread_limiter().total_tokens = settings.THREADPOOL_MAX_WORKERS
     init_db()
+    if settings.STOCK_COMPACTION_INTERVAL_SECONDS > 0:
+        app.state.stock_compaction = asyncio.create_task(
+            run_stock_compaction(settings.STOCK_COMPACTION_INTERVAL_SECONDS)
+        )
+    if settings.COST_ROLLUP_REFRESH_DELAY_SECONDS > 0:
+        app.state.cost_rollup_refresher = asyncio.create_task(cost_rollup_refresher.run())
+    if settings.OUTBOX_POLL_INTERVAL_SECONDS > 0:
+        app.state.outbox_dispatcher = asyncio.create_task(OutboxDispatcher.from_settings().run())
+    # other workers' catalog writes: cache eviction and snapshot rebuilds
+    app.state.cache_invalidation = asyncio.create_task(run_invalidation_listener())
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    for name in ("stock_compaction", "cost_rollup_refresher", "outbox_dispatcher", "cache_invalidation"):
+        task = getattr(app.state, name, None)
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+    password_hasher.shutdown()
+    await default_db.dispose()
 
 @app.get("/app")
 def read_root():
@@ -88,4 +174,5 @@ app.include_router(technical_router)
 app.include_router(product_router)
 app.include_router(category_router)
 app.include_router(inventory_router)
-app.include_router(service_router)
\ No newline at end of file
+app.include_router(service_router)
+app.include_router(catalog_router)
\ No newline at end of file
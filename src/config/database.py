@@ -1,9 +1,24 @@
-from typing import Generator, Optional
+import itertools
+from typing import AsyncGenerator, Generator, List, Optional
 from contextlib import contextmanager
 
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 from src.config.settings import settings
+from src.config.pool_metrics import InstrumentedQueuePool, PoolMetrics, pool_status
+from src.config.query_metrics import instrument_engine
+
+
+def pool_kwargs_from_settings() -> dict:
+    """Engine pool arguments taken from Settings (DB_POOL_*)."""
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
 
 
 class Database:
@@ -17,18 +32,105 @@ class Database:
       with db.session_scope() as session:
           ...
 
-    Provides a `get_db()` generator function used as a FastAPI dependency.
+    Provides a `get_db()` generator function used as a FastAPI dependency,
+    and `get_read_db()` which hands out sessions bound to a read replica
+    (round-robin or least-connections) when replicas are configured.
+    When async mode is enabled (``DB_ASYNC_ENABLED``) AsyncEngines are built
+    as well, for the primary and each replica: `get_async_db()` and
+    `get_async_read_db()` are their ``AsyncSession`` counterparts.
     """
 
-    def __init__(self, database_url: Optional[str] = None, **engine_kwargs):
+    def __init__(
+        self,
+        database_url: Optional[str] = None,
+        async_database_url: Optional[str] = None,
+        async_enabled: Optional[bool] = None,
+        replica_urls: Optional[List[str]] = None,
+        replica_strategy: Optional[str] = None,
+        **engine_kwargs,
+    ):
         """Initialize database connection."""
 
         self.database_url = database_url or settings.DATABASE_URL
-        # allow caller to override engine kwargs (pooling, echo, etc.)
-        self.engine = create_engine(self.database_url, **engine_kwargs)
-        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        # Pool sizing comes from Settings; callers can still override any
+        # engine kwarg (pooling, echo, etc.)
+        engine_kwargs = {**pool_kwargs_from_settings(), **engine_kwargs}
+        self.engine = self._create_engine(self.database_url, engine_kwargs)
+        # expire_on_commit=False applies to every session in the app, not only
+        # the RETURNING paths: repositories return rows mapped from
+        # UPDATE/INSERT ... RETURNING, and controllers read committed objects
+        # (stock events, cache snapshots) after commit. Expiring them would
+        # re-SELECT each one. Objects keep their committed values; call
+        # db.refresh() where a fresh read is needed after commit.
+        self.SessionLocal = sessionmaker(
+            autocommit=False, autoflush=False, expire_on_commit=False, bind=self.engine
+        )
         self.Base = declarative_base()
 
+        # Read replicas (read-only sessions); writes always use self.engine
+        self.replica_strategy = replica_strategy or settings.DB_REPLICA_STRATEGY
+        if self.replica_strategy not in ("round_robin", "least_connections"):
+            raise ValueError(f"Unknown replica strategy '{self.replica_strategy}'.")
+        urls = settings.replica_urls if replica_urls is None else replica_urls
+        self.replica_engines = [self._create_engine(url, engine_kwargs) for url in urls]
+        self.ReplicaSessionLocals = [
+            sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=replica)
+            for replica in self.replica_engines
+        ]
+        self._round_robin = itertools.count()
+
+        # Async engine shares the Base/metadata with the sync engine; only the
+        # driver (asyncpg / psycopg async) differs.
+        self.async_enabled = settings.DB_ASYNC_ENABLED if async_enabled is None else async_enabled
+        self.async_database_url = async_database_url or settings.ASYNC_DATABASE_URL
+        self.async_engine = None
+        self.AsyncSessionLocal = None
+        self.async_replica_engines = []
+        self.AsyncReplicaSessionLocals = []
+        if self.async_enabled:
+            self.async_engine = self._create_async_engine(self.async_database_url, engine_kwargs)
+            # expire_on_commit=False: attribute access after commit would
+            # otherwise trigger implicit IO, which AsyncSession cannot do.
+            self.AsyncSessionLocal = async_sessionmaker(
+                self.async_engine, autoflush=False, expire_on_commit=False
+            )
+            self.async_replica_engines = [
+                self._create_async_engine(settings.async_url(url), engine_kwargs) for url in urls
+            ]
+            self.AsyncReplicaSessionLocals = [
+                async_sessionmaker(replica, autoflush=False, expire_on_commit=False)
+                for replica in self.async_replica_engines
+            ]
+
+    @staticmethod
+    def _create_engine(url: str, engine_kwargs: dict):
+        engine = create_engine(url, **{"poolclass": InstrumentedQueuePool, **engine_kwargs})
+        if isinstance(engine.pool, InstrumentedQueuePool):
+            engine.pool.metrics = PoolMetrics()
+        if settings.DB_QUERY_STATS_ENABLED:
+            instrument_engine(engine)
+        return engine
+
+    @staticmethod
+    def _create_async_engine(url: str, engine_kwargs: dict):
+        engine = create_async_engine(url, **engine_kwargs)
+        if settings.DB_QUERY_STATS_ENABLED:
+            instrument_engine(engine.sync_engine)
+        return engine
+
+    @property
+    def engines(self) -> list:
+        """Primary engine followed by the replica engines."""
+        return [self.engine, *self.replica_engines]
+
+    def _pick_replica(self) -> sessionmaker:
+        return self.ReplicaSessionLocals[self._replica_index(self.replica_engines)]
+
+    def _replica_index(self, engines: list) -> int:
+        if self.replica_strategy == "least_connections":
+            return min(range(len(engines)), key=lambda i: engines[i].pool.checkedout())
+        return next(self._round_robin) % len(engines)
+
     def get_db(self) -> Generator:
         db = self.SessionLocal()
         try:
@@ -36,6 +138,39 @@ class Database:
         finally:
             db.close()
 
+    def get_read_db(self, use_primary: bool = False) -> Generator:
+        """Yield a session for read-only work.
+
+        Falls back to the primary when no replicas are configured or when
+        `use_primary` is set (read-your-writes window after a client write).
+        """
+        if use_primary or not self.ReplicaSessionLocals:
+            factory = self.SessionLocal
+        else:
+            factory = self._pick_replica()
+        db = factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    async def get_async_db(self) -> AsyncGenerator[AsyncSession, None]:
+        if self.AsyncSessionLocal is None:
+            raise RuntimeError("Async database mode is disabled. Set DB_ASYNC_ENABLED=true.")
+        async with self.AsyncSessionLocal() as db:
+            yield db
+
+    async def get_async_read_db(self, use_primary: bool = False) -> AsyncGenerator[AsyncSession, None]:
+        """Async counterpart of `get_read_db`, over the async replica engines."""
+        if self.AsyncSessionLocal is None:
+            raise RuntimeError("Async database mode is disabled. Set DB_ASYNC_ENABLED=true.")
+        if use_primary or not self.AsyncReplicaSessionLocals:
+            factory = self.AsyncSessionLocal
+        else:
+            factory = self.AsyncReplicaSessionLocals[self._replica_index(self.async_replica_engines)]
+        async with factory() as db:
+            yield db
+
     @contextmanager
     def session_scope(self):
         """Context manager that yields a session and ensures it is closed.
@@ -52,6 +187,24 @@ class Database:
         finally:
             db.close()
 
+    def pool_status(self) -> dict:
+        """Checked-out/idle/overflow counts and wait metrics of the pools
+        (the async one, when enabled, without wait metrics)."""
+        status = pool_status(self.engine.pool)
+        status["replicas"] = [pool_status(replica.pool) for replica in self.replica_engines]
+        if self.async_engine is not None:
+            status["async_pool"] = pool_status(self.async_engine.pool)
+        return status
+
+    async def dispose(self) -> None:
+        """Close pooled connections of all engines (used on app shutdown)."""
+        for engine in self.engines:
+            engine.dispose()
+        if self.async_engine is not None:
+            await self.async_engine.dispose()
+        for replica in self.async_replica_engines:
+            await replica.dispose()
+
 
 # Default, module-level instance for convenience and backwards compatibility
 default_db = Database()
@@ -59,6 +212,20 @@ default_db = Database()
 engine = default_db.engine
 SessionLocal = default_db.SessionLocal
 Base = default_db.Base
+async_engine = default_db.async_engine
+AsyncSessionLocal = default_db.AsyncSessionLocal
 
 def get_db():
     yield from default_db.get_db()
+
+def get_read_db():
+    """Replica-backed session, without the read-your-writes guard.
+
+    Routes should depend on `src.dependency.database.get_read_db`, which
+    pins clients that just wrote to the primary.
+    """
+    yield from default_db.get_read_db()
+
+async def get_async_db():
+    async for db in default_db.get_async_db():
+        yield db
@@ -0,0 +1,121 @@
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import exc
+from sqlalchemy.pool import QueuePool
+
+# Upper bounds (milliseconds) of the checkout wait-time histogram buckets.
+WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class PoolMetrics:
+    """Thread-safe counters and wait-time histogram for one connection pool."""
+
+    def __init__(self, buckets_ms: tuple = WAIT_BUCKETS_MS):
+        self._lock = threading.Lock()
+        self.buckets_ms = buckets_ms
+        # one extra slot for waits above the largest bucket (+Inf)
+        self._bucket_counts = [0] * (len(buckets_ms) + 1)
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_sum_ms = 0.0
+        self.wait_max_ms = 0.0
+
+    def observe_wait(self, seconds: float) -> None:
+        ms = seconds * 1000
+        with self._lock:
+            self.checkouts += 1
+            self.wait_sum_ms += ms
+            self.wait_max_ms = max(self.wait_max_ms, ms)
+            for i, bound in enumerate(self.buckets_ms):
+                if ms <= bound:
+                    self._bucket_counts[i] += 1
+                    break
+            else:
+                self._bucket_counts[-1] += 1
+
+    def record_timeout(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            # cumulative counts, Prometheus style (count of waits <= le)
+            histogram: List[Dict[str, Any]] = []
+            running = 0
+            for bound, count in zip(list(self.buckets_ms) + ["+Inf"], self._bucket_counts):
+                running += count
+                histogram.append({"le": str(bound), "count": running})
+            return {
+                "checkouts_total": self.checkouts,
+                "timeouts_total": self.timeouts,
+                "wait_sum_ms": round(self.wait_sum_ms, 3),
+                "wait_max_ms": round(self.wait_max_ms, 3),
+                "wait_histogram": histogram,
+            }
+
+
+# seconds the current thread's checkout spent opening a new DBAPI connection
+_connect_time = threading.local()
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that times how long checkouts wait for a free connection
+    and counts pool timeouts.
+
+    Only the queue wait is observed: time spent opening a new connection
+    (overflow) is subtracted, and ``pre_ping`` runs after ``_do_get`` so it
+    is never included.
+
+    The metrics object is attached after engine creation
+    (``engine.pool.metrics = PoolMetrics()``) and carried over when the pool
+    is recreated by ``engine.dispose()``.
+    """
+
+    metrics: Optional[PoolMetrics] = None
+
+    def _create_connection(self):
+        start = time.perf_counter()
+        try:
+            return super()._create_connection()
+        finally:
+            _connect_time.seconds = getattr(_connect_time, "seconds", 0.0) + time.perf_counter() - start
+
+    def _do_get(self):
+        if self.metrics is None:
+            return super()._do_get()
+        _connect_time.seconds = 0.0
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self.metrics.record_timeout()
+            raise
+        finally:
+            waited = time.perf_counter() - start - _connect_time.seconds
+            self.metrics.observe_wait(max(waited, 0.0))
+
+    def recreate(self) -> "InstrumentedQueuePool":
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+def pool_status(pool: QueuePool) -> Dict[str, Any]:
+    """Live occupancy of a QueuePool plus its metrics, if instrumented."""
+    status: Dict[str, Any] = {
+        "pool_size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "idle": pool.checkedin(),
+        # QueuePool.overflow() is negative while the pool is still filling up
+        "overflow": max(pool.overflow(), 0),
+        # the pool's own limit: engines built with an overridden
+        # max_overflow (Database(**engine_kwargs)) differ from settings
+        "max_overflow": pool._max_overflow,
+        "timeout_seconds": pool.timeout(),
+    }
+    metrics = getattr(pool, "metrics", None)
+    if metrics is not None:
+        status.update(metrics.snapshot())
+    return status
@@ -0,0 +1,88 @@
+import contextvars
+import logging
+import re
+import time
+from collections import Counter
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.engine.interfaces import ExecuteStyle
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+class QueryStats:
+    """Statements issued while handling one request.
+
+    Statements are fingerprinted by their SQL text: parameters are bound
+    separately, so the same lazy-load run for every row of a list shows up
+    as the same fingerprint many times.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.total_seconds = 0.0
+        self.fingerprints: Counter = Counter()
+
+    def record(self, statement: str, seconds: float, batched: bool = False) -> None:
+        self.count += 1
+        self.total_seconds += seconds
+        # executemany / insertmanyvalues pages repeat the same SQL by design
+        if not batched:
+            self.fingerprints[_WHITESPACE.sub(" ", statement).strip()] += 1
+
+    @property
+    def total_ms(self) -> float:
+        return self.total_seconds * 1000
+
+    def repeated(self, threshold: int) -> list:
+        """(fingerprint, count) pairs that ran more than `threshold` times."""
+        return [(sql, n) for sql, n in self.fingerprints.most_common() if n > threshold]
+
+
+# Set by the HTTP middleware for the duration of a request. Sync routes run in
+# the threadpool with a copy of the context, which still references the same
+# QueryStats object, so their statements are counted too.
+current_query_stats: contextvars.ContextVar[Optional[QueryStats]] = contextvars.ContextVar(
+    "current_query_stats", default=None
+)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start = conn.info["query_start_time"].pop()
+    stats = current_query_stats.get()
+    if stats is not None:
+        batched = context is not None and context.execute_style is not ExecuteStyle.EXECUTE
+        stats.record(statement, time.perf_counter() - start, batched=batched)
+
+
+def _handle_error(exception_context):
+    # keep the start-time stack balanced when a statement fails
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_start_time"):
+        conn.info["query_start_time"].pop()
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Attach the per-request statement counters to a (sync) engine."""
+    if event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+def warn_repeated_statements(stats: QueryStats, threshold: int, where: str) -> None:
+    """Log a warning for each statement shape that looks like an N+1."""
+    for sql, n in stats.repeated(threshold):
+        logger.warning(
+            "Possible N+1 in %s: statement ran %d times (threshold %d): %s",
+            where, n, threshold, sql[:300],
+        )
@@ -1,7 +1,8 @@
 from pydantic_settings import BaseSettings
-from pydantic import model_validator, PostgresDsn
+from pydantic import Field, model_validator, PostgresDsn
+from sqlalchemy.engine import make_url
 from dotenv import load_dotenv
-from typing import Optional
+from typing import Dict, List, Optional
 import os
 
 load_dotenv()
@@ -25,11 +26,142 @@ class Settings(BaseSettings):
     # DB driver: 'psycopg' (psycopg3) or 'psycopg2'
     DB_DRIVER: str = os.getenv("DB_DRIVER", "psycopg2")
 
+    # Async mode: builds AsyncEngines (primary and replicas) next to the sync
+    # ones; the hot read routes then run on the event loop (`get_async_read_db`)
+    # instead of in the threadpool.
+    # ASYNC_DATABASE_URL is derived from DATABASE_URL when not provided.
+    DB_ASYNC_ENABLED: bool = False
+    DB_ASYNC_DRIVER: str = os.getenv("DB_ASYNC_DRIVER", "asyncpg")
+    ASYNC_DATABASE_URL: Optional[str] = None
+
+    # Connection pool (applied to every engine built by Database)
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = 1800  # seconds, -1 disables
+    DB_POOL_PRE_PING: bool = True
+
+    # Read replicas: comma-separated URLs used by GET routes via get_read_db.
+    # Strategy is "round_robin" or "least_connections". After a write, the
+    # client is pinned to the primary for DB_READ_YOUR_WRITES_SECONDS so it
+    # does not read stale data from a lagging replica.
+    DATABASE_REPLICA_URLS: str = ""
+    DB_REPLICA_STRATEGY: str = "round_robin"
+    DB_READ_YOUR_WRITES_SECONDS: float = 5.0
+
+    # Per-request SQL instrumentation: statement count and DB time are sent as
+    # Server-Timing / X-DB-Queries headers; a warning is logged when the same
+    # statement runs more than DB_N_PLUS_ONE_THRESHOLD times in one request.
+    DB_QUERY_STATS_ENABLED: bool = True
+    DB_N_PLUS_ONE_THRESHOLD: int = 5
+
+    # Size of the AnyIO threadpool that runs sync (`def`) routes.
+    # Starlette's default is 40 tokens per worker.
+    THREADPOOL_MAX_WORKERS: int = 40
+
+    # Stock ledger compaction: every STOCK_COMPACTION_INTERVAL_SECONDS, stock
+    # movements older than STOCK_COMPACTION_MIN_AGE_SECONDS are folded into
+    # the inventory snapshot. 0 disables the background task.
+    STOCK_COMPACTION_INTERVAL_SECONDS: float = 60
+    STOCK_COMPACTION_MIN_AGE_SECONDS: float = 300
+
+    # Notifications (low-stock alerts) go through the outbox_events table and
+    # are delivered by a background dispatcher to the sinks listed in
+    # NOTIFICATION_SINKS (comma-separated: log, webhook, email).
+    # NOTIFICATION_WEBHOOK_URL=stub records requests in memory instead of
+    # sending them. OUTBOX_POLL_INTERVAL_SECONDS=0 disables the dispatcher.
+    # Dispatched events are deleted after OUTBOX_RETENTION_HOURS (0 keeps
+    # them); events that exhaust OUTBOX_MAX_ATTEMPTS are dead-lettered.
+    NOTIFICATION_SINKS: str = "log"
+    NOTIFICATION_WEBHOOK_URL: Optional[str] = None
+    NOTIFICATION_WEBHOOK_TIMEOUT_SECONDS: float = 5.0
+    NOTIFICATION_EMAIL_TO: Optional[str] = None
+    OUTBOX_POLL_INTERVAL_SECONDS: float = 1.0
+    OUTBOX_BATCH_SIZE: int = 100
+    OUTBOX_MAX_ATTEMPTS: int = 8
+    OUTBOX_RETRY_BASE_SECONDS: float = 2.0
+    OUTBOX_LEASE_SECONDS: float = 60.0
+    OUTBOX_RETENTION_HOURS: float = 168
+
+    # Live inventory push (GET /inventory/stream, WS /inventory/ws): idle
+    # connections get a heartbeat every INVENTORY_STREAM_HEARTBEAT_SECONDS; a
+    # client more than INVENTORY_STREAM_MAX_QUEUED events behind is dropped.
+    # INVENTORY_STREAM_CROSS_WORKER relays events between workers with
+    # pg_notify (can be turned off when running a single worker). Clients that
+    # cannot send headers connect with a ticket valid for
+    # INVENTORY_STREAM_TICKET_SECONDS.
+    INVENTORY_STREAM_HEARTBEAT_SECONDS: float = 15.0
+    INVENTORY_STREAM_MAX_QUEUED: int = 1000
+    INVENTORY_STREAM_CROSS_WORKER: bool = True
+    INVENTORY_STREAM_TICKET_SECONDS: int = 30
+
+    # The service_cost_rollup materialized view is refreshed in the background
+    # COST_ROLLUP_REFRESH_DELAY_SECONDS after a catalog write, once per burst
+    # of writes; 0 refreshes it inside the write request.
+    COST_ROLLUP_REFRESH_DELAY_SECONDS: float = 2.0
+
+    # Cache of catalog reads (categories, products, services). Writes through
+    # the repositories evict the affected entries in every worker; the TTL
+    # bounds staleness for changes made outside the API.
+    # CATALOG_CACHE_BACKEND:
+    #   memory        - per-worker LRU; invalidations reach the other workers
+    #                   through Postgres LISTEN/NOTIFY
+    #   shared_memory - mmap'ed file shared by the workers of one host
+    #                   (CATALOG_CACHE_MAX_ENTRIES slots of
+    #                   CATALOG_CACHE_SHM_SLOT_BYTES; larger values are skipped)
+    #   redis         - any Redis-protocol server at CATALOG_CACHE_REDIS_URL
+    CATALOG_CACHE_ENABLED: bool = True
+    CATALOG_CACHE_BACKEND: str = "memory"
+    CATALOG_CACHE_MAX_ENTRIES: int = 2048
+    CATALOG_CACHE_TTL_SECONDS: float = 30.0
+    CATALOG_CACHE_SHM_PATH: Optional[str] = None  # default: /dev/shm/fixing_service_catalog_cache
+    CATALOG_CACHE_SHM_SLOT_BYTES: int = 65536
+    CATALOG_CACHE_REDIS_URL: str = "redis://localhost:6379/0"
+    CATALOG_CACHE_REDIS_PREFIX: str = "catalog:"
+
+    # GET /catalog/snapshot: the whole catalog kept pre-serialized per worker,
+    # patched on catalog writes and rebuilt in full after this many seconds.
+    CATALOG_SNAPSHOT_MAX_AGE_SECONDS: float = 300.0
+
+    # Conditional GETs on catalog/inventory routes: ETag and Last-Modified come
+    # from the catalog_versions counters, and a matching If-None-Match gets a
+    # 304 without running the route's query. Cache-Control is
+    # HTTP_CACHE_CONTROL unless HTTP_CACHE_CONTROL_ROUTES (JSON object keyed by
+    # endpoint name, e.g. {"list_categories": "public, max-age=60"}) overrides it.
+    HTTP_CONDITIONAL_ENABLED: bool = True
+    HTTP_CACHE_CONTROL: str = "private, no-cache"
+    HTTP_CACHE_CONTROL_ROUTES: Dict[str, str] = {}
+
+    # Admin/technical accounts resolved from access tokens, cached per worker
+    # by (role, subject, iat). Account updates evict them in every worker;
+    # the TTL bounds staleness for changes made outside the API.
+    PRINCIPAL_CACHE_ENABLED: bool = True
+    PRINCIPAL_CACHE_TTL_SECONDS: float = 60.0
+    PRINCIPAL_CACHE_MAX_ENTRIES: int = 4096
+
+    # bcrypt runs on PASSWORD_HASH_WORKERS threads (0 = one per CPU). Up to
+    # PASSWORD_HASH_MAX_QUEUED more calls wait for a worker; further logins and
+    # password changes get 503 with Retry-After until the queue drains.
+    PASSWORD_HASH_WORKERS: int = 0
+    PASSWORD_HASH_MAX_QUEUED: int = 32
+    # bcrypt work factor for new hashes (each +1 doubles the cost; measure
+    # with examples/bcrypt_benchmark.py). Hashes made with another factor are
+    # rehashed at the user's next successful login.
+    BCRYPT_ROUNDS: int = Field(12, ge=4, le=31)
+
     # JWT settings (optional - only needed for authentication endpoints)
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     SECRET_KEY: Optional[str] = os.getenv("SECRET_KEY", "a_very_secret_key_change_in_production")
     ALGORITHM: str = "HS256"
 
+    @property
+    def replica_urls(self) -> List[str]:
+        return [url.strip() for url in self.DATABASE_REPLICA_URLS.split(",") if url.strip()]
+
+    @property
+    def notification_sinks(self) -> List[str]:
+        return [name.strip().lower() for name in self.NOTIFICATION_SINKS.split(",") if name.strip()]
+
     @model_validator(mode="after")
     def construct_db_url(self):
         """Construct DATABASE_URL from individual components if not provided.
@@ -39,7 +171,7 @@ class Settings(BaseSettings):
         """
         # If DATABASE_URL is already provided, keep it.
         if self.DATABASE_URL:
-            return self
+            return self.construct_async_db_url()
 
         # Get values from instance or environment variables
         user = self.DB_USER or os.getenv("DB_USER") or "postgres"  # Default to postgres
@@ -56,6 +188,19 @@ class Settings(BaseSettings):
             auth = f"{user}@"
 
         self.DATABASE_URL = f"postgresql+{driver}://{auth}{host}:{port}/{db}"
+        return self.construct_async_db_url()
+
+    def construct_async_db_url(self):
+        """Derive ASYNC_DATABASE_URL from DATABASE_URL by swapping the driver."""
+        if not self.ASYNC_DATABASE_URL:
+            self.ASYNC_DATABASE_URL = self.async_url(self.DATABASE_URL)
         return self
 
+    def async_url(self, database_url: str) -> str:
+        """`database_url` with its driver swapped for DB_ASYNC_DRIVER."""
+        url = make_url(database_url)
+        return url.set(
+            drivername=f"{url.get_backend_name()}+{self.DB_ASYNC_DRIVER}"
+        ).render_as_string(hide_password=False)
+
 settings = Settings()
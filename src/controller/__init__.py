@@ -1,8 +1,9 @@
 from .admin_controller import AdminController
 from .technical_controller import TechnicalController
-from .category_controller import CategoryController
+from .category_controller import AsyncCategoryController, CategoryController
 from .inventory_controller import InventoryController
-from .product_controller import ProductController
+from .product_controller import AsyncProductController, ProductController
 
 
-__all__ = ["AdminController","TechnicalController","CategoryController","InventoryController","ProductController"]
\ No newline at end of file
+__all__ = ["AdminController","TechnicalController","CategoryController","InventoryController","ProductController",
+           "AsyncCategoryController","AsyncProductController"]
\ No newline at end of file
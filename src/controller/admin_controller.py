@@ -6,8 +6,10 @@ from src.models.admin_model import AdminLogin, AdminCreate, AdminUpdate
 from src.schemas.admin import adminModel
 from src.schemas.techincal import TechnicalModel
 from src.models.technical_model import TechnicalCreate
-from src.utils.hash_password import hash_password
-from src.utils.verify_password import verify_password
+from src.service.password_hasher import PasswordHasherBusy, password_hasher
+from src.utils.hash_password import needs_rehash
+from sqlalchemy.exc import SQLAlchemyError
+from src.service.principal_cache import principal_cache
 from uuid import UUID
 
 class AdminController:
@@ -24,8 +26,17 @@ class AdminController:
         if not admin:
             return None
         
-        if not verify_password(admin_in.password, admin.password):
+        if not password_hasher.verify_password(admin_in.password, admin.password):
             return None
+
+        # Upgrade the stored hash to the configured BCRYPT_ROUNDS; best effort
+        if needs_rehash(admin.password):
+            try:
+                self.admin_repo.update(admin, {"password": password_hasher.hash_password(admin_in.password)})
+            except PasswordHasherBusy:
+                pass  # retried at the next login
+            except SQLAlchemyError:
+                self.admin_repo.db.rollback()
         
         return admin
 
@@ -46,7 +57,7 @@ class AdminController:
         if self.admin_repo.get_by_email_phone(admin_in.email_phone):
             raise HTTPException(status.HTTP_409_CONFLICT, detail="Email/Phone already in use.")
 
-        hashed_password = hash_password(admin_in.password)
+        hashed_password = password_hasher.hash_password(admin_in.password)
         return self.admin_repo.create(admin_in, hashed_password)
 
     def update_admin(self, admin_id: UUID, admin_in: AdminUpdate) -> adminModel:
@@ -57,9 +68,11 @@ class AdminController:
         # (This requires your AdminUpdate model to handle Optional fields)
         update_data = admin_in.dict(exclude_unset=True)
         if "password" in update_data:
-             update_data["password"] = hash_password(update_data["password"])
+             update_data["password"] = password_hasher.hash_password(update_data["password"])
 
-        return self.admin_repo.update(admin, update_data)
+        admin = self.admin_repo.update(admin, update_data)
+        principal_cache.invalidate(admin_id, self.admin_repo.db)
+        return admin
 
     def create_technical_account(self, tech_in: TechnicalCreate) -> TechnicalModel:
         """Create a technical account with cross-table conflict checks."""
@@ -75,5 +88,5 @@ class AdminController:
         if self.admin_repo.get_by_email_phone(tech_in.phone_number):
             raise HTTPException(status.HTTP_409_CONFLICT, detail="Phone number linked to an Admin account.")
 
-        hashed_password = hash_password(tech_in.password)
+        hashed_password = password_hasher.hash_password(tech_in.password)
         return self.tech_repo.create(tech_in, hashed_password)
\ No newline at end of file
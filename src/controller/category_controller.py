@@ -1,10 +1,13 @@
 
 # src/controllers/category_controller.py
 
-from typing import Optional, List
+from typing import Optional, List, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from src.repositories.category_repositories import CategoryRepository
+from src.repositories.category_repositories import AsyncCategoryRepository, CategoryRepository
 from src.schemas.product import Category  # ORM model
+from src.models.category_model import CategoryResponse
+from src.service.catalog_cache import CATEGORY, cached
 
 
 class CategoryController:
@@ -30,9 +33,16 @@ class CategoryController:
             raise ValueError(f"Category with ID {category_id} not found.")
         return category
 
+    @cached(CATEGORY, CategoryResponse)
     def list_category(self, skip: int = 0, limit: int = 100) -> List[Category]:
         return self.category_repo.list(skip=skip, limit=limit)
 
+    @cached(CATEGORY, CategoryResponse)
+    def list_category_page(
+        self, cursor: Optional[str] = None, limit: int = 100, sort: Optional[str] = None
+    ) -> Tuple[List[Category], Optional[str]]:
+        return self.category_repo.list_keyset(cursor=cursor, limit=limit, sort=sort)
+
     def update_category(
         self,
         category_id: int,
@@ -69,3 +79,21 @@ class CategoryController:
 
         # Use repository delete (expects an ID)
         return self.category_repo.delete(category_id)
+
+
+class AsyncCategoryController:
+    """Category listings on an AsyncSession (async mode); shares its cache
+    entries with CategoryController."""
+
+    def __init__(self, db: AsyncSession):
+        self.category_repo = AsyncCategoryRepository(db)
+
+    @cached(CATEGORY, CategoryResponse)
+    async def list_category(self, skip: int = 0, limit: int = 100) -> List[Category]:
+        return await self.category_repo.list(skip=skip, limit=limit)
+
+    @cached(CATEGORY, CategoryResponse)
+    async def list_category_page(
+        self, cursor: Optional[str] = None, limit: int = 100, sort: Optional[str] = None
+    ) -> Tuple[List[Category], Optional[str]]:
+        return await self.category_repo.list_keyset(cursor=cursor, limit=limit, sort=sort)
@@ -1,19 +1,59 @@
 
 # src/controller/inventory.py
-from typing import List, Optional
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 from decimal import Decimal
-from datetime import date
 
 from sqlalchemy.orm import Session
 from src.repositories.inventory_repositories import InventoryRepository
+from src.repositories.stock_movement_repositories import StockMovementRepository
+from src.repositories.outbox_repositories import OutboxRepository
+from src.repositories.service_availability_repositories import ServiceAvailabilityRepository
+from src.service.notifications import LOW_STOCK_EVENT
+from src.service.inventory_events import STOCK_EVENT, inventory_events
+from src.schemas.product import Inventory, StockMovement
+from src.models.inventory_model import LowStockAlert
+
+
+def _low_stock_payload(
+    product_id: int, name: str, current_stock: Decimal, min_stock_level: Decimal, reason: str
+) -> Dict[str, Any]:
+    # JSON-serializable copy for the outbox (Decimals as floats, like the API)
+    return {
+        "product_id": product_id,
+        "name": name,
+        "current_stock": float(current_stock),
+        "min_stock_level": float(min_stock_level),
+        "shortfall": float(min_stock_level - current_stock),
+        "reason": reason,
+    }
+
+
+def _stock_event(inventory: Inventory) -> Tuple[str, Dict[str, Any]]:
+    # live push to the dashboards (WebSocket/SSE), published after commit
+    return STOCK_EVENT, {
+        "product_id": inventory.product_id,
+        "current_stock": float(inventory.current_stock),
+        "min_stock_level": float(inventory.min_stock_level) if inventory.min_stock_level is not None else None,
+    }
 
 
 class InventoryController:
     def __init__(self, db: Session):
         self.db = db
         self.inventory_repo = InventoryRepository(db)
-
-    def set_current_stock(self, product_id: int, new_stock: float | Decimal):
+        self.movement_repo = StockMovementRepository(db)
+        self.outbox_repo = OutboxRepository(db)
+        self.availability_repo = ServiceAvailabilityRepository(db)
+
+    def _announce(self, product_ids: List[int], events: List[Tuple[str, Dict[str, Any]]]) -> None:
+        # After commit, in one short transaction: bump the catalog versions
+        # and NOTIFY the cache invalidation and the events to the other
+        # workers. The availability refresh queued with the write is left
+        # to the outbox dispatcher.
+        self.inventory_repo.invalidate_cache(*product_ids, notify=inventory_events.notifications(events))
+        inventory_events.publish(events)
+
+    def set_current_stock(self, product_id: int, new_stock: float | Decimal, actor: Optional[str] = None):
         # Validate input
         if new_stock is None:
             raise ValueError("new_stock must be provided.")
@@ -22,72 +62,174 @@ class InventoryController:
         if new_stock_dec < Decimal("0"):
             raise ValueError("new_stock must be a non-negative number.")
 
-        inventory = self.inventory_repo.get_by_product_id(product_id)
-        if not inventory:
-            raise ValueError(f"Inventory record not found for product ID {product_id}.")
-
-        # Update stock via repository
-        return self.inventory_repo.update_stock(product_id, new_stock_dec)
-
-    def record_incoming_stock(self, product_id: int, quantity: float | Decimal, set_restock_date: bool = True):
+        # Recorded as an adjustment movement of (new - current), computed in
+        # the INSERT itself; the lock keeps a concurrent deduction from
+        # slipping in between
+        try:
+            if not self.inventory_repo.lock_for_update([product_id]):
+                raise ValueError(f"Inventory record not found for product ID {product_id}.")
+            delta = self.movement_repo.append_adjustment(product_id, new_stock_dec, actor=actor)
+            if delta:
+                self.availability_repo.enqueue_refresh(product_ids=[product_id])
+            inventory = self.inventory_repo.reload(product_id)
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        if delta:
+            # cached product reads embed the stock
+            self._announce([product_id], [_stock_event(inventory)])
+        return inventory
+
+    def record_incoming_stock(
+        self,
+        product_id: int,
+        quantity: float | Decimal,
+        set_restock_date: bool = True,
+        actor: Optional[str] = None,
+    ):
         if quantity is None:
             raise ValueError("Quantity to add must be provided.")
         qty_dec = quantity if isinstance(quantity, Decimal) else Decimal(str(quantity))
         if qty_dec <= Decimal("0"):
             raise ValueError("Quantity to add must be positive.")
 
-        inventory = self.inventory_repo.get_by_product_id(product_id)
-        if not inventory:
-            raise ValueError(f"Inventory record not found for product ID {product_id}.")
-
-        new_stock = (inventory.current_stock or Decimal("0")) + qty_dec
-
-        # Optionally update last_restock_date
-        if set_restock_date:
-            return self.inventory_repo.update_inventory_fields(
-                product_id,
-                current_stock=new_stock,
-                last_restock_date=date.today(),
-            )
-        else:
-            return self.inventory_repo.update_stock(product_id, new_stock)
-
-    def process_stock_deduction(self, product_id: int, quantity: float | Decimal):
+        # A restock cannot oversell, so it is a plain append: no read of the
+        # current stock and no write to the inventory row (the restock date
+        # is derived from the latest "restock" movement; undated ones are
+        # recorded as "receipt")
+        try:
+            if self.inventory_repo.get(product_id) is None:
+                raise ValueError(f"Inventory record not found for product ID {product_id}.")
+            reason = "restock" if set_restock_date else "receipt"
+            self.movement_repo.append(product_id, qty_dec, reason, actor=actor)
+            self.availability_repo.enqueue_refresh(product_ids=[product_id])
+            inventory = self.inventory_repo.reload(product_id)
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        self._announce([product_id], [_stock_event(inventory)])
+        return inventory
+
+    def process_stock_deduction(self, product_id: int, quantity: float | Decimal, actor: Optional[str] = None):
         if quantity is None:
             raise ValueError("Quantity to deduct must be provided.")
         qty_dec = quantity if isinstance(quantity, Decimal) else Decimal(str(quantity))
         if qty_dec <= Decimal("0"):
             raise ValueError("Quantity to deduct must be positive.")
 
-        inventory = self.inventory_repo.get_by_product_id(product_id)
-        if not inventory:
-            raise ValueError(f"Inventory record not found for product ID {product_id}.")
-
-        current = inventory.current_stock or Decimal("0")
-        if current < qty_dec:
-            raise ValueError(f"Insufficient stock (Current: {current}) to deduct {qty_dec}.")
-
-        new_stock = current - qty_dec
-        updated_inventory = self.inventory_repo.update_stock(product_id, new_stock)
-
-        # Reorder Alert Logic
-        if (
-            updated_inventory.min_stock_level is not None
-            and updated_inventory.current_stock is not None
-            and updated_inventory.current_stock <= updated_inventory.min_stock_level
-        ):
-            # Replace with your notifier (email, webhook, etc.)
-            print(f"NOTIFICATION: Product {product_id} reached reorder level.")
+        # Guarded append under the row lock, so two concurrent deductions
+        # cannot both pass the stock check
+        try:
+            if not self.inventory_repo.lock_for_update([product_id]):
+                raise ValueError(f"Inventory record not found for product ID {product_id}.")
+            row = self.movement_repo.append_guarded({product_id: -qty_dec}, "deduction", actor=actor)[0]
+            if not row.applied:
+                raise ValueError(f"Insufficient stock (Current: {row.stock}) to deduct {qty_dec}.")
+            remaining = row.stock - qty_dec
+
+            # Reorder alert, only when this deduction crosses the reorder
+            # point (like deduct_many): queued in the outbox with the deduction
+            # itself and delivered by the notification dispatcher
+            alert = None
+            if row.min_stock_level is not None and remaining <= row.min_stock_level < row.stock:
+                alert = _low_stock_payload(product_id, row.name, remaining, row.min_stock_level, "deduction")
+                self.outbox_repo.enqueue(LOW_STOCK_EVENT, alert)
+            self.availability_repo.enqueue_refresh(product_ids=[product_id])
+            inventory = self.inventory_repo.reload(product_id)
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+
+        events = [_stock_event(inventory)]
+        if alert:
+            events.append((LOW_STOCK_EVENT, alert))
+        self._announce([product_id], events)
+        return inventory
+
+    def deduct_many(
+        self,
+        quantities: Dict[int, float | Decimal],
+        reason: str = "deduction",
+        actor: Optional[str] = None,
+    ) -> Tuple[List[Inventory], List[Dict[str, Any]]]:
+        """Deduct stock for several products in one transaction (all or nothing).
+
+        Returns the updated inventory rows and the products that crossed
+        their reorder point with this deduction.
+        """
+        qty = {
+            product_id: q if isinstance(q, Decimal) else Decimal(str(q))
+            for product_id, q in quantities.items()
+        }
+        if any(q <= Decimal("0") for q in qty.values()):
+            raise ValueError("Quantities to deduct must be positive.")
+        if not qty:
+            return [], []
+
+        try:
+            locked = self.inventory_repo.lock_for_update(sorted(qty))
+            missing = set(qty) - set(locked)
+            if missing:
+                raise ValueError(
+                    f"Inventory record not found for product ID(s) {', '.join(map(str, sorted(missing)))}."
+                )
+            rows = self.movement_repo.append_guarded(
+                {pid: -q for pid, q in qty.items()}, reason, actor=actor
+            )
+            short = [
+                f"{row.product_id} (Current: {row.stock}, needed: {qty[row.product_id]})"
+                for row in rows
+                if not row.applied
+            ]
+            if short:
+                raise ValueError(f"Insufficient stock for product(s) {'; '.join(short)}.")
+
+            crossings = []
+            for row in rows:
+                remaining = row.stock - qty[row.product_id]
+                if row.min_stock_level is not None and remaining <= row.min_stock_level < row.stock:
+                    crossings.append(
+                        _low_stock_payload(row.product_id, row.name, remaining, row.min_stock_level, reason)
+                    )
+            self.outbox_repo.enqueue_many(LOW_STOCK_EVENT, crossings)
+            self.availability_repo.enqueue_refresh(product_ids=qty)
+            updated = self.inventory_repo.reload_many(sorted(qty))
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+
+        self._announce(
+            sorted(qty),
+            [_stock_event(inv) for inv in updated] + [(LOW_STOCK_EVENT, alert) for alert in crossings],
+        )
+
+        return updated, [
+            {key: alert[key] for key in ("product_id", "name", "current_stock", "min_stock_level", "shortfall")}
+            for alert in crossings
+        ]
 
-        return updated_inventory
+    def movement_history(
+        self, product_id: int, cursor: Optional[str] = None, limit: int = 100
+    ) -> Tuple[List[StockMovement], Optional[str]]:
+        """Ledger entries of one product, newest first."""
+        return self.movement_repo.list_for_product_keyset(product_id, cursor=cursor, limit=limit)
 
     def check_for_reorder(self) -> List[int]:
-        """Returns product_ids that need restocking."""
-        all_inventory = self.inventory_repo.list()
-        return [
-            inv.product_id
-            for inv in all_inventory
-            if inv.min_stock_level is not None
-            and inv.current_stock is not None
-            and inv.current_stock <= inv.min_stock_level
-        ]
+        """Returns product_ids that need restocking (all of them, filtered in SQL)."""
+        return self.inventory_repo.list_low_stock_ids()
+
+    def low_stock_alerts(self) -> Iterator[str]:
+        """Products at or below their reorder point, with name and shortfall,
+        as chunks of one JSON array.
+
+        Rows are serialized as the server-side cursor yields them, so the
+        whole list is never held in memory; iterate while the session is open.
+        """
+        yield "["
+        for i, row in enumerate(self.inventory_repo.iter_low_stock()):
+            yield ("," if i else "") + LowStockAlert.model_validate(row._asdict()).model_dump_json()
+        yield "]"
@@ -1,14 +1,18 @@
 
 # src/controller/product.py
 
-from typing import Optional, List
+from typing import Optional, List, Tuple, Dict, Any
 from decimal import Decimal
 
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from src.repositories.product_repositories import ProductRepository
-from src.repositories.category_repositories import CategoryRepository
+from src.repositories.product_repositories import AsyncProductRepository, ProductRepository, parse_include
+from src.repositories.category_repositories import AsyncCategoryRepository, CategoryRepository
 from src.schemas.product import Product  # use ORM model, not schema
+from src.models.product_model import ProductResponse
+from src.service.catalog_cache import PRODUCT, cached
+from src.service.cost_rollup import cost_rollup_refresher
 
 
 class ProductController:
@@ -49,19 +53,85 @@ class ProductController:
         )
         return product
 
+    def create_products_bulk(
+        self, rows: List[Tuple[int, Dict[str, Any]]]
+    ) -> Tuple[List[Product], List[Dict[str, Any]]]:
+        """Create many products in one transaction.
+
+        `rows` are (index, fields) pairs already validated against
+        ProductCreate. Rows breaking a business rule are skipped and reported
+        as {"index", "detail"}; the rest are inserted together.
+        """
+        errors: List[Dict[str, Any]] = []
+        taken = self.product_repo.existing_names([fields["name"] for _, fields in rows])
+        category_ids = {fields["category_id"] for _, fields in rows if fields.get("category_id") is not None}
+        known_categories = {c.categoryID for c in self.category_repo.list_by_ids(list(category_ids))}
+
+        valid: List[Dict[str, Any]] = []
+        for index, fields in rows:
+            name, category_id = fields["name"], fields.get("category_id")
+            if name in taken:
+                errors.append({"index": index, "detail": f"Product with name '{name}' already exists."})
+            elif category_id is not None and category_id not in known_categories:
+                errors.append({"index": index, "detail": f"Category with ID {category_id} does not exist."})
+            else:
+                taken.add(name)  # also rejects duplicates within the batch
+                valid.append(fields)
+
+        created = self.product_repo.create_many(valid) if valid else []
+        return created, errors
+
+    @cached(PRODUCT, ProductResponse, entity_arg="product_id")
     def get_product(self, product_id: int) -> Optional[Product]:
         """Retrieve a product by ID."""
         return self.product_repo.get_by_id(product_id)
 
-    def list_product(self, skip: int = 0, limit: int = 100) -> List[Product]:
-        """List products with pagination."""
-        return self.product_repo.list(skip=skip, limit=limit)
+    @cached(PRODUCT, ProductResponse)
+    def list_product(
+        self, skip: int = 0, limit: int = 100, include: Optional[str] = None
+    ) -> List[Product]:
+        """List products with pagination.
+
+        `include` is the comma-separated relations to eager-load (default all);
+        raises ValueError for unknown names.
+        """
+        return self.product_repo.list(skip=skip, limit=limit, include=parse_include(include))
 
-    def list_product_by_category(self, category_id: int, skip: int = 0, limit: int = 100) -> List[Product]:
+    @cached(PRODUCT, ProductResponse)
+    def list_product_by_category(
+        self, category_id: int, skip: int = 0, limit: int = 100, include: Optional[str] = None
+    ) -> List[Product]:
         """List products filtered by category with pagination."""
         if not self.category_repo.get_by_id(category_id):
             raise ValueError(f"Category with ID {category_id} does not exist.")
-        return self.product_repo.list_by_category(category_id, skip=skip, limit=limit)
+        return self.product_repo.list_by_category(category_id, skip=skip, limit=limit, include=parse_include(include))
+
+    @cached(PRODUCT, ProductResponse)
+    def list_product_page(
+        self,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        sort: Optional[str] = None,
+        include: Optional[str] = None,
+    ) -> Tuple[List[Product], Optional[str]]:
+        """List products one keyset page at a time; returns (items, next_cursor)."""
+        return self.product_repo.list_keyset(cursor=cursor, limit=limit, sort=sort, include=parse_include(include))
+
+    @cached(PRODUCT, ProductResponse)
+    def list_product_by_category_page(
+        self,
+        category_id: int,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        sort: Optional[str] = None,
+        include: Optional[str] = None,
+    ) -> Tuple[List[Product], Optional[str]]:
+        """Keyset-paginated variant of list_product_by_category."""
+        if not self.category_repo.get_by_id(category_id):
+            raise ValueError(f"Category with ID {category_id} does not exist.")
+        return self.product_repo.list_by_category_keyset(
+            category_id, cursor=cursor, limit=limit, sort=sort, include=parse_include(include)
+        )
 
     def update_product(
         self,
@@ -102,6 +172,9 @@ class ProductController:
             unit_cost=unit_cost,
             category_id=category_id,
         )
+        # unit_cost feeds the services' material-cost rollup
+        if unit_cost is not None:
+            cost_rollup_refresher.request()
         return updated
 
     def delete_product(self, product_id: int) -> bool:
@@ -110,3 +183,57 @@ class ProductController:
         Returns True when deleted, False if product not found.
         """
         return self.product_repo.delete(product_id)
+
+
+class AsyncProductController:
+    """Product listings on an AsyncSession (async mode).
+
+    Same method names and arguments as ProductController, so the two share
+    their catalog cache entries.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.product_repo = AsyncProductRepository(db)
+        self.category_repo = AsyncCategoryRepository(db)
+
+    @cached(PRODUCT, ProductResponse)
+    async def list_product(
+        self, skip: int = 0, limit: int = 100, include: Optional[str] = None
+    ) -> List[Product]:
+        return await self.product_repo.list(skip=skip, limit=limit, include=parse_include(include))
+
+    @cached(PRODUCT, ProductResponse)
+    async def list_product_by_category(
+        self, category_id: int, skip: int = 0, limit: int = 100, include: Optional[str] = None
+    ) -> List[Product]:
+        if not await self.category_repo.get_by_id(category_id):
+            raise ValueError(f"Category with ID {category_id} does not exist.")
+        return await self.product_repo.list_by_category(
+            category_id, skip=skip, limit=limit, include=parse_include(include)
+        )
+
+    @cached(PRODUCT, ProductResponse)
+    async def list_product_page(
+        self,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        sort: Optional[str] = None,
+        include: Optional[str] = None,
+    ) -> Tuple[List[Product], Optional[str]]:
+        return await self.product_repo.list_keyset(cursor=cursor, limit=limit, sort=sort, include=parse_include(include))
+
+    @cached(PRODUCT, ProductResponse)
+    async def list_product_by_category_page(
+        self,
+        category_id: int,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        sort: Optional[str] = None,
+        include: Optional[str] = None,
+    ) -> Tuple[List[Product], Optional[str]]:
+        if not await self.category_repo.get_by_id(category_id):
+            raise ValueError(f"Category with ID {category_id} does not exist.")
+        return await self.product_repo.list_by_category_keyset(
+            category_id, cursor=cursor, limit=limit, sort=sort, include=parse_include(include)
+        )
@@ -1,15 +1,37 @@
-from typing import Optional, List
+from collections import Counter
+from typing import Any, Dict, Optional, List, Tuple
 from decimal import Decimal
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from src.repositories.service_repositories import ServiceRepository
+from src.repositories.service_repositories import AsyncServiceRepository, ServiceRepository
+from src.repositories.product_repositories import ProductRepository
+from src.repositories.service_availability_repositories import ServiceAvailabilityRepository
+from src.controller.inventory_controller import InventoryController
 from src.schemas.product import Service
+from src.models.service_model import ServiceResponse
+from src.service.catalog_cache import SERVICE, cached
+from src.service.cost_rollup import cost_rollup_refresher
 
 
 class ServiceController:
     def __init__(self, db: Session):
         self.db = db
         self.service_repo = ServiceRepository(db)
+        self.product_repo = ProductRepository(db)
+        self.availability_repo = ServiceAvailabilityRepository(db)
+
+    def _validate_associations(self, associations: Optional[List[dict]]) -> None:
+        """Reject duplicate or unknown product ids up front (one IN query)."""
+        if not associations:
+            return
+        product_ids = [a["product_id"] for a in associations]
+        duplicates = sorted(pid for pid, n in Counter(product_ids).items() if n > 1)
+        if duplicates:
+            raise ValueError(f"Duplicate product ID(s) in associations: {', '.join(map(str, duplicates))}.")
+        missing = sorted(set(product_ids) - self.product_repo.existing_ids(product_ids))
+        if missing:
+            raise ValueError(f"Product ID(s) not found: {', '.join(map(str, missing))}.")
 
     def create_service(
         self,
@@ -24,6 +46,7 @@ class ServiceController:
         # Check name uniqueness
         if self.service_repo.get_by_name(name):
             raise ValueError(f"Service with name '{name}' already exists.")
+        self._validate_associations(associations)
 
         service = self.service_repo.create(
             name=name,
@@ -34,22 +57,74 @@ class ServiceController:
             is_available=is_available,
             associations=associations,
         )
+        self._refresh_availability(service.service_id)
+        cost_rollup_refresher.request()
         return service
 
+    def _refresh_availability(self, service_id: int) -> None:
+        # The repository committed the service already; queue the refresh so
+        # the outbox dispatcher retries it if running it now fails
+        refresh = self.availability_repo.enqueue_refresh(
+            service_ids=[service_id], delay_seconds=self.availability_repo.inline_grace_seconds
+        )
+        self.db.commit()
+        self.availability_repo.refresh_queued(refresh)
+
     def get_service(self, service_id: int) -> Optional[Service]:
         return self.service_repo.get_by_id(service_id)
 
+    @cached(SERVICE, ServiceResponse, entity_arg="service_id")
     def get_service_with_associations(self, service_id: int) -> Optional[Service]:
         return self.service_repo.get_by_id_with_relations(service_id)
 
     def list_services(self, skip: int = 0, limit: int = 100) -> List[Service]:
         return self.service_repo.list(skip=skip, limit=limit)
 
+    @cached(SERVICE, ServiceResponse)
     def list_services_with_associations(self, skip: int = 0, limit: int = 100) -> List[Service]:
         return self.service_repo.list_with_relations(skip=skip, limit=limit)
 
-    def list_available_services(self, skip: int = 0, limit: int = 100) -> List[Service]:
-        return self.service_repo.list_available(skip=skip, limit=limit)
+    @cached(SERVICE, ServiceResponse)
+    def list_available_services(self, skip: int = 0, limit: int = 100, stock_aware: bool = False) -> List[Service]:
+        return self.service_repo.list_available(skip=skip, limit=limit, stock_aware=stock_aware)
+
+    @cached(SERVICE, ServiceResponse)
+    def list_services_with_associations_page(
+        self, cursor: Optional[str] = None, limit: int = 100, sort: Optional[str] = None
+    ) -> Tuple[List[Service], Optional[str]]:
+        return self.service_repo.list_with_relations_keyset(cursor=cursor, limit=limit, sort=sort)
+
+    @cached(SERVICE, ServiceResponse)
+    def list_available_services_page(
+        self, cursor: Optional[str] = None, limit: int = 100, sort: Optional[str] = None,
+        stock_aware: bool = False,
+    ) -> Tuple[List[Service], Optional[str]]:
+        return self.service_repo.list_available_keyset(
+            cursor=cursor, limit=limit, sort=sort, stock_aware=stock_aware
+        )
+
+    def consume_service(
+        self, service_id: int, include_optional: bool = False, actor: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Deduct the service's bill of materials from inventory in one transaction.
+
+        Returns None if the service does not exist; raises ValueError (and
+        deducts nothing) if any part is missing or short.
+        """
+        service = self.service_repo.get_by_id_with_relations(service_id)
+        if not service:
+            return None
+
+        quantities: Dict[int, Decimal] = {}
+        for assoc in service.associations:
+            if assoc.is_optional and not include_optional:
+                continue
+            quantities[assoc.product_id] = quantities.get(assoc.product_id, Decimal("0")) + Decimal(assoc.quantity_required)
+
+        inventory, low_stock = InventoryController(self.db).deduct_many(
+            quantities, reason=f"service:{service_id}", actor=actor
+        )
+        return {"service_id": service_id, "inventory": inventory, "low_stock": low_stock}
 
     def update_service(
         self,
@@ -71,8 +146,9 @@ class ServiceController:
         if name is not None and name != existing.name:
             if self.service_repo.get_by_name(name):
                 raise ValueError(f"Service with name '{name}' already exists.")
+        self._validate_associations(associations)
 
-        return self.service_repo.update(
+        service = self.service_repo.update(
             service_id=service_id,
             name=name,
             description=description,
@@ -82,9 +158,55 @@ class ServiceController:
             is_available=is_available,
             associations=associations,
         )
+        if associations is not None:
+            self._refresh_availability(service_id)
+        if name is not None or price is not None or associations is not None:
+            cost_rollup_refresher.request()
+        return service
 
     def delete_service(self, service_id: int) -> bool:
         existing = self.service_repo.get_by_id(service_id)
         if not existing:
             raise ValueError(f"Service with ID {service_id} not found.")
-        return self.service_repo.delete(service_id)
+        deleted = self.service_repo.delete(service_id)
+        cost_rollup_refresher.request()
+        return deleted
+
+    def cost_rollup(self, cached: bool = False) -> List[Dict[str, Any]]:
+        """Material cost and margin of every service (one aggregate query)."""
+        rows = self.service_repo.cost_rollup(cached=cached)
+        for row in rows:
+            row["has_missing_cost"] = row["parts_missing_cost"] > 0
+        return rows
+
+
+class AsyncServiceController:
+    """Service listings on an AsyncSession (async mode); shares its cache
+    entries with ServiceController."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.service_repo = AsyncServiceRepository(db)
+
+    @cached(SERVICE, ServiceResponse)
+    async def list_services_with_associations(self, skip: int = 0, limit: int = 100) -> List[Service]:
+        return await self.service_repo.list_with_relations(skip=skip, limit=limit)
+
+    @cached(SERVICE, ServiceResponse)
+    async def list_available_services(self, skip: int = 0, limit: int = 100, stock_aware: bool = False) -> List[Service]:
+        return await self.service_repo.list_available(skip=skip, limit=limit, stock_aware=stock_aware)
+
+    @cached(SERVICE, ServiceResponse)
+    async def list_services_with_associations_page(
+        self, cursor: Optional[str] = None, limit: int = 100, sort: Optional[str] = None
+    ) -> Tuple[List[Service], Optional[str]]:
+        return await self.service_repo.list_with_relations_keyset(cursor=cursor, limit=limit, sort=sort)
+
+    @cached(SERVICE, ServiceResponse)
+    async def list_available_services_page(
+        self, cursor: Optional[str] = None, limit: int = 100, sort: Optional[str] = None,
+        stock_aware: bool = False,
+    ) -> Tuple[List[Service], Optional[str]]:
+        return await self.service_repo.list_available_keyset(
+            cursor=cursor, limit=limit, sort=sort, stock_aware=stock_aware
+        )
@@ -1,10 +1,12 @@
 from src.repositories.technical_repositorie import TechnicalRepository
 from src.models.technical_model import TechnicalUpdate,TechnicalStatusUpdate,TechnicalLogin # Added TechnicalUpdate
-from src.utils.verify_password import verify_password
-from src.utils.hash_password import hash_password # Added for updates
+from src.service.password_hasher import PasswordHasherBusy, password_hasher
+from src.utils.hash_password import needs_rehash
+from sqlalchemy.exc import SQLAlchemyError
 from src.schemas.techincal import TechnicalModel# Added TechnicalStatusUpdate
+from src.service.principal_cache import principal_cache
 from fastapi import HTTPException, status
-from typing import Optional, List, Union
+from typing import Optional, List, Tuple, Union
 from sqlalchemy.orm import Session
 from uuid import UUID
 class TechnicalController:
@@ -20,8 +22,17 @@ class TechnicalController:
         if not technical_user:
             return None
         
-        if not verify_password(tech_in.password, technical_user.password):
+        if not password_hasher.verify_password(tech_in.password, technical_user.password):
             return None
+
+        # Upgrade the stored hash to the configured BCRYPT_ROUNDS; best effort
+        if needs_rehash(technical_user.password):
+            try:
+                self.tech_repo.update(technical_user, {"password": password_hasher.hash_password(tech_in.password)})
+            except PasswordHasherBusy:
+                pass  # retried at the next login
+            except SQLAlchemyError:
+                self.tech_repo.db.rollback()
         
         return technical_user
 
@@ -36,6 +47,12 @@ class TechnicalController:
         """Fetch multiple technical users with pagination (for admin access)."""
         return self.tech_repo.get_multi(skip=skip, limit=limit)
 
+    def list_technical_users_page(
+        self, cursor: Optional[str] = None, limit: int = 100, sort: Optional[str] = None
+    ) -> Tuple[List[TechnicalModel], Optional[str]]:
+        """Keyset-paginated variant of list_technical_users; returns (items, next_cursor)."""
+        return self.tech_repo.get_multi_keyset(cursor=cursor, limit=limit, sort=sort)
+
     def update_technical_user(self, tech_id: UUID, tech_in: TechnicalUpdate) -> TechnicalModel:
         """Update a technical user's details, rehashing the password if changed."""
         tech_user = self.get_technical_by_id(tech_id) 
@@ -44,9 +61,11 @@ class TechnicalController:
         
         # BUSINESS LOGIC: Hash password if it's in the update payload
         if "password" in update_data:
-            update_data["password"] = hash_password(update_data["password"])
+            update_data["password"] = password_hasher.hash_password(update_data["password"])
 
-        return self.tech_repo.update(tech_user, update_data)
+        tech_user = self.tech_repo.update(tech_user, update_data)
+        principal_cache.invalidate(tech_id, self.tech_repo.db)
+        return tech_user
 
     def update_technical_status(self, tech_id: UUID, status_in: TechnicalStatusUpdate) -> TechnicalModel:
         """Update only the assignment status of a technical user (Admin only operation)."""
@@ -58,10 +77,13 @@ class TechnicalController:
 
         # 3. FIX: Use the Repository to update the data in the database
         # The Repository is responsible for database operations, not the model instance.
-        return self.tech_repo.update(tech_user, update_data)
+        tech_user = self.tech_repo.update(tech_user, update_data)
+        principal_cache.invalidate(tech_id, self.tech_repo.db)
+        return tech_user
 
     def delete_technical_user(self, tech_id: UUID) -> None:
         """Delete a technical account by ID."""
         # Ensure the user exists before attempting to delete
         self.get_technical_by_id(tech_id) 
-        self.tech_repo.remove(tech_id)
\ No newline at end of file
+        self.tech_repo.remove(tech_id)
+        principal_cache.invalidate(tech_id, self.tech_repo.db)
\ No newline at end of file
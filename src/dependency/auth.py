@@ -1,18 +1,36 @@
 # src/dependencies/auth.py
-from fastapi import Depends, HTTPException, status, Request
+from fastapi import Depends, HTTPException, Query, status, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
+from datetime import timedelta
 from uuid import UUID
 from typing import Optional, Union
 # --- Project Imports ---
-from src.config.database import get_db #  database session dependency
+from src.config.database import get_db, SessionLocal #  database session dependency
 from src.repositories.admin_repositories import AdminRepository # The repo to fetch the admin
 from src.models.admin_model import AdminOut # The secure output Pydantic model
-from src.service.auth import decode_token # The utility we just created
+from src.service.auth import create_access_token, decode_token # The utility we just created
+from src.config.settings import settings
 from src.repositories.technical_repositorie import TechnicalRepository 
 from src.models.technical_model import TechnicalOut
+from src.service.principal_cache import principal_cache
 # Define the OAuth2 scheme. FastAPI uses the URL provided here for documentation.
 security = HTTPBearer()
+# `scope` claim of the tickets accepted by the streaming routes
+STREAM_TICKET_SCOPE = "inventory_stream"
+
+def load_principal(role: str, user_id: UUID, issued_at, db: Session) -> Optional[Union[AdminOut, TechnicalOut]]:
+    """The admin ('admin') or technical ('technical') account behind a token, or None.
+
+    Served from the principal cache; only a miss reads the database.
+    """
+    def load():
+        if role == "admin":
+            admin = AdminRepository(db).get_by_id(user_id)
+            return AdminOut.model_validate(admin) if admin else None
+        technical = TechnicalRepository(db).get(user_id)
+        return TechnicalOut.model_validate(technical) if technical else None
+    return principal_cache.get_or_load((role, str(user_id), issued_at), load)
 
 def get_current_technical_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
@@ -50,16 +68,13 @@ def get_current_technical_user(
     except ValueError:
         raise credentials_exception
         
-    # 4. Fetch user from repository
-    tech_repo = TechnicalRepository(db)
-    # NOTE: Your TechnicalRepository.get() must accept a UUID as input!
-    technical_model = tech_repo.get(technical_id) 
+    # 4. Fetch user (principal cache, then repository)
+    technical_user = load_principal("technical", technical_id, payload.get("iat"), db)
 
-    if technical_model is None:
+    if technical_user is None:
         raise credentials_exception
         
-    # 5. Return the Pydantic output model
-    return TechnicalOut.model_validate(technical_model)
+    return technical_user
 
 def get_current_admin_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
@@ -96,22 +111,70 @@ def get_current_admin_user(
     except ValueError:
         raise credentials_exception
         
-    # 4. Fetch user from repository
-    admin_repo = AdminRepository(db)
-    # NOTE: Your AdminRepository.get() must accept a UUID as input!
-    admin_model = admin_repo.get_by_id(admin_id) 
+    # 4. Fetch user (principal cache, then repository)
+    admin_user = load_principal("admin", admin_id, payload.get("iat"), db)
 
-    if admin_model is None:
+    if admin_user is None:
         raise credentials_exception
         
-    # 5. Return the Pydantic output model
-    return AdminOut.model_validate(admin_model)
+    return admin_user
 
 def get_current_user_admin_or_technical(
         credentials : HTTPAuthorizationCredentials = Depends(security),
         db: Session = Depends(get_db)
 ):
-    token = credentials.credentials
+    return user_from_token(credentials.credentials, db)
+
+def issue_stream_ticket(user: Union[AdminOut, TechnicalOut]) -> str:
+    """Short-lived JWT that only opens the live inventory stream.
+
+    It has no `role` claim, so the regular auth dependencies reject it as
+    an access token.
+    """
+    if isinstance(user, AdminOut):
+        role, subject = "admin", user.admin_id
+    else:
+        role, subject = "technical", user.technical_id
+    return create_access_token(
+        {"sub": str(subject), "principal_role": role, "scope": STREAM_TICKET_SCOPE},
+        expires_delta=timedelta(seconds=settings.INVENTORY_STREAM_TICKET_SECONDS),
+    )
+
+def get_stream_user(
+        request: Request,
+        ticket: Optional[str] = Query(None, description="Ticket from POST /inventory/stream/ticket, for clients that cannot send an Authorization header (EventSource, browser WebSocket)."),
+):
+    """Admin or technical user for streaming routes (Bearer header or ?ticket=).
+
+    Uses its own short-lived session instead of `get_db`: a yield dependency
+    would keep that session (and its pooled connection) for as long as the
+    stream stays open.
+    """
+    auth_header = request.headers.get("Authorization", "")
+    with SessionLocal() as db:
+        if auth_header.lower().startswith("bearer "):
+            return user_from_token(auth_header[7:], db)
+        if ticket:
+            return user_from_ticket(ticket, db)
+    raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
+
+def user_from_ticket(ticket: str, db: Session):
+    """Resolve a stream ticket to the admin or technical user; raises HTTPException."""
+    payload = decode_token(ticket)
+    role = payload.get("principal_role")
+    if payload.get("scope") != STREAM_TICKET_SCOPE or role not in ("admin", "technical"):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid stream ticket")
+    try:
+        user_id = UUID(payload.get("sub") or "")
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid stream ticket")
+    user = load_principal(role, user_id, payload.get("iat"), db)
+    if user is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid stream ticket")
+    return user
+
+def user_from_token(token: str, db: Session):
+    """Resolve a JWT to the admin or technical user; raises HTTPException."""
     payload = decode_token(token)
 
     role = str(payload.get("role") or "").lower()
@@ -128,23 +191,23 @@ def get_current_user_admin_or_technical(
                             detail="Invalid subject format")
     
     if role == "admin":
-        admin = AdminRepository(db).get_by_id(user_id)
+        admin = load_principal("admin", user_id, payload.get("iat"), db)
 
         if not admin:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Admin user not found")
         
-        return AdminOut.model_validate(admin)
+        return admin
     
     
     if role == "technical":
-        technical = TechnicalRepository(db).get_by_id(user_id)
+        technical = load_principal("technical", user_id, payload.get("iat"), db)
         if not technical:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Technical user not found")
-        return TechnicalOut.model_validate(technical)
+        return technical
     
     raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Insufficient permissions")
 
-async def get_optional_user(
+def get_optional_user(
         request: Request,
         db:Session = Depends(get_db),
 )-> Optional[Union[AdminOut,TechnicalOut]]:
@@ -175,13 +238,8 @@ async def get_optional_user(
             return None
         user_id = UUID(sub)
 
-        if role == "admin":
-            admin = AdminRepository(db).get_by_id(user_id)
-            return AdminOut.model_validate(admin) if admin else None
-
-        if role == "techincal":
-            tech = TechnicalRepository(db).get(user_id)
-            return TechnicalOut.model_validate(tech) if tech else None
+        if role in ("admin", "technical"):
+            return load_principal(role, user_id, payload.get("iat"), db)
         
         return None
     
@@ -192,3 +250,12 @@ async def get_optional_user(
             status_code=status.HTTP_401_UNAUTHORIZED, 
             detail="Invalid authentication credentials"
         )
+
+
+def actor_label(user: Optional[Union[AdminOut, TechnicalOut]]) -> Optional[str]:
+    """Short 'role:id' label recorded with stock movements."""
+    if isinstance(user, AdminOut):
+        return f"admin:{user.admin_id}"
+    if isinstance(user, TechnicalOut):
+        return f"technical:{user.technical_id}"
+    return None
@@ -0,0 +1,84 @@
+import time
+from typing import Any, AsyncGenerator, Callable, Generator
+
+from fastapi import Depends, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from src.config.database import default_db
+from src.config.settings import settings
+
+# Cookie set after a successful write; while it has not expired the client's
+# reads go to the primary so it sees its own writes despite replica lag.
+PRIMARY_PIN_COOKIE = "db_pin_primary"
+WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+
+def is_pinned_to_primary(request: Request) -> bool:
+    value = request.cookies.get(PRIMARY_PIN_COOKIE)
+    if not value:
+        return False
+    try:
+        return float(value) > time.time()
+    except ValueError:
+        return False
+
+
+def pin_to_primary(response: Response) -> None:
+    """Route the client's reads to the primary for DB_READ_YOUR_WRITES_SECONDS."""
+    window = settings.DB_READ_YOUR_WRITES_SECONDS
+    if window <= 0:
+        return
+    response.set_cookie(
+        PRIMARY_PIN_COOKIE,
+        str(time.time() + window),
+        max_age=max(int(window), 1),
+        httponly=True,
+        samesite="lax",
+    )
+
+
+def get_read_db(request: Request) -> Generator:
+    """Session for GET endpoints: a replica, or the primary right after a write."""
+    yield from default_db.get_read_db(use_primary=is_pinned_to_primary(request))
+
+
+async def get_async_read_db(request: Request) -> AsyncGenerator:
+    """Async counterpart of `get_read_db` (async mode only)."""
+    async for db in default_db.get_async_read_db(use_primary=is_pinned_to_primary(request)):
+        yield db
+
+
+class InThreadpool:
+    """Awaitable facade over a sync controller or repository: each method
+    call runs in the threadpool."""
+
+    def __init__(self, target: Any):
+        self._target = target
+
+    def __getattr__(self, name: str) -> Callable:
+        method = getattr(self._target, name)
+
+        async def call(*args, **kwargs):
+            return await run_in_threadpool(method, *args, **kwargs)
+        return call
+
+
+def read_controller(sync_cls: type, async_cls: type) -> Callable:
+    """Dependency for `async def` GET routes: `async_cls` on a replica-aware
+    AsyncSession in async mode (DB_ASYNC_ENABLED), else `sync_cls` on
+    `get_read_db` with its calls run in the threadpool.
+
+    Either way the route awaits the same method names. The mode is chosen
+    once, like the async engine itself; the session is the one
+    `conditional_get` uses, so the ETag check and the read share a checkout.
+    """
+    # async def: building a controller does no IO, so no threadpool hop
+    if default_db.async_enabled:
+        async def dependency(db: AsyncSession = Depends(get_async_read_db)):
+            return async_cls(db)
+    else:
+        async def dependency(db: Session = Depends(get_read_db)):
+            return InThreadpool(sync_cls(db))
+    return dependency
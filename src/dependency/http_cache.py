@@ -0,0 +1,113 @@
+import hashlib
+from datetime import timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Callable, Dict, Optional
+
+from fastapi import Depends, HTTPException, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from src.config.database import default_db
+from src.config.settings import settings
+from src.dependency.database import get_async_read_db, get_read_db
+from src.repositories.catalog_version_repositories import AsyncCatalogVersionRepository, CatalogVersionRepository
+from src.service.catalog_cache import catalog_cache
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    # weak comparison (RFC 9110 13.1.2): W/ prefixes are ignored
+    if if_none_match.strip() == "*":
+        return True
+    return any(candidate.strip().removeprefix("W/") == etag for candidate in if_none_match.split(","))
+
+
+def _not_modified_since(if_modified_since: str, last_modified) -> bool:
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        return False
+    # HTTP dates have whole-second precision
+    return last_modified.replace(microsecond=0) <= since
+
+
+def cache_control_for(route: str, default: Optional[str] = None) -> str:
+    """HTTP_CACHE_CONTROL_ROUTES[route], else the route's default, else HTTP_CACHE_CONTROL."""
+    return settings.HTTP_CACHE_CONTROL_ROUTES.get(route) or default or settings.HTTP_CACHE_CONTROL
+
+
+def conditional_get(*namespaces: str, cache_control: Optional[str] = None) -> Callable:
+    """Dependency for GET routes whose response only depends on `namespaces`.
+
+    Sets a strong ETag and Last-Modified derived from the catalog_versions
+    rows of those namespaces (bumped after every committed write), plus
+    Cache-Control. A matching If-None-Match (or, without one, an
+    If-Modified-Since not older than the last change) answers 304 before
+    the route body runs, so the only query is the version lookup.
+
+    Versions are read before the route's own query: a write committed in
+    between yields newer data under the older tag, which only costs the
+    client one extra full response later, never a stale 304. They are read
+    through the replica-aware session, the same one read routes use, so a
+    304 costs a replica lookup; tag and data lag together. Clients pinned
+    to the primary after a write (read-your-writes cookie) read versions
+    from the primary, so they never get a 304 for what they just changed.
+
+    In async mode the versions are read on the async read session, the one
+    `read_controller` hands to the async routes.
+    """
+    def cache_control_value(request: Request) -> str:
+        return cache_control_for(request.scope["endpoint"].__name__, cache_control)
+
+    def validate(request: Request, response: Response, rows: Dict, on_primary: bool) -> None:
+        route = request.scope["endpoint"].__name__
+        # a lagging replica's older marker would look like a change and drop
+        # the cached namespace, so only primary reads feed the cache check
+        markers: Dict[str, str] = {}
+        for namespace in namespaces:
+            row = rows.get(namespace)
+            markers[namespace] = row.marker if row else "0"
+            if on_primary:
+                # entries cached by this process before another worker's write
+                catalog_cache.observe(namespace, row.version if row else 0, markers[namespace])
+        digest = hashlib.blake2b(
+            "|".join([request.app.version, route, *(f"{ns}={markers[ns]}" for ns in sorted(markers))]).encode(),
+            digest_size=12,
+        ).hexdigest()
+        headers = {"ETag": f'"{digest}"', "Cache-Control": cache_control_value(request)}
+        changed_at = [row.updated_at for row in rows.values()]
+        if changed_at:
+            headers["Last-Modified"] = format_datetime(max(changed_at).astimezone(timezone.utc), usegmt=True)
+
+        if_none_match = request.headers.get("if-none-match")
+        if_modified_since = request.headers.get("if-modified-since")
+        if if_none_match is not None:
+            not_modified = etag_matches(if_none_match, headers["ETag"])
+        else:
+            not_modified = bool(
+                if_modified_since and changed_at and _not_modified_since(if_modified_since, max(changed_at))
+            )
+        if not_modified:
+            raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        response.headers.update(headers)
+
+    if default_db.async_enabled:
+        async def async_dependency(
+            request: Request, response: Response, db: AsyncSession = Depends(get_async_read_db),
+        ) -> None:
+            if not settings.HTTP_CONDITIONAL_ENABLED:
+                response.headers["Cache-Control"] = cache_control_value(request)
+                return
+            rows = await AsyncCatalogVersionRepository(db).read(namespaces)
+            validate(request, response, rows, on_primary=db.bind is default_db.async_engine)
+        return async_dependency
+
+    def dependency(request: Request, response: Response, db: Session = Depends(get_read_db)) -> None:
+        if not settings.HTTP_CONDITIONAL_ENABLED:
+            response.headers["Cache-Control"] = cache_control_value(request)
+            return
+        rows = CatalogVersionRepository(db).read(namespaces)
+        validate(request, response, rows, on_primary=db.get_bind() is default_db.engine)
+
+    return dependency
@@ -0,0 +1,60 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional
+
+
+class WaitHistogramBucket(BaseModel):
+    """Cumulative count of checkouts that waited at most `le` milliseconds."""
+    le: str
+    count: int
+
+
+class PoolStatus(BaseModel):
+    """Live connection pool occupancy and checkout wait metrics."""
+    pool_size: int = Field(..., description="Configured number of persistent connections.")
+    checked_out: int = Field(..., description="Connections currently in use.")
+    idle: int = Field(..., description="Connections sitting idle in the pool.")
+    overflow: int = Field(..., description="Connections opened beyond pool_size.")
+    max_overflow: int
+    timeout_seconds: float
+    checkouts_total: Optional[int] = None
+    timeouts_total: Optional[int] = Field(None, description="Checkouts that hit 'QueuePool limit reached'.")
+    wait_sum_ms: Optional[float] = None
+    wait_max_ms: Optional[float] = None
+    wait_histogram: List[WaitHistogramBucket] = Field(default_factory=list)
+    replicas: List["PoolStatus"] = Field(default_factory=list, description="Read replica pools, if configured.")
+    async_pool: Optional["PoolStatus"] = Field(None, description="The async engine's pool, when DB_ASYNC_ENABLED (no wait metrics).")
+
+
+class CacheStats(BaseModel):
+    """Catalog cache occupancy (backend-wide) and hit/miss counters (this worker, since start)."""
+    enabled: bool
+    backend: str = Field(..., description="memory, shared_memory or redis.")
+    entries: Optional[int] = Field(None, description="Live entries, generation tokens included; null when the backend cannot tell.")
+    max_entries: Optional[int] = None
+    ttl_seconds: float
+    hits: int
+    misses: int
+    hit_ratio: Optional[float] = Field(None, description="hits / (hits + misses); null before the first lookup.")
+    evictions: Optional[int] = Field(None, description="Entries dropped because the cache was full (by this worker).")
+    invalidations: int = Field(..., description="Invalidations applied by this worker (its writes and other workers' messages).")
+    oversize: Optional[int] = Field(None, description="shared_memory: values skipped for not fitting a slot.")
+    errors: Optional[int] = Field(None, description="redis: failed operations (served from the database instead).")
+
+
+class LatencyStats(BaseModel):
+    """Count, total and maximum duration, with a cumulative histogram."""
+    count: int
+    sum_ms: float
+    max_ms: float
+    histogram: List[WaitHistogramBucket] = Field(default_factory=list)
+
+
+class PasswordHashStats(BaseModel):
+    """bcrypt worker pool of this worker process."""
+    workers: int
+    max_queued: int = Field(..., description="Calls allowed to wait for a free worker.")
+    in_flight: int = Field(..., description="Calls running or waiting right now.")
+    rejected_total: int = Field(..., description="Calls refused with 503 because the queue was full.")
+    queue_wait: LatencyStats
+    hash: LatencyStats
+    verify: LatencyStats
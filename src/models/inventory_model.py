@@ -1,6 +1,6 @@
 from pydantic import BaseModel,Field
 from typing import Optional
-from datetime import date
+from datetime import date, datetime
 
 # --- Nested Inventory Schema ---
 class InventorySnapshot(BaseModel):
@@ -33,3 +33,31 @@ class InventoryOut(InventoryBase):
 
     class Config:
         from_attributes = True
+
+
+class LowStockAlert(BaseModel):
+    """A product whose stock is at or below its reorder point."""
+    product_id: int
+    name: str
+    current_stock: float
+    min_stock_level: float
+    shortfall: float = Field(..., description="min_stock_level - current_stock (0 when exactly at the reorder point).")
+
+
+class StreamTicket(BaseModel):
+    """Short-lived credential for the live inventory stream (`?ticket=`)."""
+    ticket: str
+    expires_in: int = Field(..., description="Seconds until the ticket expires.")
+
+
+class StockMovementOut(BaseModel):
+    """One entry of a product's stock ledger."""
+    movement_id: int
+    product_id: int
+    delta: float = Field(..., description="Signed change in stock (negative for deductions).")
+    reason: str
+    actor: Optional[str] = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
@@ -1,7 +1,7 @@
 
 # src/schemas/product.py
 from pydantic import BaseModel, Field, validator
-from typing import Optional
+from typing import List, Optional
 from decimal import Decimal
 
 from src.models.category_model import CategoryResponse  # fixed import
@@ -96,3 +96,14 @@ class ProductResponse(ProductBase):
 
     class Config:
         from_attributes = True
+
+
+# --- Bulk create (POST /product/bulk) ---
+class BulkRowError(BaseModel):
+    index: int = Field(..., description="Position of the rejected row in the request body.")
+    detail: str
+
+
+class ProductBulkResult(BaseModel):
+    created: List[ProductResponse]
+    errors: List[BulkRowError]
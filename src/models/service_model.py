@@ -1,6 +1,9 @@
 from pydantic import BaseModel, Field
 from typing import Optional, List
 from decimal import Decimal
+from datetime import datetime
+
+from src.models.inventory_model import InventoryOut, LowStockAlert
 
 
 class ServiceProductAssociationEmbedded(BaseModel):
@@ -48,3 +51,24 @@ class ServiceUpdate(BaseModel):
 class ServiceResponse(ServiceBase):
     service_id: int = Field(..., example=123)
     associations: List[ServiceProductAssociationEmbedded] = Field(default_factory=list)
+
+
+class ServiceConsumption(BaseModel):
+    """Result of consuming a service's parts (POST /service/{id}/consume)."""
+    service_id: int
+    inventory: List[InventoryOut] = Field(default_factory=list, description="Inventory of the consumed parts after the deduction.")
+    low_stock: List[LowStockAlert] = Field(default_factory=list, description="Parts that reached their reorder point with this deduction.")
+
+
+class ServiceCostRollup(BaseModel):
+    """Material cost and margin of one service (GET /service/cost-rollup)."""
+    service_id: int
+    name: str
+    price: Decimal
+    material_cost: Decimal = Field(..., description="sum(quantity_required * unit_cost) over all parts, optional ones included.")
+    margin: Decimal = Field(..., description="price - material_cost")
+    margin_ratio: Optional[Decimal] = Field(None, description="margin / price")
+    part_count: int
+    parts_missing_cost: int = Field(..., description="Parts whose product has no unit_cost; material_cost leaves them out.")
+    has_missing_cost: bool
+    computed_at: datetime = Field(..., description="When the figures were computed (the last refresh for cached=true).")
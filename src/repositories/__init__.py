@@ -3,5 +3,11 @@ from .technical_repositorie import TechnicalRepository
 from .category_repositories import CategoryRepository
 from .inventory_repositories import InventoryRepository
 from .product_repositories import ProductRepository
+from .async_base_repositories import AsyncBaseRepository
+from .category_repositories import AsyncCategoryRepository
+from .inventory_repositories import AsyncInventoryRepository
+from .product_repositories import AsyncProductRepository
+from .service_repositories import AsyncServiceRepository
 
-__all__ = ["AdminRepository", "TechnicalRepository","CategoryRepository","InventoryRepository","ProductRepository"]
\ No newline at end of file
+__all__ = ["AdminRepository", "TechnicalRepository","CategoryRepository","InventoryRepository","ProductRepository",
+           "AsyncBaseRepository","AsyncCategoryRepository","AsyncInventoryRepository","AsyncProductRepository","AsyncServiceRepository"]
\ No newline at end of file
@@ -0,0 +1,134 @@
+from sqlalchemy import Column, Select, delete, inspect, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import TypeVar, Generic, Type, Any, Dict, List, Optional, Sequence, Tuple
+
+from src.repositories.base_repositories import keyset_query
+from src.repositories.catalog_version_repositories import AsyncCatalogVersionRepository
+from src.service.catalog_cache import CACHE_INVALIDATION_CHANNEL, affected_namespaces, catalog_cache
+
+T = TypeVar("T")
+
+
+async def keyset_paginate_async(
+    db: AsyncSession,
+    stmt: Select,
+    model: Any,
+    cursor: Optional[str] = None,
+    limit: int = 100,
+    sort: Optional[str] = None,
+    sortable_columns: Tuple[str, ...] = (),
+) -> Tuple[List[Any], Optional[str]]:
+    """`keyset_paginate` on an AsyncSession (same cursors)."""
+    page_stmt, finish = keyset_query(stmt, model, cursor, limit, sort, sortable_columns)
+    return finish(list((await db.execute(page_stmt)).unique().scalars().all()))
+
+
+# Async counterpart of BaseRepository. Same method names and semantics, but
+# every call that touches the database is awaited on an AsyncSession; writes
+# invalidate the catalog cache and bump the catalog versions like the sync ones.
+# NOTE: AsyncSession cannot lazy-load relationships, so subclasses must
+# eager-load anything the response models read.
+class AsyncBaseRepository(Generic[T]):
+    # Columns (besides the primary key) clients may sort keyset pages by
+    sortable_columns: Tuple[str, ...] = ()
+    # catalog_cache namespace whose entries a committed write here invalidates
+    cache_namespace: Optional[str] = None
+
+    def __init__(self, db: AsyncSession, model: Type[T]):
+        self.db = db
+        self.model = model
+
+    async def get(self, id: int) -> Optional[T]:
+        return await self.db.get(self.model, id)
+
+    async def list(self, skip: int = 0, limit: int = 100) -> List[T]:
+        stmt = select(self.model).order_by(self._pk()).offset(skip).limit(limit)
+        return list((await self.db.execute(stmt)).scalars().all())
+
+    async def list_keyset(
+        self,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        sort: Optional[str] = None,
+        stmt: Optional[Select] = None,
+    ) -> Tuple[List[T], Optional[str]]:
+        return await keyset_paginate_async(
+            self.db,
+            stmt if stmt is not None else select(self.model),
+            self.model,
+            cursor=cursor,
+            limit=limit,
+            sort=sort,
+            sortable_columns=self.sortable_columns,
+        )
+
+    async def add(self, obj: T) -> T:
+        try:
+            self.db.add(obj)
+            await self.db.commit()
+        except Exception as e:
+            await self.db.rollback()
+            raise e
+        await self.invalidate_cache(getattr(obj, self._pk().key))
+        await self.db.refresh(obj)
+        return obj
+
+    async def invalidate_cache(self, *entity_ids: Any, notify: Sequence[Tuple[str, str]] = ()) -> None:
+        """See BaseRepository.invalidate_cache; call after commit."""
+        if self.cache_namespace is None:
+            return
+        await catalog_cache.offload(catalog_cache.invalidate, self.cache_namespace, *entity_ids)
+        message = catalog_cache.invalidation_message(self.cache_namespace, entity_ids)
+        bumped = await AsyncCatalogVersionRepository(self.db).bump(
+            affected_namespaces(self.cache_namespace),
+            notify=[(CACHE_INVALIDATION_CHANNEL, message), *notify],
+        )
+        for namespace, (version, marker) in bumped.items():
+            catalog_cache.acknowledge(namespace, version, marker)
+
+    def _pk(self):
+        return inspect(self.model).primary_key[0]
+
+    def _writable_columns(self) -> set:
+        # skip read-only column_property expressions (e.g. Inventory.current_stock)
+        return {
+            attr.key for attr in inspect(self.model).column_attrs
+            if isinstance(attr.expression, Column)
+        }
+
+    async def update(self, id: int, data: Dict[str, Any]) -> Optional[T]:
+        columns = self._writable_columns()
+        values = {key: value for key, value in data.items() if key in columns}
+        if not values:
+            return await self.get(id)
+
+        stmt = (
+            update(self.model)
+            .where(self._pk() == id)
+            .values(**values)
+            .returning(self.model)
+            .execution_options(populate_existing=True, synchronize_session=False)
+        )
+        try:
+            obj = (await self.db.execute(stmt)).scalars().first()
+            await self.db.commit()
+        except Exception as e:
+            await self.db.rollback()
+            raise e
+        if obj is not None:
+            await self.invalidate_cache(id)
+        return obj
+
+    async def delete(self, id: int) -> bool:
+        pk = self._pk()
+        stmt = delete(self.model).where(pk == id).returning(pk)
+        try:
+            deleted = (await self.db.execute(stmt)).first()
+            await self.db.commit()
+        except Exception as e:
+            await self.db.rollback()
+            raise e
+        if deleted is None:
+            return False
+        await self.invalidate_cache(id)
+        return True
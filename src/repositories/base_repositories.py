@@ -1,11 +1,95 @@
+import datetime
+from sqlalchemy import Column, Select, delete, insert, inspect, select, tuple_, update
 from sqlalchemy.orm import Session
-from typing import TypeVar, Generic, Type, Any, Dict, List, Optional
+from typing import TypeVar, Generic, Type, Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from src.repositories.catalog_version_repositories import CatalogVersionRepository
+from src.service.catalog_cache import CACHE_INVALIDATION_CHANNEL, affected_namespaces, catalog_cache
+from src.utils.cursor import decode_cursor, encode_cursor
 
 # 1. Define the Type Variable (T represents your SQLAlchemy Model)
 T = TypeVar("T")
 
+
+def _coerce(column, value: Any) -> Any:
+    """Turn a JSON cursor value back into the column's Python type."""
+    if value is None:
+        return None
+    python_type = column.type.python_type
+    if python_type in (datetime.date, datetime.datetime):
+        return python_type.fromisoformat(value)
+    return python_type(value)
+
+
+def keyset_paginate(
+    db: Session,
+    stmt: Select,
+    model: Any,
+    cursor: Optional[str] = None,
+    limit: int = 100,
+    sort: Optional[str] = None,
+    sortable_columns: Tuple[str, ...] = (),
+) -> Tuple[List[Any], Optional[str]]:
+    """Run `stmt` as one keyset page; returns (rows, next_cursor).
+
+    Rows are ordered by (sort column, primary key) so ties on the sort column
+    are broken deterministically. `sort` is a column name from
+    `sortable_columns`, prefixed with "-" for descending; default is the
+    primary key. The cursor is opaque to clients and only valid for the sort
+    it was issued for. Sort columns must be NOT NULL.
+    """
+    page_stmt, finish = keyset_query(stmt, model, cursor, limit, sort, sortable_columns)
+    return finish(list(db.execute(page_stmt).unique().scalars().all()))
+
+
+def keyset_query(
+    stmt: Select,
+    model: Any,
+    cursor: Optional[str],
+    limit: int,
+    sort: Optional[str],
+    sortable_columns: Tuple[str, ...],
+) -> Tuple[Select, Callable[[List[Any]], Tuple[List[Any], Optional[str]]]]:
+    """The page statement of `keyset_paginate`, and the function turning its
+    rows into (rows, next_cursor); for callers running it themselves."""
+    pk = inspect(model).primary_key[0]
+    descending = bool(sort) and sort.startswith("-")
+    sort_name = sort.lstrip("-") if sort else pk.key
+    if sort_name != pk.key and sort_name not in sortable_columns:
+        raise ValueError(f"Cannot sort by '{sort_name}'.")
+    sort_col = getattr(model, sort_name)
+    key = (sort_col,) if sort_name == pk.key else (sort_col, getattr(model, pk.key))
+
+    if cursor:
+        payload = decode_cursor(cursor)
+        after = payload.get("after")
+        if payload.get("sort") != (sort or pk.key) or not isinstance(after, list) or len(after) != len(key):
+            raise ValueError("Pagination cursor does not match the requested sort.")
+        values = [_coerce(col, v) for col, v in zip(key, after)]
+        position = tuple_(*key) < tuple_(*values) if descending else tuple_(*key) > tuple_(*values)
+        stmt = stmt.where(position)
+
+    stmt = stmt.order_by(*[col.desc() if descending else col.asc() for col in key]).limit(limit + 1)
+
+    def finish(rows: List[Any]) -> Tuple[List[Any], Optional[str]]:
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            next_cursor = encode_cursor({
+                "sort": sort or pk.key,
+                "after": [getattr(last, col.key) for col in key],
+            })
+        return rows, next_cursor
+    return stmt, finish
+
 # 2. Add Generic[T] to the class definition
 class BaseRepository(Generic[T]):
+    # Columns (besides the primary key) clients may sort keyset pages by
+    sortable_columns: Tuple[str, ...] = ()
+    # catalog_cache namespace whose entries a committed write here invalidates
+    cache_namespace: Optional[str] = None
+
     def __init__(self, db: Session, model: Type[T]):
         self.db = db
         self.model = model
@@ -16,35 +100,170 @@ class BaseRepository(Generic[T]):
     def list(self, skip: int = 0, limit: int = 100) -> List[T]:
         return self.db.query(self.model).offset(skip).limit(limit).all()
 
+    def list_keyset(
+        self,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        sort: Optional[str] = None,
+        stmt: Optional[Select] = None,
+    ) -> Tuple[List[T], Optional[str]]:
+        """Cursor-paginated alternative to `list`; `stmt` may add filters/options."""
+        return keyset_paginate(
+            self.db,
+            stmt if stmt is not None else select(self.model),
+            self.model,
+            cursor=cursor,
+            limit=limit,
+            sort=sort,
+            sortable_columns=self.sortable_columns,
+        )
+
     def add(self, obj: T) -> T:
         try:
             self.db.add(obj)
             self.db.commit()
+            self.invalidate_cache(getattr(obj, self._pk().key))
             self.db.refresh(obj)
             return obj
         except Exception as e:
             self.db.rollback()
             raise e
 
-    def update(self, id: int, data: Dict[str, Any]) -> Optional[T]:
-        obj = self.get(id)
-        if obj:
-            for key, value in data.items():
-                if hasattr(obj, key):
-                    setattr(obj, key, value)
-            
-            try:
+    def invalidate_cache(self, *entity_ids: Any, notify: Sequence[Tuple[str, str]] = ()) -> None:
+        """Evict cached reads of these entities (the whole namespace if none
+        are given) and bump the namespace's catalog version; call after commit.
+
+        `notify` holds extra (channel, payload) pairs to pg_notify in the
+        bump's transaction, so a write needs one round of post-commit work.
+        """
+        if self.cache_namespace is None:
+            return
+        catalog_cache.invalidate(self.cache_namespace, *entity_ids)
+        message = catalog_cache.invalidation_message(self.cache_namespace, entity_ids)
+        bumped = CatalogVersionRepository(self.db).bump(
+            affected_namespaces(self.cache_namespace),
+            notify=[(CACHE_INVALIDATION_CHANNEL, message), *notify],
+        )
+        for namespace, (version, marker) in bumped.items():
+            catalog_cache.acknowledge(namespace, version, marker)
+
+    def _pk(self):
+        return inspect(self.model).primary_key[0]
+
+    def _writable_columns(self) -> set:
+        # skip read-only column_property expressions (e.g. Inventory.current_stock)
+        return {
+            attr.key for attr in inspect(self.model).column_attrs
+            if isinstance(attr.expression, Column)
+        }
+
+    # --- Bulk operations: one statement (executemany / multi-row VALUES) per call ---
+    def add_many(self, rows: List[Dict[str, Any]], commit: bool = True) -> List[T]:
+        """Insert many rows with multi-row `INSERT ... RETURNING`.
+
+        Returned objects are in the same order as `rows`. Pass commit=False
+        to compose with other writes in the caller's transaction. Explicit
+        None values are inserted as NULL (render_nulls), which keeps rows
+        with and without optional values in the same batch.
+        """
+        if not rows:
+            return []
+        stmt = (
+            insert(self.model)
+            .returning(self.model, sort_by_parameter_order=True)
+            .execution_options(render_nulls=True)
+        )
+        try:
+            objs = list(self.db.scalars(stmt, rows).all())
+            if commit:
                 self.db.commit()
-                self.db.refresh(obj)
-            except Exception as e:
-                self.db.rollback()
-                raise e
+                self.invalidate_cache()
+        except Exception as e:
+            self.db.rollback()
+            raise e
+        return objs
+
+    def update_many(self, rows: List[Dict[str, Any]], commit: bool = True) -> int:
+        """Update many rows by primary key (executemany); each dict must contain the pk.
+
+        Keys that are not mapped columns are ignored. Returns the number of rows sent.
+        """
+        columns = self._writable_columns()
+        pk = self._pk().key
+        params = []
+        for row in rows:
+            if pk not in row:
+                raise ValueError(f"update_many rows need the primary key '{pk}'.")
+            params.append({key: value for key, value in row.items() if key in columns})
+        if not params:
+            return 0
+        try:
+            self.db.execute(update(self.model), params)
+            if commit:
+                self.db.commit()
+                self.invalidate_cache()
+        except Exception as e:
+            self.db.rollback()
+            raise e
+        return len(params)
+
+    def delete_many(self, ids: Iterable[Any], commit: bool = True) -> int:
+        """Delete rows by primary key with one `DELETE ... WHERE pk IN (...)`; returns rows deleted."""
+        ids = list(ids)
+        if not ids:
+            return 0
+        pk = self._pk()
+        stmt = delete(self.model).where(pk.in_(ids)).returning(pk)
+        try:
+            deleted = self.db.execute(stmt).all()
+            if commit:
+                self.db.commit()
+                if deleted:
+                    self.invalidate_cache()
+        except Exception as e:
+            self.db.rollback()
+            raise e
+        return len(deleted)
+
+    def update(self, id: int, data: Dict[str, Any]) -> Optional[T]:
+        """Update columns in one `UPDATE ... WHERE pk = :id RETURNING *` round trip.
+
+        Keys that are not mapped columns (e.g. relationships) are ignored.
+        The returned row refreshes any instance already in the session.
+        """
+        columns = self._writable_columns()
+        values = {key: value for key, value in data.items() if key in columns}
+        if not values:
+            return self.get(id)
+
+        stmt = (
+            update(self.model)
+            .where(self._pk() == id)
+            .values(**values)
+            .returning(self.model)
+            .execution_options(populate_existing=True, synchronize_session=False)
+        )
+        try:
+            obj = self.db.execute(stmt).scalars().first()
+            self.db.commit()
+        except Exception as e:
+            self.db.rollback()
+            raise e
+        if obj is not None:
+            self.invalidate_cache(id)
         return obj
 
     def delete(self, id: int) -> bool:
-        obj = self.get(id)
-        if obj:
-            self.db.delete(obj)
+        """Delete by primary key with a single `DELETE ... RETURNING pk`."""
+        pk = self._pk()
+        stmt = delete(self.model).where(pk == id).returning(pk)
+        try:
+            deleted = self.db.execute(stmt).first()
             self.db.commit()
-            return True
-        return False
\ No newline at end of file
+        except Exception as e:
+            self.db.rollback()
+            raise e
+        if deleted is None:
+            return False
+        self.invalidate_cache(id)
+        return True
\ No newline at end of file
@@ -0,0 +1,97 @@
+# src/repositories/catalog_version_repositories.py
+
+import logging
+from typing import Dict, Iterable, Sequence, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from src.schemas.catalog_version import CatalogVersion
+
+logger = logging.getLogger(__name__)
+
+
+def _read_stmt(namespaces: Iterable[str]):
+    return select(CatalogVersion).where(CatalogVersion.namespace.in_(list(namespaces)))
+
+
+def _bump_stmt(namespaces: Sequence[str]):
+    stmt = pg_insert(CatalogVersion).values([{"namespace": ns, "version": 1} for ns in namespaces])
+    return stmt.on_conflict_do_update(
+        index_elements=[CatalogVersion.namespace],
+        set_={"version": CatalogVersion.version + 1, "updated_at": func.now()},
+    ).returning(CatalogVersion)
+
+
+def _notify_stmt(notify: Sequence[Tuple[str, str]]):
+    return select(*(func.pg_notify(channel, payload) for channel, payload in notify))
+
+
+class CatalogVersionRepository:
+    """Read and bump the per-namespace change counters (catalog_versions)."""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def read(self, namespaces: Iterable[str]) -> Dict[str, CatalogVersion]:
+        """Current rows by namespace; namespaces never written are absent."""
+        return {row.namespace: row for row in self.db.execute(_read_stmt(namespaces)).scalars()}
+
+    def bump(
+        self, namespaces: Iterable[str], notify: Sequence[Tuple[str, str]] = (),
+    ) -> Dict[str, Tuple[int, str]]:
+        """Increment the counters in their own short transaction and return
+        the new (version, marker) by namespace.
+
+        `notify` is a list of (channel, payload) pairs sent with pg_notify in
+        the same transaction (one statement), so listeners hear about them
+        once it committed.
+
+        Called after the write itself committed, so the counter row is only
+        locked for this one statement instead of for the whole write (stock
+        deductions would otherwise serialize on it). Best effort: a failure
+        is logged (and nothing returned), the write it follows is already
+        durable.
+        """
+        namespaces = sorted(set(namespaces))  # fixed lock order
+        if not namespaces:
+            return {}
+        try:
+            bumped = {row.namespace: (row.version, row.marker) for row in self.db.scalars(_bump_stmt(namespaces))}
+            if notify:
+                self.db.execute(_notify_stmt(notify))
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            logger.exception("Could not bump catalog versions %s", namespaces)
+            return {}
+        return bumped
+
+
+class AsyncCatalogVersionRepository:
+    """CatalogVersionRepository on an AsyncSession."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def read(self, namespaces: Iterable[str]) -> Dict[str, CatalogVersion]:
+        return {row.namespace: row for row in (await self.db.execute(_read_stmt(namespaces))).scalars()}
+
+    async def bump(
+        self, namespaces: Iterable[str], notify: Sequence[Tuple[str, str]] = (),
+    ) -> Dict[str, Tuple[int, str]]:
+        namespaces = sorted(set(namespaces))  # fixed lock order
+        if not namespaces:
+            return {}
+        try:
+            bumped = {row.namespace: (row.version, row.marker) for row in await self.db.scalars(_bump_stmt(namespaces))}
+            if notify:
+                await self.db.execute(_notify_stmt(notify))
+            await self.db.commit()
+        except Exception:
+            await self.db.rollback()
+            logger.exception("Could not bump catalog versions %s", namespaces)
+            return {}
+        return bumped
@@ -3,13 +3,19 @@
 
 from typing import Optional, List
 from sqlalchemy.orm import Session
-from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update
 
 from src.repositories.base_repositories import BaseRepository
-from src.schemas.product import Category  # <-- use the SQLAlchemy model
+from src.repositories.async_base_repositories import AsyncBaseRepository
+from src.service.catalog_cache import CATEGORY
+from src.schemas.product import Category, Product  # <-- use the SQLAlchemy model
 
 
 class CategoryRepository(BaseRepository[Category]):
+    cache_namespace = CATEGORY
+    sortable_columns = ("name",)
+
     def __init__(self, db: Session):
         super().__init__(db, Category)
 
@@ -22,12 +28,26 @@ class CategoryRepository(BaseRepository[Category]):
         stmt = select(Category).where(Category.name == name)
         return self.db.execute(stmt).scalars().first()
 
+    # --- Fetch several categories by ID in one query ---
+    def list_by_ids(self, category_ids: List[int]) -> List[Category]:
+        if not category_ids:
+            return []
+        stmt = select(Category).where(Category.categoryID.in_(category_ids))
+        return list(self.db.execute(stmt).scalars().all())
+
     # --- List all with optional pagination ---
     def list(self, skip: int = 0, limit: int = 100) -> List[Category]:
         # Uses SQLAlchemy 2.0 select/scalars pattern
         stmt = select(Category).offset(skip).limit(limit)
         return list(self.db.execute(stmt).scalars().all())
 
+    # --- Catalog snapshot: all categories, or only `category_ids` ---
+    def list_for_snapshot(self, category_ids: Optional[List[int]] = None) -> List[Category]:
+        stmt = select(Category).order_by(Category.categoryID)
+        if category_ids is not None:
+            stmt = stmt.where(Category.categoryID.in_(category_ids))
+        return list(self.db.execute(stmt).scalars().all())
+
     # --- Create category ---
     def create(self, name: str, description: Optional[str] = None) -> Category:
         new_category = Category(name=name, description=description)
@@ -45,5 +65,42 @@ class CategoryRepository(BaseRepository[Category]):
 
     # --- Delete category ---
     def delete(self, category_id: int) -> bool:
-        # BaseRepository.delete expects (id)
+        # BaseRepository.delete is a bulk DELETE, so detach products from the
+        # category first (what the ORM cascade used to do row by row)
+        self.db.execute(
+            update(Product).where(Product.category_id == category_id).values(category_id=None)
+        )
         return super().delete(category_id)
+
+
+class AsyncCategoryRepository(AsyncBaseRepository[Category]):
+    """Async variant of CategoryRepository."""
+    cache_namespace = CATEGORY
+    sortable_columns = CategoryRepository.sortable_columns
+
+    def __init__(self, db: AsyncSession):
+        super().__init__(db, Category)
+
+    async def get_by_id(self, category_id: int) -> Optional[Category]:
+        return await super().get(category_id)
+
+    async def get_by_name(self, name: str) -> Optional[Category]:
+        stmt = select(Category).where(Category.name == name)
+        return (await self.db.execute(stmt)).scalars().first()
+
+    async def create(self, name: str, description: Optional[str] = None) -> Category:
+        return await super().add(Category(name=name, description=description))
+
+    async def update(self, category_id: int, name: Optional[str] = None, description: Optional[str] = None) -> Optional[Category]:
+        update_data = {}
+        if name is not None:
+            update_data["name"] = name
+        if description is not None:
+            update_data["description"] = description
+        return await super().update(category_id, update_data)
+
+    async def delete(self, category_id: int) -> bool:
+        await self.db.execute(
+            update(Product).where(Product.category_id == category_id).values(category_id=None)
+        )
+        return await super().delete(category_id)
@@ -1,24 +1,53 @@
 
 # src/repositories/inventory_repository.py
 
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Iterator, List
 from datetime import date
 from decimal import Decimal
 
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, undefer
 
 from src.repositories.base_repositories import BaseRepository
-from src.schemas.product import Inventory  # <-- use the SQLAlchemy model
+from src.repositories.async_base_repositories import AsyncBaseRepository
+from src.service.catalog_cache import INVENTORY
+from src.schemas.product import Inventory, Product  # <-- use the SQLAlchemy model
+
+
+# Column values for update_inventory_fields (sync and async)
+def _inventory_fields(kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    if "current_stock" in kwargs:
+        raise ValueError("current_stock is derived from the stock ledger; use update_stock.")
+    numeric_keys = {"min_stock_level"}
+    for k in list(kwargs.keys()):
+        if k in numeric_keys and kwargs[k] is not None:
+            kwargs[k] = Decimal(str(kwargs[k]))
+
+    # The restock date is derived (latest restock movement); an explicit
+    # one is stored in the recorded column it is compared with
+    for key in ("last_restock_date", "last_restock_data"):
+        if key in kwargs:
+            kwargs["restock_date_recorded"] = kwargs.pop(key)
+    return kwargs
 
 
 class InventoryRepository(BaseRepository[Inventory]):
+    # own catalog version; the product entries embedding a row are dropped
+    # with it (EMBEDDING_NAMESPACES)
+    cache_namespace = INVENTORY
+
     def __init__(self, db: Session):
         super().__init__(db, Inventory)
 
     # --- Get by product ID (Primary Key of inventory table) ---
     def get_by_product_id(self, product_id: int) -> Optional[Inventory]:
         # Since product_id is the PK for Inventory, Session.get is ideal
-        return self.db.get(Inventory, product_id)
+        return self.db.get(
+            Inventory, product_id,
+            options=[undefer(Inventory.current_stock), undefer(Inventory.last_restock_data)],
+        )
 
     # --- Create inventory ---
     def create_inventory(
@@ -36,9 +65,9 @@ class InventoryRepository(BaseRepository[Inventory]):
 
         new_inventory = Inventory(
             product_id=product_id,
-            current_stock=to_decimal(current_stock) or Decimal("0"),
+            stock_snapshot=to_decimal(current_stock) or Decimal("0"),
             min_stock_level=to_decimal(min_stock_level),
-            last_restock_data=last_restock_date,
+            restock_date_recorded=last_restock_date,
         )
         self.db.add(new_inventory)
         self.db.flush()  # Syncs with DB and gets IDs without committing
@@ -51,27 +80,137 @@ class InventoryRepository(BaseRepository[Inventory]):
         Updates scalar columns only using BaseRepository.update(id, data).
         Any relationship fields will be ignored by BaseRepository's mapper-safe logic.
         """
-        numeric_keys = {"current_stock", "min_stock_level"}
-        for k in list(kwargs.keys()):
-            if k in numeric_keys and kwargs[k] is not None:
-                kwargs[k] = Decimal(str(kwargs[k]))
-
-        # 2. CRITICAL FIX: Map 'date' (from controller/schema) to 'data' (in Model)
-        # We want to make sure we are sending 'last_restock_data' to the BaseRepository
-        if "last_restock_date" in kwargs:
-            kwargs["last_restock_data"] = kwargs.pop("last_restock_date")
-        
-        # Optional: If your controller sometimes sends it correctly as 'last_restock_data'
-        # but the old code was renaming it to 'date', remove that old renaming logic!
+        return super().update(product_id, _inventory_fields(kwargs))
 
-        return super().update(product_id, kwargs)
+    # --- Stock ledger -------------------------------------------------------
+    # Stock changes are appended as StockMovement rows (see
+    # StockMovementRepository); `Inventory.current_stock` is the snapshot plus
+    # the pending deltas. These helpers only flush; the controller commits.
+    def lock_for_update(self, product_ids: List[int]) -> List[int]:
+        """Lock the inventory rows; returns the ids that exist.
 
-    # --- Update stock only ---
-    def update_stock(self, product_id: int, new_stock: Decimal | float) -> Optional[Inventory]:
-        return self.update_inventory_fields(product_id, current_stock=new_stock)
+        Rows are locked in product_id order so concurrent batches touching
+        overlapping products cannot deadlock each other. The caller's next
+        statement (the guarded append) takes a fresh snapshot, so it sees
+        anything a concurrent deduction or compaction committed while we
+        waited.
+        """
+        lock = (
+            select(Inventory.product_id)
+            .where(Inventory.product_id.in_(product_ids))
+            .order_by(Inventory.product_id)
+            .with_for_update(key_share=True)  # FOR NO KEY UPDATE: ledger inserts (FK checks) don't wait
+        )
+        return list(self.db.execute(lock).scalars().all())
+
+    def reload(self, product_id: int) -> Optional[Inventory]:
+        """Re-read a row (live stock included) after appending movements."""
+        rows = self.reload_many([product_id])
+        return rows[0] if rows else None
+
+    def reload_many(self, product_ids: List[int]) -> List[Inventory]:
+        """Re-read rows (live stock included), in product_id order."""
+        stmt = (
+            select(Inventory)
+            .options(undefer(Inventory.current_stock), undefer(Inventory.last_restock_data))
+            .where(Inventory.product_id.in_(product_ids))
+            .order_by(Inventory.product_id)
+            .execution_options(populate_existing=True)
+        )
+        return list(self.db.execute(stmt).scalars().all())
+
+    # --- Low stock (predicate evaluated in SQL, served by ix_inventory_reorder_tracked) ---
+    def _low_stock_filter(self):
+        # the IS NOT NULL term matches the partial index predicate, so only
+        # tracked rows are candidates; current_stock is computed per row
+        return Inventory.min_stock_level.isnot(None) & (Inventory.current_stock <= Inventory.min_stock_level)
+
+    def list_low_stock_ids(self) -> List[int]:
+        stmt = select(Inventory.product_id).where(self._low_stock_filter()).order_by(Inventory.product_id)
+        return list(self.db.execute(stmt).scalars().all())
+
+    def iter_low_stock(self, batch_size: int = 1000) -> Iterator[Row]:
+        """Yield (product_id, name, current_stock, min_stock_level, shortfall) rows.
+
+        Uses a server-side cursor fetching `batch_size` rows at a time, so
+        large catalogs are never materialized in one result set. Largest
+        shortfall first.
+        """
+        shortfall = (Inventory.min_stock_level - Inventory.current_stock).label("shortfall")
+        stmt = (
+            select(
+                Inventory.product_id,
+                Product.name,
+                Inventory.current_stock,
+                Inventory.min_stock_level,
+                shortfall,
+            )
+            .join(Product, Product.product_id == Inventory.product_id)
+            .where(self._low_stock_filter())
+            .order_by(shortfall.desc(), Inventory.product_id)
+            .execution_options(yield_per=batch_size)
+        )
+        yield from self.db.execute(stmt)
 
     # --- Delete inventory ---
     def delete_inventory(self, product_id: int) -> bool:
         # BaseRepository.delete expects an ID (not an object)
         return super().delete(product_id)
 
+
+class AsyncInventoryRepository(AsyncBaseRepository[Inventory]):
+    """Async variant of InventoryRepository.
+
+    Stock changes are not made here: like the sync path they go through
+    InventoryController, which appends them to the ledger and queues the
+    low-stock and availability events in the same transaction.
+    """
+    cache_namespace = INVENTORY
+
+    def __init__(self, db: AsyncSession):
+        super().__init__(db, Inventory)
+
+    async def get_by_product_id(self, product_id: int) -> Optional[Inventory]:
+        return await self.db.get(
+            Inventory, product_id,
+            options=[undefer(Inventory.current_stock), undefer(Inventory.last_restock_data)],
+        )
+
+    async def create_inventory(
+        self,
+        product_id: int,
+        current_stock: Decimal | float = Decimal("0"),
+        min_stock_level: Optional[Decimal | float] = None,
+        last_restock_date: Optional[date] = None,
+    ) -> Inventory:
+        """Flush only; the initial stock is the snapshot (no movements yet)."""
+        new_inventory = Inventory(
+            product_id=product_id,
+            stock_snapshot=Decimal(str(current_stock)) if current_stock else Decimal("0"),
+            min_stock_level=Decimal(str(min_stock_level)) if min_stock_level is not None else None,
+            restock_date_recorded=last_restock_date,
+        )
+        self.db.add(new_inventory)
+        await self.db.flush()
+        return new_inventory
+
+    async def update_inventory_fields(self, product_id: int, **kwargs: Any) -> Optional[Inventory]:
+        # re-read: the RETURNING row leaves the deferred stock columns
+        # unloaded, and an AsyncSession cannot load them on access
+        if await super().update(product_id, _inventory_fields(kwargs)) is None:
+            return None
+        rows = await self.reload_many([product_id])
+        return rows[0] if rows else None
+
+    async def reload_many(self, product_ids: List[int]) -> List[Inventory]:
+        stmt = (
+            select(Inventory)
+            .options(undefer(Inventory.current_stock), undefer(Inventory.last_restock_data))
+            .where(Inventory.product_id.in_(product_ids))
+            .order_by(Inventory.product_id)
+            .execution_options(populate_existing=True)
+        )
+        return list((await self.db.execute(stmt)).scalars().all())
+
+    async def delete_inventory(self, product_id: int) -> bool:
+        return await super().delete(product_id)
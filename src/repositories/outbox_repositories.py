@@ -0,0 +1,151 @@
+# src/repositories/outbox_repositories.py
+
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session
+
+from src.repositories.base_repositories import BaseRepository
+from src.schemas.outbox import OutboxEvent
+
+
+class OutboxRepository(BaseRepository[OutboxEvent]):
+    def __init__(self, db: Session):
+        super().__init__(db, OutboxEvent)
+
+    # --- Enqueue (flush only; commits with the caller's transaction) ---
+    def enqueue(self, event_type: str, payload: Dict[str, Any], delay_seconds: float = 0) -> OutboxEvent:
+        """Queue an event; `delay_seconds` holds it back from the dispatcher."""
+        event = OutboxEvent(event_type=event_type, payload=payload)
+        if delay_seconds:
+            event.next_attempt_at = func.now() + timedelta(seconds=delay_seconds)
+        self.db.add(event)
+        self.db.flush()
+        return event
+
+    def enqueue_many(self, event_type: str, payloads: List[Dict[str, Any]]) -> List[OutboxEvent]:
+        return self.add_many(
+            [{"event_type": event_type, "payload": payload} for payload in payloads], commit=False
+        )
+
+    # --- Dispatcher side (each call is its own short transaction) ---
+    def claim_batch(self, limit: int, lease_seconds: float, max_attempts: int) -> List[OutboxEvent]:
+        """Lease up to `limit` due events and return them.
+
+        The lease pushes next_attempt_at forward, so other dispatchers
+        (other workers) skip these rows until it expires; SKIP LOCKED keeps
+        concurrent claims from waiting on each other.
+        """
+        due = (
+            select(OutboxEvent.event_id)
+            .where(
+                OutboxEvent.dispatched_at.is_(None),
+                OutboxEvent.dead_lettered_at.is_(None),
+                OutboxEvent.next_attempt_at <= func.now(),
+                OutboxEvent.attempts < max_attempts,
+            )
+            .order_by(OutboxEvent.next_attempt_at, OutboxEvent.event_id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        stmt = (
+            update(OutboxEvent)
+            .where(OutboxEvent.event_id.in_(due))
+            .values(
+                next_attempt_at=func.now() + timedelta(seconds=lease_seconds),
+                attempts=OutboxEvent.attempts + 1,
+            )
+            .returning(OutboxEvent)
+            .execution_options(populate_existing=True, synchronize_session=False)
+        )
+        try:
+            events = list(self.db.execute(stmt).scalars().all())
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        return sorted(events, key=lambda e: e.event_id)
+
+    def mark_dispatched(self, event_ids: List[int]) -> None:
+        if not event_ids:
+            return
+        stmt = (
+            update(OutboxEvent)
+            .where(OutboxEvent.event_id.in_(event_ids))
+            .values(dispatched_at=func.now(), last_error=None)
+            .execution_options(synchronize_session=False)
+        )
+        try:
+            self.db.execute(stmt)
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+
+    def mark_failed(self, failures: List[Dict[str, Any]]) -> None:
+        """Record each event's error and the sinks that did accept it, and
+        schedule its next attempt.
+
+        `failures` holds {event_id, last_error, delivered_sinks,
+        retry_in_seconds} dicts.
+        """
+        if not failures:
+            return
+        now = datetime.now(timezone.utc)
+        self.update_many([
+            {
+                "event_id": failure["event_id"],
+                "last_error": failure["last_error"][:2000],
+                "delivered_sinks": failure["delivered_sinks"],
+                "next_attempt_at": now + timedelta(seconds=failure["retry_in_seconds"]),
+            }
+            for failure in failures
+        ])
+
+    def dead_letter(self, max_attempts: int) -> List[Row]:
+        """Flag undelivered events whose last attempt is over as dead letters.
+
+        Covers events that failed their final attempt and events whose
+        dispatcher died holding the lease on it. Returns (event_id,
+        event_type, attempts, last_error) rows so the caller can log them.
+        """
+        stmt = (
+            update(OutboxEvent)
+            .where(
+                OutboxEvent.dispatched_at.is_(None),
+                OutboxEvent.dead_lettered_at.is_(None),
+                OutboxEvent.attempts >= max_attempts,
+                OutboxEvent.next_attempt_at <= func.now(),
+            )
+            .values(dead_lettered_at=func.now())
+            .returning(OutboxEvent.event_id, OutboxEvent.event_type, OutboxEvent.attempts, OutboxEvent.last_error)
+            .execution_options(synchronize_session=False)
+        )
+        try:
+            rows = list(self.db.execute(stmt).all())
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        return rows
+
+    def purge_dispatched(self, older_than: datetime, limit: int = 1000) -> int:
+        """Delete up to `limit` events dispatched before `older_than`; returns the count."""
+        doomed = (
+            select(OutboxEvent.event_id)
+            .where(OutboxEvent.dispatched_at < older_than)
+            .order_by(OutboxEvent.dispatched_at)
+            .limit(limit)
+            .scalar_subquery()
+        )
+        stmt = delete(OutboxEvent).where(OutboxEvent.event_id.in_(doomed)).returning(OutboxEvent.event_id)
+        try:
+            purged = len(self.db.execute(stmt).all())
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        return purged
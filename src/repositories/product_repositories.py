@@ -1,18 +1,79 @@
 
 # src/repositories/product_repository.py
 
-from typing import Optional, List
+from typing import Optional, List, Set, Tuple, Dict, Any, Iterable
 from decimal import Decimal
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.orm import Session, joinedload, noload, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
 from src.repositories.base_repositories import BaseRepository
-from src.repositories.inventory_repositories import InventoryRepository
-from src.repositories.category_repositories import CategoryRepository
-from src.schemas.product import Product  # <-- ORM model, not schema
+from src.repositories.async_base_repositories import AsyncBaseRepository
+from src.service.catalog_cache import PRODUCT
+from src.repositories.inventory_repositories import AsyncInventoryRepository, InventoryRepository
+from src.repositories.category_repositories import AsyncCategoryRepository, CategoryRepository
+from src.schemas.product import Inventory, Product  # <-- ORM model, not schema
+
+
+# Relations ProductResponse can nest, loaded on request via `include`
+PRODUCT_RELATIONS = ("category", "inventory")
+
+
+def parse_include(include: Optional[str]) -> Tuple[str, ...]:
+    """Parse an `include=category,inventory` query value; raises ValueError on unknown names."""
+    if include is None:
+        return PRODUCT_RELATIONS
+    names = tuple(dict.fromkeys(part.strip() for part in include.split(",") if part.strip()))
+    unknown = [name for name in names if name not in PRODUCT_RELATIONS]
+    if unknown:
+        raise ValueError(
+            f"Unknown include '{', '.join(unknown)}'. Allowed: {', '.join(PRODUCT_RELATIONS)}."
+        )
+    return names
+
+
+def product_load_options(include: Optional[Iterable[str]] = None) -> list:
+    """Loader options for Product listings.
+
+    Included scalar relations (category, inventory) are joined into the same
+    SELECT, collections would use selectinload; everything else is noload'ed
+    so serializing the response can never fall back to per-row lazy loads.
+    """
+    include = PRODUCT_RELATIONS if include is None else tuple(include)
+    options = []
+    for name in PRODUCT_RELATIONS:
+        attr = getattr(Product, name)
+        if name not in include:
+            options.append(noload(attr))
+        elif attr.property.uselist:
+            options.append(selectinload(attr))
+        elif name == "inventory":
+            # current_stock is deferred; the response embeds it
+            options.append(joinedload(attr).undefer(Inventory.current_stock))
+        else:
+            options.append(joinedload(attr))
+    return options
+
+
+def _list_stmt(skip: int, limit: int, include: Optional[Iterable[str]], category_id: Optional[int] = None):
+    stmt = select(Product).options(*product_load_options(include))
+    if category_id is not None:
+        stmt = stmt.where(Product.category_id == category_id)
+    # stable pages; the joins would otherwise reorder rows
+    return stmt.order_by(Product.product_id).offset(skip).limit(limit)
+
+
+def _to_decimal(v):
+    if v is None:
+        return None
+    return v if isinstance(v, Decimal) else Decimal(str(v))
 
 
 class ProductRepository(BaseRepository[Product]):
+    cache_namespace = PRODUCT
+    sortable_columns = ("name", "selling_price")
+
     def __init__(self, db: Session):
         super().__init__(db, Product)
         self.inventory_repo = InventoryRepository(db)
@@ -29,7 +90,7 @@ class ProductRepository(BaseRepository[Product]):
             select(Product)
             .options(
                 joinedload(Product.category),  # eager load category
-                joinedload(Product.inventory)  # eager load inventory (one-to-one)
+                joinedload(Product.inventory).undefer(Inventory.current_stock)  # eager load inventory (one-to-one)
             )
             .where(Product.product_id == product_id)
         )
@@ -41,32 +102,48 @@ class ProductRepository(BaseRepository[Product]):
         return self.db.execute(stmt).scalars().first()
 
     # --- List products with optional pagination ---
-    def list(self, skip: int = 0, limit: int = 100) -> List[Product]:
-        stmt = select(Product).offset(skip).limit(limit)
-        return list(self.db.execute(stmt).scalars().all())
+    # `include` names the relations to load (see product_load_options);
+    # None loads all of them.
+    def list(self, skip: int = 0, limit: int = 100, include: Optional[Iterable[str]] = None) -> List[Product]:
+        return list(self.db.execute(_list_stmt(skip, limit, include)).scalars().all())
 
-    # Optional: list with eager loading (useful for API responses)
     def list_with_relations(self, skip: int = 0, limit: int = 100) -> List[Product]:
-        stmt = (
-            select(Product)
-            .options(
-                joinedload(Product.category),
-                joinedload(Product.inventory)
-            )
-            .offset(skip)
-            .limit(limit)
-        )
+        return self.list(skip=skip, limit=limit, include=PRODUCT_RELATIONS)
+
+    def list_keyset(
+        self,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        sort: Optional[str] = None,
+        stmt=None,
+        include: Optional[Iterable[str]] = None,
+    ) -> Tuple[List[Product], Optional[str]]:
+        stmt = (stmt if stmt is not None else select(Product)).options(*product_load_options(include))
+        return super().list_keyset(cursor=cursor, limit=limit, sort=sort, stmt=stmt)
+
+    # --- Catalog snapshot: all products (with inventory), or only `product_ids` ---
+    def list_for_snapshot(self, product_ids: Optional[List[int]] = None) -> List[Product]:
+        stmt = select(Product).options(*product_load_options(("inventory",))).order_by(Product.product_id)
+        if product_ids is not None:
+            stmt = stmt.where(Product.product_id.in_(product_ids))
         return list(self.db.execute(stmt).scalars().all())
 
     # --- List products by category ---
-    def list_by_category(self, category_id: int, skip: int = 0, limit: int = 100) -> List[Product]:
-        stmt = (
-            select(Product)
-            .where(Product.category_id == category_id)
-            .offset(skip)
-            .limit(limit)
-        )
-        return list(self.db.execute(stmt).scalars().all())
+    def list_by_category(
+        self, category_id: int, skip: int = 0, limit: int = 100, include: Optional[Iterable[str]] = None
+    ) -> List[Product]:
+        return list(self.db.execute(_list_stmt(skip, limit, include, category_id)).scalars().all())
+
+    def list_by_category_keyset(
+        self,
+        category_id: int,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        sort: Optional[str] = None,
+        include: Optional[Iterable[str]] = None,
+    ) -> Tuple[List[Product], Optional[str]]:
+        stmt = select(Product).where(Product.category_id == category_id)
+        return self.list_keyset(cursor=cursor, limit=limit, sort=sort, stmt=stmt, include=include)
 
     # --- Create product + auto-create inventory (atomic) ---
     def create(
@@ -113,12 +190,79 @@ class ProductRepository(BaseRepository[Product]):
 
             # The outer transaction (managed by FastAPI) will handle the final .commit()
             self.db.commit()
+            self.invalidate_cache(product.product_id)
             self.db.refresh(product)
             return product
         except Exception:
             # session.begin() rolls back automatically on exception
             raise
 
+    # --- Names (out of `names`) that are already taken, in one query ---
+    def existing_names(self, names: List[str]) -> Set[str]:
+        if not names:
+            return set()
+        stmt = select(Product.name).where(Product.name.in_(names))
+        return set(self.db.execute(stmt).scalars().all())
+
+    # --- Ids (out of `product_ids`) that exist, in one query ---
+    def existing_ids(self, product_ids: List[int]) -> Set[int]:
+        if not product_ids:
+            return set()
+        stmt = select(Product.product_id).where(Product.product_id.in_(product_ids))
+        return set(self.db.execute(stmt).scalars().all())
+
+    # --- Bulk create products + inventory (one transaction) ---
+    def create_many(self, rows: List[Dict[str, Any]]) -> List[Product]:
+        """Create products and their inventory rows in bulk.
+
+        Each row has the `create` arguments (name, selling_price, unit_cost,
+        category_id, initial_stock, min_stock_level). Rows must already be
+        validated; any database error rolls back the whole batch.
+        """
+        def to_dec(v):
+            if v is None:
+                return None
+            return v if isinstance(v, Decimal) else Decimal(str(v))
+
+        try:
+            products = self.add_many(
+                [
+                    {
+                        "name": row["name"],
+                        "selling_price": to_dec(row["selling_price"]),
+                        "unit_cost": to_dec(row.get("unit_cost")),
+                        "category_id": row.get("category_id"),
+                    }
+                    for row in rows
+                ],
+                commit=False,
+            )
+            inventories = self.inventory_repo.add_many(
+                [
+                    {
+                        "product_id": product.product_id,
+                        "stock_snapshot": to_dec(row.get("initial_stock")) or Decimal("0"),
+                        "min_stock_level": to_dec(row.get("min_stock_level")),
+                        "restock_date_recorded": row.get("last_restock_date"),
+                    }
+                    for product, row in zip(products, rows)
+                ],
+                commit=False,
+            )
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        self.invalidate_cache()
+
+        # Attach the inserted inventory so serializing the products does not
+        # lazy-load it row by row; new rows have no movements yet, so the
+        # live stock is the snapshot (RETURNING does not compute it)
+        for product, inventory in zip(products, inventories):
+            set_committed_value(inventory, "current_stock", inventory.stock_snapshot)
+            set_committed_value(product, "inventory", inventory)
+        return products
+
     # --- Update product ---
     def update(
         self,
@@ -148,7 +292,7 @@ class ProductRepository(BaseRepository[Product]):
         if category_id is not None:
             update_data["category_id"] = category_id
 
-        # Use BaseRepository.update(id, data) which commits & refreshes
+        # BaseRepository.update issues a single UPDATE ... RETURNING and commits
         return super().update(product_id, update_data)
 
     # --- Delete product + inventory ---
@@ -157,3 +301,126 @@ class ProductRepository(BaseRepository[Product]):
         self.inventory_repo.delete_inventory(product_id)
         # Then delete product via BaseRepository
         return super().delete(product_id)
+
+
+class AsyncProductRepository(AsyncBaseRepository[Product]):
+    """Async variant of ProductRepository.
+
+    Category and inventory are always eager-loaded for single products
+    (ProductResponse embeds them and an AsyncSession cannot lazy-load).
+    """
+    cache_namespace = PRODUCT
+    sortable_columns = ProductRepository.sortable_columns
+
+    def __init__(self, db: AsyncSession):
+        super().__init__(db, Product)
+        self.inventory_repo = AsyncInventoryRepository(db)
+        self.category_repo = AsyncCategoryRepository(db)
+
+    async def get_by_id(self, product_id: int) -> Optional[Product]:
+        stmt = (
+            select(Product)
+            .options(*product_load_options())
+            .where(Product.product_id == product_id)
+            .execution_options(populate_existing=True)
+        )
+        return (await self.db.execute(stmt)).scalars().first()
+
+    async def get_by_name(self, name: str) -> Optional[Product]:
+        stmt = select(Product).where(Product.name == name)
+        return (await self.db.execute(stmt)).scalars().first()
+
+    async def list(self, skip: int = 0, limit: int = 100, include: Optional[Iterable[str]] = None) -> List[Product]:
+        return list((await self.db.execute(_list_stmt(skip, limit, include))).scalars().all())
+
+    async def list_keyset(
+        self,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        sort: Optional[str] = None,
+        stmt=None,
+        include: Optional[Iterable[str]] = None,
+    ) -> Tuple[List[Product], Optional[str]]:
+        stmt = (stmt if stmt is not None else select(Product)).options(*product_load_options(include))
+        return await super().list_keyset(cursor=cursor, limit=limit, sort=sort, stmt=stmt)
+
+    async def list_by_category(
+        self, category_id: int, skip: int = 0, limit: int = 100, include: Optional[Iterable[str]] = None
+    ) -> List[Product]:
+        return list((await self.db.execute(_list_stmt(skip, limit, include, category_id))).scalars().all())
+
+    async def list_by_category_keyset(
+        self,
+        category_id: int,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        sort: Optional[str] = None,
+        include: Optional[Iterable[str]] = None,
+    ) -> Tuple[List[Product], Optional[str]]:
+        stmt = select(Product).where(Product.category_id == category_id)
+        return await self.list_keyset(cursor=cursor, limit=limit, sort=sort, stmt=stmt, include=include)
+
+    async def create(
+        self,
+        name: str,
+        selling_price: Decimal | float,
+        unit_cost: Optional[Decimal | float] = None,
+        category_id: Optional[int] = None,
+        initial_stock: Decimal | float = Decimal("0"),
+        min_stock_level: Optional[Decimal | float] = None,
+        last_restock_date: Optional["date"] = None,
+    ) -> Product:
+        """Product and its inventory row in one transaction."""
+        if category_id is not None and not await self.category_repo.get_by_id(category_id):
+            raise ValueError(f"Category with ID {category_id} does not exist.")
+
+        product = Product(
+            name=name,
+            selling_price=_to_decimal(selling_price),
+            unit_cost=_to_decimal(unit_cost),
+            category_id=category_id,
+        )
+        try:
+            self.db.add(product)
+            await self.db.flush()  # assign PK
+            await self.inventory_repo.create_inventory(
+                product_id=product.product_id,
+                current_stock=_to_decimal(initial_stock) or Decimal("0"),
+                min_stock_level=_to_decimal(min_stock_level),
+                last_restock_date=last_restock_date,
+            )
+            await self.db.commit()
+        except Exception:
+            await self.db.rollback()
+            raise
+        await self.invalidate_cache(product.product_id)
+        return await self.get_by_id(product.product_id)
+
+    async def update(
+        self,
+        product_id: int,
+        name: Optional[str] = None,
+        selling_price: Optional[Decimal | float] = None,
+        unit_cost: Optional[Decimal | float] = None,
+        category_id: Optional[int] = None,
+    ) -> Optional[Product]:
+        if category_id is not None and not await self.category_repo.get_by_id(category_id):
+            raise ValueError(f"Category with ID {category_id} does not exist.")
+
+        update_data = {}
+        if name is not None:
+            update_data["name"] = name.strip() if isinstance(name, str) else name
+        if selling_price is not None:
+            update_data["selling_price"] = _to_decimal(selling_price)
+        if unit_cost is not None:
+            update_data["unit_cost"] = _to_decimal(unit_cost)
+        if category_id is not None:
+            update_data["category_id"] = category_id
+
+        if await super().update(product_id, update_data) is None:
+            return None
+        return await self.get_by_id(product_id)
+
+    async def delete(self, product_id: int) -> bool:
+        await self.inventory_repo.delete_inventory(product_id)
+        return await super().delete(product_id)
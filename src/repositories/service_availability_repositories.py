@@ -0,0 +1,161 @@
+# src/repositories/service_availability_repositories.py
+
+import logging
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from src.repositories.outbox_repositories import OutboxRepository
+from src.repositories.service_repositories import AVAILABILITY_REFRESH_EVENT, ServiceRepository
+from src.schemas.outbox import OutboxEvent
+from src.schemas.product import Inventory, Service, ServiceProductAssociation
+from src.schemas.service_availability import ServiceAvailability
+
+logger = logging.getLogger(__name__)
+
+def merge_refreshes(payloads: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """One AVAILABILITY_REFRESH_EVENT payload covering all of `payloads`."""
+    product_ids, service_ids = set(), set()
+    for payload in payloads:
+        product_ids.update(payload.get("product_ids") or ())
+        service_ids.update(payload.get("service_ids") or ())
+    return {"product_ids": sorted(product_ids), "service_ids": sorted(service_ids)}
+
+
+def availability_select():
+    """can_perform / short_parts of every service, from live stock (one aggregate)."""
+    assoc = ServiceProductAssociation
+    short_parts = func.count(assoc.product_id).filter(
+        assoc.is_optional.is_(False),
+        func.coalesce(Inventory.current_stock, 0) < assoc.quantity_required,
+    )
+    return (
+        select(Service.service_id, (short_parts == 0).label("can_perform"), short_parts.label("short_parts"))
+        .select_from(Service)
+        .outerjoin(assoc, assoc.service_id == Service.service_id)
+        .outerjoin(Inventory, Inventory.product_id == assoc.product_id)
+        .group_by(Service.service_id)
+    )
+
+
+class ServiceAvailabilityRepository:
+    """Maintain and read the stock-aware availability index (service_availability).
+
+    Writers that change stock or bills of materials queue an
+    AVAILABILITY_REFRESH_EVENT in the outbox with their own transaction
+    (`enqueue_refresh`). Stock writes leave it to the outbox dispatcher,
+    which merges the refreshes it claims in one batch (`merge_refreshes`)
+    into a single pass, so the index trails stock by about one dispatcher
+    poll. Bill-of-materials edits are rare and run theirs right after
+    their commit (`refresh_queued`), holding the event back from the
+    dispatcher for `inline_grace_seconds`; if the inline refresh failed,
+    or the process died before it ran, the dispatcher runs it then and
+    retries it like any other outbox event.
+    """
+
+    inline_grace_seconds = 30.0
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    # --- Queued refreshes (outbox) ---
+    def enqueue_refresh(
+        self, product_ids: Iterable[int] = (), service_ids: Iterable[int] = (), delay_seconds: float = 0.0,
+    ) -> OutboxEvent:
+        """Queue a refresh of the services using `product_ids` and of `service_ids`;
+        flush only, it commits with the caller's transaction.
+
+        Pass `delay_seconds=inline_grace_seconds` when the caller runs it
+        itself with `refresh_queued`.
+        """
+        payload = {"product_ids": sorted(set(product_ids)), "service_ids": sorted(set(service_ids))}
+        return OutboxRepository(self.db).enqueue(AVAILABILITY_REFRESH_EVENT, payload, delay_seconds=delay_seconds)
+
+    def refresh_queued(self, event: OutboxEvent) -> List[int]:
+        """Run a queued refresh now (after the caller's commit) and mark it done.
+
+        On failure the event stays queued for the dispatcher. Returns the
+        ids of services whose can_perform changed.
+        """
+        try:
+            changed = self.apply_event(event.payload)
+            OutboxRepository(self.db).mark_dispatched([event.event_id])
+        except SQLAlchemyError:
+            logger.warning(
+                "Service availability refresh failed; outbox event %d will retry it", event.event_id, exc_info=True
+            )
+            return []
+        return changed
+
+    def apply_event(self, payload: Dict[str, Any]) -> List[int]:
+        """Run the refresh described by an AVAILABILITY_REFRESH_EVENT payload; raises on failure."""
+        changed = self.refresh_for_products(payload.get("product_ids") or ())
+        changed += self.refresh_services(payload.get("service_ids") or ())
+        return changed
+
+    # --- Refresh ---
+    def refresh_for_products(self, product_ids: Iterable[int]) -> List[int]:
+        """Recompute the services that use any of these products as a part."""
+        product_ids = sorted(set(product_ids))
+        if not product_ids:
+            return []
+        users = select(ServiceProductAssociation.service_id).where(
+            ServiceProductAssociation.product_id.in_(product_ids)
+        )
+        return self._refresh(Service.service_id.in_(users))
+
+    def refresh_services(self, service_ids: Optional[Iterable[int]] = None) -> List[int]:
+        """Recompute these services (all of them when None)."""
+        if service_ids is None:
+            return self._refresh(None)
+        service_ids = sorted(set(service_ids))
+        if not service_ids:
+            return []
+        return self._refresh(Service.service_id.in_(service_ids))
+
+    def _refresh(self, scope) -> List[int]:
+        """Upsert the rows in `scope` in their own short transaction; returns
+        the ids of services whose can_perform changed (or that were new),
+        after evicting their cached reads (stock-aware lists depend on it).
+
+        Runs after the stock write committed, like the catalog version
+        bump, so deductions do not hold these rows for their whole
+        transaction. The rows are locked first and computed in a second
+        statement: a refresh that waited for a concurrent one then reads
+        that one's stock too, and the last refresh to run always wins with
+        the latest stock. Rolls back and re-raises on failure.
+        """
+        current = select(ServiceAvailability.service_id, ServiceAvailability.can_perform)
+        computed = availability_select()
+        if scope is not None:
+            current = current.where(ServiceAvailability.service_id.in_(
+                select(Service.service_id).where(scope)
+            ))
+            computed = computed.where(scope)
+        stmt = pg_insert(ServiceAvailability).from_select(
+            ["service_id", "can_perform", "short_parts"], computed.order_by(Service.service_id)
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[ServiceAvailability.service_id],
+            set_={
+                "can_perform": stmt.excluded.can_perform,
+                "short_parts": stmt.excluded.short_parts,
+                "updated_at": func.now(),
+            },
+        ).returning(ServiceAvailability.service_id, ServiceAvailability.can_perform)
+        try:
+            before = dict(self.db.execute(
+                current.order_by(ServiceAvailability.service_id).with_for_update()
+            ).all())
+            after = self.db.execute(stmt).all()
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        changed = [service_id for service_id, can_perform in after if before.get(service_id) != can_perform]
+        if changed:
+            ServiceRepository(self.db).invalidate_cache(*changed)
+        return changed
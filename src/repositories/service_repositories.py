@@ -1,13 +1,136 @@
-from typing import Optional, List
+import logging
+from typing import Any, Dict, Optional, List, Tuple
 from decimal import Decimal
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import select
+from sqlalchemy.orm import Session, joinedload, selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import case, column, delete, func, select, table, text, tuple_
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import SQLAlchemyError
 
 from src.repositories.base_repositories import BaseRepository
-from src.schemas.product import Service, ServiceProductAssociation
+from src.repositories.async_base_repositories import AsyncBaseRepository
+from src.repositories.catalog_version_repositories import CatalogVersionRepository
+from src.service.catalog_cache import SERVICE
+from src.schemas.outbox import OutboxEvent
+from src.schemas.product import Product, Service, ServiceProductAssociation
+from src.schemas.service_availability import ServiceAvailability
+
+logger = logging.getLogger(__name__)
+
+# Outbox event type of queued availability refreshes (run by the dispatcher, not sent to sinks)
+AVAILABILITY_REFRESH_EVENT = "availability_refresh"
+
+
+# --- Material cost rollup: one aggregate over services -> parts -> products ---
+COST_ROLLUP_VIEW = "service_cost_rollup"
+COST_ROLLUP_COLUMNS = (
+    "service_id", "name", "price", "material_cost", "margin", "margin_ratio",
+    "part_count", "parts_missing_cost", "computed_at",
+)
+
+
+def cost_rollup_select():
+    """Cost, margin and missing-cost counts for every service, in one query.
+
+    Parts whose product has no unit_cost are left out of the sum and counted
+    in `parts_missing_cost`, so such a cost is a lower bound.
+    """
+    assoc = ServiceProductAssociation
+    material_cost = func.coalesce(func.sum(assoc.quantity_required * Product.unit_cost), 0)
+    margin = Service.price - material_cost
+    return (
+        select(
+            Service.service_id,
+            Service.name,
+            Service.price,
+            material_cost.label("material_cost"),
+            margin.label("margin"),
+            case((Service.price > 0, func.round(margin / Service.price, 4)), else_=None).label("margin_ratio"),
+            func.count(assoc.product_id).label("part_count"),
+            func.count(assoc.product_id).filter(Product.unit_cost.is_(None)).label("parts_missing_cost"),
+            func.now().label("computed_at"),
+        )
+        .select_from(Service)
+        .outerjoin(assoc, assoc.service_id == Service.service_id)
+        .outerjoin(Product, Product.product_id == assoc.product_id)
+        .group_by(Service.service_id)
+    )
+
+
+def create_cost_rollup_view(bind) -> None:
+    """Create the materialized form of the rollup (idempotent; used by init_db)."""
+    query = cost_rollup_select().compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True})
+    with bind.begin() as conn:
+        conn.execute(text(f"CREATE MATERIALIZED VIEW IF NOT EXISTS {COST_ROLLUP_VIEW} AS {query}"))
+        # REFRESH ... CONCURRENTLY needs a unique index
+        conn.execute(text(
+            f"CREATE UNIQUE INDEX IF NOT EXISTS ux_{COST_ROLLUP_VIEW}_service_id ON {COST_ROLLUP_VIEW} (service_id)"
+        ))
+
+
+def drop_cost_rollup_view(bind) -> None:
+    """Drop the materialized rollup; it depends on the tables, so drop_all needs it gone first."""
+    with bind.begin() as conn:
+        conn.execute(text(f"DROP MATERIALIZED VIEW IF EXISTS {COST_ROLLUP_VIEW}"))
+
+
+_cost_rollup_view = table(COST_ROLLUP_VIEW, *(column(name) for name in COST_ROLLUP_COLUMNS))
+
+
+# --- Association sync: the diff is applied by the database in two statements ---
+def _upsert_associations_stmt(service_id: int, associations: List[dict]):
+    """INSERT new parts and UPDATE changed ones; unchanged rows are not rewritten."""
+    stmt = insert(ServiceProductAssociation).values([
+        {
+            "service_id": service_id,
+            "product_id": a["product_id"],
+            "quantity_required": a["quantity_required"],
+            "is_optional": a.get("is_optional", False),
+        }
+        for a in associations
+    ])
+    current = ServiceProductAssociation.__table__.c
+    return stmt.on_conflict_do_update(
+        index_elements=[current.service_id, current.product_id],
+        set_={
+            "quantity_required": stmt.excluded.quantity_required,
+            "is_optional": stmt.excluded.is_optional,
+        },
+        where=tuple_(current.quantity_required, current.is_optional).is_distinct_from(
+            tuple_(stmt.excluded.quantity_required, stmt.excluded.is_optional)
+        ),
+    )
+
+
+def _delete_removed_associations_stmt(service_id: int, associations: List[dict]):
+    """DELETE the parts that are no longer in `associations`."""
+    stmt = delete(ServiceProductAssociation).where(ServiceProductAssociation.service_id == service_id)
+    keep = [a["product_id"] for a in associations]
+    if keep:
+        stmt = stmt.where(ServiceProductAssociation.product_id.not_in(keep))
+    return stmt
+
+
+# --- Listings: shared by the sync and async repositories ---
+def _with_associations():
+    return select(Service).options(selectinload(Service.associations))
+
+
+def _available_stmt(stock_aware: bool):
+    stmt = _with_associations().where(Service.is_available == True)
+    if stock_aware:
+        # only services the availability index says the stock covers
+        stmt = stmt.join(ServiceAvailability, ServiceAvailability.service_id == Service.service_id).where(
+            ServiceAvailability.can_perform == True
+        )
+    return stmt
 
 
 class ServiceRepository(BaseRepository[Service]):
+    cache_namespace = SERVICE
+    sortable_columns = ("name", "price", "duration_minutes")
+
     def __init__(self, db: Session):
         super().__init__(db, Service)
 
@@ -19,6 +142,7 @@ class ServiceRepository(BaseRepository[Service]):
             select(Service)
             .options(joinedload(Service.associations))
             .where(Service.service_id == service_id)
+            .execution_options(populate_existing=True)
         )
         return self.db.execute(stmt).scalars().first()
 
@@ -30,24 +154,42 @@ class ServiceRepository(BaseRepository[Service]):
         stmt = select(Service).offset(skip).limit(limit)
         return list(self.db.execute(stmt).scalars().all())
 
+    # Listings page over services first (ORDER BY / OFFSET / LIMIT on
+    # `services` only) and then load the associations of that page with one
+    # `WHERE service_id IN (...)` query. A joinedload would repeat each
+    # service row once per association.
     def list_with_relations(self, skip: int = 0, limit: int = 100) -> List[Service]:
-        stmt = (
-            select(Service)
-            .options(joinedload(Service.associations))
-            .offset(skip)
-            .limit(limit)
-        )
-        return list(self.db.execute(stmt).scalars().unique().all())
+        stmt = _with_associations().order_by(Service.service_id).offset(skip).limit(limit)
+        return list(self.db.execute(stmt).scalars().all())
 
-    def list_available(self, skip: int = 0, limit: int = 100) -> List[Service]:
+    def list_available(self, skip: int = 0, limit: int = 100, stock_aware: bool = False) -> List[Service]:
+        stmt = _available_stmt(stock_aware).order_by(Service.service_id).offset(skip).limit(limit)
+        return list(self.db.execute(stmt).scalars().all())
+
+    # --- Catalog snapshot: available services, or only those among `service_ids` ---
+    def list_available_for_snapshot(self, service_ids: Optional[List[int]] = None) -> List[Service]:
         stmt = (
             select(Service)
+            .options(selectinload(Service.associations))
             .where(Service.is_available == True)
-            .offset(skip)
-            .limit(limit)
+            .order_by(Service.service_id)
         )
+        if service_ids is not None:
+            stmt = stmt.where(Service.service_id.in_(service_ids))
         return list(self.db.execute(stmt).scalars().all())
 
+    # --- Keyset (cursor) variants of the listings above ---
+    def list_with_relations_keyset(
+        self, cursor: Optional[str] = None, limit: int = 100, sort: Optional[str] = None
+    ) -> Tuple[List[Service], Optional[str]]:
+        return self.list_keyset(cursor=cursor, limit=limit, sort=sort, stmt=_with_associations())
+
+    def list_available_keyset(
+        self, cursor: Optional[str] = None, limit: int = 100, sort: Optional[str] = None,
+        stock_aware: bool = False,
+    ) -> Tuple[List[Service], Optional[str]]:
+        return self.list_keyset(cursor=cursor, limit=limit, sort=sort, stmt=_available_stmt(stock_aware))
+
     def create(
         self,
         name: str,
@@ -80,6 +222,7 @@ class ServiceRepository(BaseRepository[Service]):
                 self.db.add(assoc)
 
         self.db.commit()
+        self.invalidate_cache(service.service_id)
         self.db.refresh(service)
         return service
 
@@ -112,25 +255,23 @@ class ServiceRepository(BaseRepository[Service]):
             service.is_available = is_available
 
         if associations is not None:
-            # Clear existing associations
-            stmt = select(ServiceProductAssociation).where(ServiceProductAssociation.service_id == service_id)
-            existing_assocs = self.db.execute(stmt).scalars().all()
-            for assoc in existing_assocs:
-                self.db.delete(assoc)
-            
-            # Add new associations
-            for assoc_data in associations:
-                assoc = ServiceProductAssociation(
-                    service_id=service_id,
-                    product_id=assoc_data["product_id"],
-                    quantity_required=assoc_data["quantity_required"],
-                    is_optional=assoc_data.get("is_optional", False)
-                )
-                self.db.add(assoc)
+            self.sync_associations(service_id, associations)
 
         self.db.commit()
-        self.db.refresh(service)
-        return service
+        self.invalidate_cache(service_id)
+        return self.get_by_id_with_relations(service_id)
+
+    def sync_associations(self, service_id: int, associations: List[dict]) -> None:
+        """Make the service's parts equal to `associations` (flush only).
+
+        Product ids must be unique within `associations`.
+        """
+        if associations:
+            self.db.execute(_upsert_associations_stmt(service_id, associations))
+        self.db.execute(
+            _delete_removed_associations_stmt(service_id, associations),
+            execution_options={"synchronize_session": False},
+        )
 
     def delete(self, service_id: int) -> bool:
         service = self.get_by_id(service_id)
@@ -138,4 +279,173 @@ class ServiceRepository(BaseRepository[Service]):
             return False
         self.db.delete(service)
         self.db.commit()
+        self.invalidate_cache(service_id)
+        return True
+
+    # --- Cost rollup ---
+    def cost_rollup(self, cached: bool = False) -> List[Dict[str, Any]]:
+        """Rollup rows for all services, computed live or read from the materialized view."""
+        if cached:
+            stmt = select(_cost_rollup_view).order_by(_cost_rollup_view.c.service_id)
+        else:
+            stmt = cost_rollup_select().order_by(Service.service_id)
+        return [row._asdict() for row in self.db.execute(stmt).all()]
+
+    def refresh_cost_rollup(self) -> bool:
+        """Recompute the materialized rollup; readers are not blocked (CONCURRENTLY).
+
+        Best effort: called after catalog writes have committed, so a
+        failure (e.g. the view was never created) is logged, not raised.
+        """
+        try:
+            self.db.execute(text(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {COST_ROLLUP_VIEW}"))
+            self.db.commit()
+        except SQLAlchemyError:
+            self.db.rollback()
+            logger.exception("Refreshing %s failed", COST_ROLLUP_VIEW)
+            return False
+        # the view has its own version: it changes after the catalog write did
+        CatalogVersionRepository(self.db).bump([COST_ROLLUP_VIEW])
+        return True
+
+
+class AsyncServiceRepository(AsyncBaseRepository[Service]):
+    """Async variant of ServiceRepository.
+
+    Associations are always loaded with selectinload since ServiceResponse
+    serializes them and AsyncSession cannot lazy-load. Writes that change
+    the parts also queue the availability refresh in their own transaction
+    (ServiceController does that for the sync path) and leave it to the
+    outbox dispatcher; requesting the cost rollup refresh after them is
+    the caller's job, as it is ServiceController's.
+    """
+    cache_namespace = SERVICE
+    sortable_columns = ServiceRepository.sortable_columns
+
+    def __init__(self, db: AsyncSession):
+        super().__init__(db, Service)
+
+    async def get_by_id(self, service_id: int) -> Optional[Service]:
+        stmt = (
+            _with_associations()
+            .where(Service.service_id == service_id)
+            .execution_options(populate_existing=True)
+        )
+        return (await self.db.execute(stmt)).scalars().first()
+
+    async def get_by_id_with_relations(self, service_id: int) -> Optional[Service]:
+        return await self.get_by_id(service_id)
+
+    async def get_by_name(self, name: str) -> Optional[Service]:
+        stmt = select(Service).where(Service.name == name)
+        return (await self.db.execute(stmt)).scalars().first()
+
+    async def list_with_relations(self, skip: int = 0, limit: int = 100) -> List[Service]:
+        stmt = _with_associations().order_by(Service.service_id).offset(skip).limit(limit)
+        return list((await self.db.execute(stmt)).scalars().all())
+
+    async def list_available(self, skip: int = 0, limit: int = 100, stock_aware: bool = False) -> List[Service]:
+        stmt = _available_stmt(stock_aware).order_by(Service.service_id).offset(skip).limit(limit)
+        return list((await self.db.execute(stmt)).scalars().all())
+
+    async def list_with_relations_keyset(
+        self, cursor: Optional[str] = None, limit: int = 100, sort: Optional[str] = None
+    ) -> Tuple[List[Service], Optional[str]]:
+        return await self.list_keyset(cursor=cursor, limit=limit, sort=sort, stmt=_with_associations())
+
+    async def list_available_keyset(
+        self, cursor: Optional[str] = None, limit: int = 100, sort: Optional[str] = None,
+        stock_aware: bool = False,
+    ) -> Tuple[List[Service], Optional[str]]:
+        return await self.list_keyset(cursor=cursor, limit=limit, sort=sort, stmt=_available_stmt(stock_aware))
+
+    def _queue_availability_refresh(self, service_id: int) -> None:
+        # same payload as ServiceAvailabilityRepository.enqueue_refresh
+        self.db.add(OutboxEvent(
+            event_type=AVAILABILITY_REFRESH_EVENT,
+            payload={"product_ids": [], "service_ids": [service_id]},
+        ))
+
+    async def create(
+        self,
+        name: str,
+        image_url: str,
+        price: Decimal,
+        duration_minutes: int,
+        description: Optional[str] = None,
+        is_available: bool = True,
+        associations: Optional[List[dict]] = None,
+    ) -> Service:
+        service = Service(
+            name=name,
+            description=description,
+            image_url=image_url,
+            price=price,
+            duration_minutes=duration_minutes,
+            is_available=is_available,
+        )
+        try:
+            self.db.add(service)
+            await self.db.flush()  # Get service_id before committing
+            if associations:
+                await self.db.execute(_upsert_associations_stmt(service.service_id, associations))
+            self._queue_availability_refresh(service.service_id)
+            await self.db.commit()
+        except Exception:
+            await self.db.rollback()
+            raise
+        await self.invalidate_cache(service.service_id)
+        return await self.get_by_id(service.service_id)
+
+    async def update(
+        self,
+        service_id: int,
+        name: Optional[str] = None,
+        description: Optional[str] = None,
+        image_url: Optional[str] = None,
+        price: Optional[Decimal] = None,
+        duration_minutes: Optional[int] = None,
+        is_available: Optional[bool] = None,
+        associations: Optional[List[dict]] = None,
+    ) -> Optional[Service]:
+        service = await self.get_by_id(service_id)
+        if not service:
+            return None
+
+        if name is not None:
+            service.name = name
+        if description is not None:
+            service.description = description
+        if image_url is not None:
+            service.image_url = image_url
+        if price is not None:
+            service.price = price
+        if duration_minutes is not None:
+            service.duration_minutes = duration_minutes
+        if is_available is not None:
+            service.is_available = is_available
+
+        try:
+            if associations is not None:
+                if associations:
+                    await self.db.execute(_upsert_associations_stmt(service_id, associations))
+                await self.db.execute(
+                    _delete_removed_associations_stmt(service_id, associations),
+                    execution_options={"synchronize_session": False},
+                )
+                self._queue_availability_refresh(service_id)
+            await self.db.commit()
+        except Exception:
+            await self.db.rollback()
+            raise
+        await self.invalidate_cache(service_id)
+        return await self.get_by_id(service_id)
+
+    async def delete(self, service_id: int) -> bool:
+        service = await self.get_by_id(service_id)
+        if not service:
+            return False
+        await self.db.delete(service)
+        await self.db.commit()
+        await self.invalidate_cache(service_id)
         return True
@@ -0,0 +1,169 @@
+# src/repositories/stock_movement_repositories.py
+
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import Integer, Numeric, String, column, func, insert, literal, select, update, values
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session
+
+from src.repositories.base_repositories import BaseRepository
+from src.schemas.product import Inventory, Product, StockMovement
+
+
+class StockMovementRepository(BaseRepository[StockMovement]):
+    """Append-only access to the stock ledger (no updates besides compaction)."""
+
+    def __init__(self, db: Session):
+        super().__init__(db, StockMovement)
+
+    # --- Append (flush only; the caller owns the transaction) ---
+    def append(
+        self, product_id: int, delta: Decimal, reason: str, actor: Optional[str] = None
+    ) -> StockMovement:
+        movement = StockMovement(product_id=product_id, delta=delta, reason=reason, actor=actor)
+        self.db.add(movement)
+        self.db.flush()
+        return movement
+
+    def append_many(self, rows: List[Dict[str, Any]]) -> List[StockMovement]:
+        """Multi-row INSERT of {product_id, delta, reason, actor} dicts."""
+        return self.add_many(rows, commit=False)
+
+    def append_guarded(
+        self, deltas: Dict[int, Decimal], reason: str, actor: Optional[str] = None
+    ) -> List[Row]:
+        """Append one movement per product unless it would take the stock below zero.
+
+        A single statement: the live stock is read, the guard evaluated and
+        the movements inserted together (``INSERT ... SELECT ... WHERE
+        stock + delta >= 0 RETURNING``), so there is no application-side
+        check-then-append. Returns one (product_id, name, stock,
+        min_stock_level, applied) row per existing product, in product_id
+        order; `stock` is the level before this call and `applied` is False
+        where the guard refused the movement. Callers hold the inventory row
+        locks, so concurrent guarded appends cannot both pass on one product,
+        and roll back when any row was refused.
+        """
+        request = values(
+            column("product_id", Integer), column("delta", Numeric(10, 2)), name="request"
+        ).data([(product_id, delta) for product_id, delta in sorted(deltas.items())])
+        live = (
+            select(
+                Inventory.product_id,
+                Product.name,
+                Inventory.current_stock.label("stock"),
+                Inventory.min_stock_level,
+                request.c.delta,
+            )
+            .join(request, request.c.product_id == Inventory.product_id)
+            .join(Product, Product.product_id == Inventory.product_id)
+            .cte("live")
+        )
+        applied = (
+            insert(StockMovement)
+            .from_select(
+                ["product_id", "delta", "reason", "actor"],
+                select(
+                    live.c.product_id,
+                    live.c.delta,
+                    literal(reason, String),
+                    literal(actor, String),
+                ).where(live.c.stock + live.c.delta >= 0),
+            )
+            .returning(StockMovement.product_id)
+            .cte("applied")
+        )
+        stmt = (
+            select(
+                live.c.product_id,
+                live.c.name,
+                live.c.stock,
+                live.c.min_stock_level,
+                applied.c.product_id.isnot(None).label("applied"),
+            )
+            .outerjoin(applied, applied.c.product_id == live.c.product_id)
+            .order_by(live.c.product_id)
+        )
+        return list(self.db.execute(stmt).all())
+
+    def append_adjustment(
+        self, product_id: int, new_stock: Decimal, actor: Optional[str] = None
+    ) -> Optional[Decimal]:
+        """Record an adjustment that brings the live stock to `new_stock`.
+
+        One ``INSERT ... SELECT new_stock - stock ... RETURNING delta``
+        statement; returns the delta, or None when the stock already matches
+        (or the product has no inventory row). The caller holds the row lock.
+        """
+        stmt = (
+            insert(StockMovement)
+            .from_select(
+                ["product_id", "delta", "reason", "actor"],
+                select(
+                    Inventory.product_id,
+                    literal(new_stock, Numeric(10, 2)) - Inventory.current_stock,
+                    literal("adjustment", String),
+                    literal(actor, String),
+                ).where(
+                    Inventory.product_id == product_id,
+                    Inventory.current_stock != new_stock,
+                ),
+            )
+            .returning(StockMovement.delta)
+        )
+        return self.db.execute(stmt).scalar()
+
+    # --- History of one product, newest first (keyset paginated) ---
+    def list_for_product_keyset(
+        self, product_id: int, cursor: Optional[str] = None, limit: int = 100
+    ) -> Tuple[List[StockMovement], Optional[str]]:
+        stmt = select(StockMovement).where(StockMovement.product_id == product_id)
+        return self.list_keyset(cursor=cursor, limit=limit, sort="-movement_id", stmt=stmt)
+
+    # --- Compaction ---
+    def pending_product_ids(self, older_than: datetime, limit: int = 500) -> List[int]:
+        """Products that have movements older than `older_than` not yet folded."""
+        stmt = (
+            select(StockMovement.product_id)
+            .where(StockMovement.compacted.is_(False), StockMovement.created_at < older_than)
+            .group_by(StockMovement.product_id)
+            .order_by(StockMovement.product_id)
+            .limit(limit)
+        )
+        return list(self.db.execute(stmt).scalars().all())
+
+    def fold_into_snapshot(self, product_ids: List[int], older_than: datetime) -> int:
+        """Add pending deltas older than `older_than` to the inventory snapshots.
+
+        One statement: flag the movements compacted, sum the returned deltas
+        per product and add them to `inventory.current_stock`. Movements
+        committed concurrently are not visible to it and simply stay pending.
+        The caller should hold the inventory row locks and commits.
+        Returns the number of inventory rows updated.
+        """
+        folded = (
+            update(StockMovement)
+            .where(
+                StockMovement.product_id.in_(product_ids),
+                StockMovement.compacted.is_(False),
+                StockMovement.created_at < older_than,
+            )
+            .values(compacted=True)
+            .returning(StockMovement.product_id, StockMovement.delta)
+            .cte("folded")
+        )
+        totals = (
+            select(folded.c.product_id, func.sum(folded.c.delta).label("delta"))
+            .group_by(folded.c.product_id)
+            .cte("totals")
+        )
+        inventory = Inventory.__table__
+        stmt = (
+            update(inventory)
+            .where(inventory.c.product_id == totals.c.product_id)
+            .values(current_stock=inventory.c.current_stock + totals.c.delta)
+            .returning(inventory.c.product_id)
+        )
+        return len(self.db.execute(stmt).all())
@@ -1,9 +1,11 @@
 from sqlalchemy.orm import Session
-from typing import Optional, List, Union
+from typing import Optional, List, Tuple, Union
+from sqlalchemy import select
 from sqlalchemy.exc import IntegrityError
 from src.schemas.techincal import TechnicalModel
 from src.models.technical_model import TechnicalCreate, TechnicalUpdate # Assuming AdminUpdate exists
 from src.utils.hash_password import hash_password 
+from src.repositories.base_repositories import keyset_paginate
 
 class TechnicalRepository:
     """Implements the data access logic for the Technical entity."""
@@ -27,6 +29,15 @@ class TechnicalRepository:
         """Get multiple technical accounts with pagination."""
         return self.db.query(TechnicalModel).offset(skip).limit(limit).all()
 
+    def get_multi_keyset(
+        self, cursor: Optional[str] = None, limit: int = 100, sort: Optional[str] = None
+    ) -> Tuple[List[TechnicalModel], Optional[str]]:
+        """Get technical accounts one keyset page at a time (see keyset_paginate)."""
+        return keyset_paginate(
+            self.db, select(TechnicalModel), TechnicalModel,
+            cursor=cursor, limit=limit, sort=sort, sortable_columns=("username", "name"),
+        )
+
     def create(self, tech_in: TechnicalCreate, hashed_password: str) -> TechnicalModel:
         """Creates a new Technical account."""
         try:
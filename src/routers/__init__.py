@@ -4,7 +4,8 @@ from .product_router import router as product_router
 from .category_router import router as category_router
 from .inventory_router import router as inventory_router
 from .service_router import router as service_router
+from .catalog_router import router as catalog_router
 
 # The __all__ list should contain the actual names being exposed.
 # When other files import `from src.routers import *`, they will get these names.
-__all__ = ["admin_router", "technical_router", "product_router", "category_router", "inventory_router", "service_router"]
\ No newline at end of file
+__all__ = ["admin_router", "technical_router", "product_router", "category_router", "inventory_router", "service_router", "catalog_router"]
\ No newline at end of file
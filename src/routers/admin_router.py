@@ -1,6 +1,6 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession # Use AsyncSession if your DB is async
-from typing import List
+from typing import List, Optional, Union
 from uuid import UUID # Correct type for IDs
 
 # --- Imports from your project ---
@@ -8,16 +8,22 @@ from uuid import UUID # Correct type for IDs
 from src.models.admin_model import AdminLogin, AdminCreate, AdminUpdate, AdminOut
 from src.schemas.auth import Token
 from src.models.technical_model import TechnicalCreate, TechnicalOut # Assuming you have a TechnicalOut
+from src.models.database_model import CacheStats, PasswordHashStats, PoolStatus
+from src.models.page_model import Page
 # Your Controller (Handles the business logic)
 from src.controller.admin_controller import AdminController
+from src.controller.technical_controller import TechnicalController
 # Your Repositories (Used for dependency injection)
 from src.repositories.admin_repositories import AdminRepository
 from src.repositories.technical_repositorie import TechnicalRepository
 # Database dependency
-from src.config.database import get_db # Assuming this function yields the session
+from src.config.database import get_db, default_db # Assuming this function yields the session
+from src.dependency.database import get_read_db
 from sqlalchemy.orm import Session
 # --- Security Dependencies ---
 from src.service.auth import create_access_token
+from src.service.catalog_cache import catalog_cache
+from src.service.password_hasher import password_hasher
 # Assuming a function to verify the current admin user from JWT
 from src.dependency.auth import get_current_admin_user 
 
@@ -53,8 +59,11 @@ def get_admin_controller(db:Session = Depends(get_db)):
 
 ## 1. Authentication Endpoints
 
+# Routes that query the database or hash passwords are plain `def`: they run
+# in the threadpool and bcrypt runs on the password hasher pool, so neither
+# blocks the event loop.
 @router.post("/login", response_model=Token, summary="Admin Login")
-async def login_admin(
+def login_admin(
     admin_in: AdminLogin,
     controller: AdminController = Depends(get_admin_controller)
 ):
@@ -87,7 +96,7 @@ async def read_admin_me(
 
 
 @router.post("/", response_model=AdminOut, status_code=status.HTTP_201_CREATED, summary="Create a new Admin")
-async def create_new_admin(
+def create_new_admin(
     admin_in: AdminCreate,
     controller: AdminController = Depends(get_admin_controller),
     # Optional: Ensure only a super-admin or existing admin can create others
@@ -98,7 +107,7 @@ async def create_new_admin(
 
 
 @router.put("/{admin_id}", response_model=AdminOut, summary="Update Admin Details")
-async def update_existing_admin(
+def update_existing_admin(
     admin_id: UUID, # Use UUID type for path parameter
     admin_in: AdminUpdate,
     controller: AdminController = Depends(get_admin_controller),
@@ -115,7 +124,7 @@ async def update_existing_admin(
 ## 3. Technical Account Provisioning Endpoint (Admin Function)
 
 @router.post("/technical", response_model=TechnicalOut, status_code=status.HTTP_201_CREATED, summary="Provision Technical Account")
-async def provision_technical_account(
+def provision_technical_account(
     tech_in: TechnicalCreate,
     controller: AdminController = Depends(get_admin_controller),
     # Authorization: Must be an authenticated Admin to create a technical account
@@ -125,4 +134,59 @@ async def provision_technical_account(
     Creates a new Technical staff account, checking for username/phone conflicts 
     across both Admin and Technical tables.
     """
-    return controller.create_technical_account(tech_in)
\ No newline at end of file
+    return controller.create_technical_account(tech_in)
+
+@router.get("/technical", response_model=Union[List[TechnicalOut], Page[TechnicalOut]], summary="List Technical Accounts")
+def list_technical_accounts(
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = Query(None, description="Keyset cursor; pass an empty value for the first page."),
+    sort: Optional[str] = Query(None, description="Sort column for cursor mode ('username' or 'name'), '-' prefix for descending."),
+    db: Session = Depends(get_read_db),
+    current_admin: AdminOut = Depends(get_current_admin_user)
+):
+    """
+    Lists technical staff accounts. With `cursor`, returns keyset pages
+    ({items, next_cursor}) that stay fast however deep the client pages.
+    """
+    controller = TechnicalController(tech_repo=TechnicalRepository(db))
+    try:
+        if cursor is not None:
+            items, next_cursor = controller.list_technical_users_page(cursor=cursor, limit=limit, sort=sort)
+            return {"items": items, "next_cursor": next_cursor}
+        return controller.list_technical_users(skip=skip, limit=limit)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+## 4. Operations (Admin Function)
+
+@router.get("/db/pool", response_model=PoolStatus, summary="Database Connection Pool Status")
+def read_pool_status(
+    current_admin: AdminOut = Depends(get_current_admin_user)
+):
+    """
+    Reports checked-out, idle and overflow connections of the primary pool,
+    plus checkout wait-time histogram and 'QueuePool limit reached' timeouts.
+    """
+    return default_db.pool_status()
+
+@router.get("/cache", response_model=CacheStats, summary="Catalog Cache Statistics")
+def read_cache_stats(
+    current_admin: AdminOut = Depends(get_current_admin_user)
+):
+    """
+    Backend, entries, hit/miss counters, evictions and write invalidations
+    of the catalog cache (counters are this worker's).
+    """
+    return catalog_cache.stats()
+
+@router.get("/password-hasher", response_model=PasswordHashStats, summary="Password Hashing Pool Statistics")
+def read_password_hasher_stats(
+    current_admin: AdminOut = Depends(get_current_admin_user)
+):
+    """
+    Workers, in-flight and rejected (503) calls, queue wait and bcrypt
+    hash/verify latency histograms of this worker's password hasher pool.
+    """
+    return password_hasher.stats()
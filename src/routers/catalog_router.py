@@ -0,0 +1,51 @@
+from fastapi import APIRouter, Depends, Query, Request, Response
+from sqlalchemy.orm import Session
+from typing import Optional
+
+from src.config.database import get_db
+from src.dependency.auth import get_current_user_admin_or_technical
+from src.dependency.http_cache import cache_control_for, etag_matches
+from src.service.catalog_snapshot import catalog_snapshot
+
+router = APIRouter(
+    prefix="/catalog",
+    tags=["Catalog"],
+)
+
+
+@router.get(
+    "/snapshot",
+    response_class=Response,
+    # same access as GET /service/available/, whose data it includes
+    dependencies=[Depends(get_current_user_admin_or_technical)],
+    responses={
+        200: {"content": {"application/json": {}}, "description": "`{version, built_at, categories, products, services}`"},
+        304: {"description": "The client's `version` (or If-None-Match) is still current."},
+    },
+)
+def get_catalog_snapshot(
+    request: Request,
+    version: Optional[int] = Query(None, description="Snapshot version the client already has."),
+    # primary session: a rebuild must not read a lagging replica; unused
+    # (no connection checked out) when the snapshot is current
+    db: Session = Depends(get_db),
+):
+    """All categories, products (with stock) and available services in one document.
+
+    Served from memory, gzip-compressed when the client accepts it. Send
+    the last `version` (or its ETag in If-None-Match) to get a 304 while
+    the catalog is unchanged.
+    """
+    blob = catalog_snapshot.current(db)
+    headers = {
+        "ETag": f'"{blob.version}"',
+        "X-Catalog-Version": str(blob.version),
+        "Cache-Control": cache_control_for("get_catalog_snapshot"),
+        "Vary": "Accept-Encoding",
+    }
+    if_none_match = request.headers.get("if-none-match")
+    if version == blob.version or (if_none_match is not None and etag_matches(if_none_match, headers["ETag"])):
+        return Response(status_code=304, headers=headers)
+    if "gzip" in request.headers.get("accept-encoding", "").lower():
+        return Response(blob.gzipped, media_type="application/json", headers={**headers, "Content-Encoding": "gzip"})
+    return Response(blob.body, media_type="application/json", headers=headers)
@@ -1,13 +1,17 @@
 
 # src/api/routes/categories.py
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional, Union
 
 from src.config.database import get_db
-from src.controller.category_controller import CategoryController  # fixed name
+from src.dependency.database import get_read_db, read_controller
+from src.controller.category_controller import AsyncCategoryController, CategoryController  # fixed name
 from src.models.category_model import CategoryCreate, CategoryResponse, CategoryUpdate  # use schemas, not models
 from src.dependency.auth import get_current_admin_user, get_optional_user
+from src.models.page_model import Page
+from src.dependency.http_cache import conditional_get
+from src.service.catalog_cache import CATEGORY
 
 router = APIRouter(
     prefix="/category",
@@ -18,6 +22,13 @@ router = APIRouter(
 def get_category_controller(db: Session = Depends(get_db)) -> CategoryController:
     return CategoryController(db)
 
+# Read-only routes: session may be bound to a read replica
+def get_category_read_controller(db: Session = Depends(get_read_db)) -> CategoryController:
+    return CategoryController(db)
+
+# Listings: AsyncCategoryController in async mode, else CategoryController in the threadpool
+get_category_reader = read_controller(CategoryController, AsyncCategoryController)
+
 
 @router.post(
     "/",
@@ -40,10 +51,11 @@ def create_category(
 @router.get(
     "/{category_id}",
     response_model=CategoryResponse,
+    dependencies=[Depends(conditional_get(CATEGORY))],
 )
 def get_category(
     category_id: int,
-    ctrl: CategoryController = Depends(get_category_controller),
+    ctrl: CategoryController = Depends(get_category_read_controller),
     current_user = Depends(get_optional_user) 
 ):
     try:
@@ -57,16 +69,22 @@ def get_category(
 
 @router.get(
     "/",
-    response_model=List[CategoryResponse],
+    response_model=Union[List[CategoryResponse], Page[CategoryResponse]],
+    dependencies=[Depends(conditional_get(CATEGORY))],
 )
-def list_categories(
+async def list_categories(
     skip: int = 0,
     limit: int = 100,
-    ctrl: CategoryController = Depends(get_category_controller),
+    cursor: Optional[str] = Query(None, description="Keyset cursor; pass an empty value for the first page."),
+    sort: Optional[str] = Query(None, description="Sort column for cursor mode, '-' prefix for descending."),
+    ctrl = Depends(get_category_reader),
     current_user = Depends(get_optional_user),
 ):
     try:
-        return ctrl.list_category(skip=skip, limit=limit)
+        if cursor is not None:
+            items, next_cursor = await ctrl.list_category_page(cursor=cursor, limit=limit, sort=sort)
+            return {"items": items, "next_cursor": next_cursor}
+        return await ctrl.list_category(skip=skip, limit=limit)
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
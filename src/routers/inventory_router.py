@@ -1,24 +1,85 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, WebSocket, WebSocketDisconnect, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
 from src.config.database import get_db
+from src.dependency.database import get_read_db, read_controller
 from src.controller.inventory_controller import InventoryController
-from src.repositories.inventory_repositories import InventoryRepository
-from src.models.inventory_model import InventoryOut, InventoryUpdate, InventorySnapshot
-from src.dependency.auth import get_current_user_admin_or_technical, get_current_admin_user
+from src.repositories.inventory_repositories import AsyncInventoryRepository, InventoryRepository
+from src.models.inventory_model import InventoryOut, InventoryUpdate, InventorySnapshot, LowStockAlert, StockMovementOut, StreamTicket
+from src.models.page_model import Page
+from src.dependency.auth import get_current_user_admin_or_technical, get_current_admin_user, actor_label, get_stream_user, issue_stream_ticket
+from src.dependency.http_cache import conditional_get
+from src.service.catalog_cache import INVENTORY, PRODUCT
+from src.service.inventory_events import inventory_events
+from src.config.settings import settings
 router = APIRouter(
     prefix="/inventory",
     tags=["Inventory Management"],
 )
 
+# Stock reads: AsyncInventoryRepository in async mode, else InventoryRepository in the threadpool
+get_inventory_reader = read_controller(InventoryRepository, AsyncInventoryRepository)
+
+# --- Live push: stock changes and reorder crossings ---
+# Both channels send the same JSON messages, {"type": "stock" | "low_stock", "data": {...}},
+# serialized once by the hub for all subscribers.
+@router.post("/stream/ticket", response_model=StreamTicket)
+def create_stream_ticket(current_user=Depends(get_current_user_admin_or_technical)):
+    """Short-lived ticket for `?ticket=` on the stream routes, so browsers
+    (EventSource, WebSocket) never put the access token in a URL."""
+    return {"ticket": issue_stream_ticket(current_user), "expires_in": settings.INVENTORY_STREAM_TICKET_SECONDS}
+
+@router.get("/stream", dependencies=[Depends(get_stream_user)])
+async def stream_inventory_events(request: Request):
+    """Server-Sent Events fallback for clients that cannot use the WebSocket."""
+    subscription = inventory_events.subscribe()
+    heartbeat = settings.INVENTORY_STREAM_HEARTBEAT_SECONDS
+
+    async def event_stream():
+        try:
+            yield "retry: 3000\n\n"
+            while not subscription.overflowed and not await request.is_disconnected():
+                message = await subscription.get(timeout=heartbeat)
+                yield f"data: {message}\n\n" if message is not None else ": ping\n\n"
+        finally:
+            inventory_events.unsubscribe(subscription)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.websocket("/ws")
+async def inventory_websocket(websocket: WebSocket):
+    """WebSocket channel; authenticate with a Bearer header or ?ticket=."""
+    try:
+        await run_in_threadpool(get_stream_user, websocket, websocket.query_params.get("ticket"))
+    except HTTPException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    await websocket.accept()
+    subscription = inventory_events.subscribe()
+    heartbeat = settings.INVENTORY_STREAM_HEARTBEAT_SECONDS
+    try:
+        while not subscription.overflowed:
+            message = await subscription.get(timeout=heartbeat)
+            await websocket.send_text(message if message is not None else '{"type": "ping"}')
+        await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        inventory_events.unsubscribe(subscription)
+
 @router.get("/{product_id}", 
             response_model=InventoryOut,
-            dependencies=[Depends(get_current_user_admin_or_technical)])
-def get_inventory_by_product(product_id: int, db: Session = Depends(get_db)):
+            dependencies=[Depends(get_current_user_admin_or_technical), Depends(conditional_get(INVENTORY))])
+async def get_inventory_by_product(product_id: int, repo = Depends(get_inventory_reader)):
     """Fetch the inventory details for a specific product."""
-    controller = InventoryRepository(db)
-    inventory = controller.get_by_product_id(product_id)
+    inventory = await repo.get_by_product_id(product_id)
     if not inventory:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, 
@@ -26,46 +87,82 @@ def get_inventory_by_product(product_id: int, db: Session = Depends(get_db)):
         )
     return inventory
 
+@router.get("/{product_id}/movements",
+            response_model=Page[StockMovementOut],
+            dependencies=[Depends(get_current_user_admin_or_technical), Depends(conditional_get(INVENTORY))])
+def get_stock_movements(
+    product_id: int,
+    cursor: Optional[str] = Query(None, description="Keyset cursor from the previous page's next_cursor."),
+    limit: int = Query(100, ge=1, le=500),
+    db: Session = Depends(get_read_db),
+):
+    """Stock ledger of a product (restocks, deductions, adjustments), newest first."""
+    controller = InventoryController(db)
+    try:
+        items, next_cursor = controller.movement_history(product_id, cursor=cursor, limit=limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"items": items, "next_cursor": next_cursor}
+
 @router.patch("/{product_id}/stock", 
-              response_model=InventoryOut,
-              dependencies=[Depends(get_current_admin_user)])
-def set_stock_level(product_id: int, update_data: InventoryUpdate, db: Session = Depends(get_db)):
+              response_model=InventoryOut)
+def set_stock_level(
+    product_id: int,
+    update_data: InventoryUpdate,
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_admin_user),
+):
     """Directly set the current stock level."""
     if update_data.current_stock is None:
         raise HTTPException(status_code=400, detail="current_stock is required for this operation")
     
     try:
         controller = InventoryController(db)
-        return controller.set_current_stock(product_id, update_data.current_stock)
+        return controller.set_current_stock(
+            product_id, update_data.current_stock, actor=actor_label(current_user)
+        )
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.post("/{product_id}/restock", 
-             response_model=InventoryOut,
-             dependencies=[Depends(get_current_admin_user)])
-def add_incoming_stock(product_id: int, quantity: float, db: Session = Depends(get_db)):
+             response_model=InventoryOut)
+def add_incoming_stock(
+    product_id: int,
+    quantity: float,
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_admin_user),
+):
     """Add to existing stock (e.g., after receiving a shipment)."""
     try:
         controller = InventoryController(db)
-        return controller.record_incoming_stock(product_id, quantity)
+        return controller.record_incoming_stock(product_id, quantity, actor=actor_label(current_user))
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.post("/{product_id}/deduct", 
-             response_model=InventoryOut,
-             dependencies=[Depends(get_current_user_admin_or_technical)])
-def deduct_stock_level(product_id: int, quantity: float, db: Session = Depends(get_db)):
+             response_model=InventoryOut)
+def deduct_stock_level(
+    product_id: int,
+    quantity: float,
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user_admin_or_technical),
+):
     """Deduct stock (e.g., after a sale or usage)."""
     try:
         controller = InventoryController(db)
-        return controller.process_stock_deduction(product_id, quantity)
+        return controller.process_stock_deduction(product_id, quantity, actor=actor_label(current_user))
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/alerts/low-stock", 
-            response_model=List[int],
-            dependencies=[Depends(get_current_user_admin_or_technical)])
-def get_low_stock_product_ids(db: Session = Depends(get_db)):
-    """Get a list of Product IDs where stock is at or below the minimum level."""
+            response_model=List[LowStockAlert],
+            dependencies=[Depends(get_current_user_admin_or_technical), Depends(conditional_get(INVENTORY, PRODUCT))])
+def get_low_stock_products(response: Response, db: Session = Depends(get_read_db)):
+    """Products whose stock is at or below the minimum level, largest shortfall first.
+
+    Streamed as it is read (a chunked JSON array), so long lists are never
+    built in memory; the session stays open until the body is sent.
+    """
     controller = InventoryController(db)
-    return controller.check_for_reorder()
\ No newline at end of file
+    # a returned response does not pick up the headers set by conditional_get
+    return StreamingResponse(controller.low_stock_alerts(), media_type="application/json", headers=dict(response.headers))
\ No newline at end of file
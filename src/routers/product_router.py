@@ -1,17 +1,27 @@
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Body, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Union
 
 from src.config.database import get_db
-from src.controller.product_controller import ProductController
-from src.models.product_model import ProductCreate, ProductUpdate , ProductResponse # ORM model (for response via orm_mode)
-from pydantic import BaseModel
-from src.dependency.auth import get_current_admin_user ,get_optional_user
+from src.dependency.database import get_read_db, read_controller
+from src.controller.product_controller import AsyncProductController, ProductController
+from src.models.product_model import ProductCreate, ProductUpdate , ProductResponse, ProductBulkResult # ORM model (for response via orm_mode)
+from pydantic import BaseModel, ValidationError
+from src.models.page_model import Page
+from src.dependency.auth import get_current_admin_user ,get_optional_user, actor_label
+from src.dependency.http_cache import conditional_get
+from src.service.catalog_cache import INVENTORY, PRODUCT
 router = APIRouter(
     prefix="/product", tags=["Product Management"]
 )
 
+# Upper bound on rows accepted by POST /product/bulk in one request
+BULK_MAX_ROWS = 50_000
+
+# Listings: AsyncProductController in async mode, else ProductController in the threadpool
+get_product_reader = read_controller(ProductController, AsyncProductController)
+
 # --- Routes ---
 
 @router.post("/", response_model= ProductResponse, 
@@ -33,11 +43,43 @@ def create_product(payload: ProductCreate, db: Session = Depends(get_db)):
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+@router.post("/bulk",
+             response_model=ProductBulkResult,
+             dependencies=[Depends(get_current_admin_user)],
+             )
+def create_products_bulk(
+    payload: List[Dict[str, Any]] = Body(..., max_length=BULK_MAX_ROWS),
+    db: Session = Depends(get_db),
+):
+    """Create many products (and their inventory) in one transaction.
+
+    Each row is validated like `POST /product/`; invalid rows are reported in
+    `errors` by index and the valid ones are still created.
+    """
+    rows, errors = [], []
+    for index, raw in enumerate(payload):
+        try:
+            rows.append((index, ProductCreate.model_validate(raw).model_dump()))
+        except ValidationError as e:
+            detail = "; ".join(
+                f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}" for err in e.errors()
+            )
+            errors.append({"index": index, "detail": detail})
+
+    svc = ProductController(db)
+    try:
+        created, rule_errors = svc.create_products_bulk(rows)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    errors = sorted(errors + rule_errors, key=lambda err: err["index"])
+    return {"created": created, "errors": errors}
+
 @router.get("/{product_id}", 
-            response_model= ProductResponse)
+            response_model= ProductResponse,
+            dependencies=[Depends(conditional_get(PRODUCT, INVENTORY))])
 def get_product(
     product_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user = Depends(get_optional_user)):
     svc = ProductController(db)
     product = svc.get_product(product_id)
@@ -45,37 +87,54 @@ def get_product(
         raise HTTPException(status_code=404, detail="Product not found")
     return product
 
-@router.get("/", response_model=List[ProductResponse])
-def list_products(
+@router.get("/", response_model=Union[List[ProductResponse], Page[ProductResponse]],
+            dependencies=[Depends(conditional_get(PRODUCT, INVENTORY))])
+async def list_products(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(None, description="Keyset cursor; pass an empty value for the first page."),
+    sort: Optional[str] = Query(None, description="Sort column for cursor mode, '-' prefix for descending."),
+    include: str = Query("category,inventory", description="Relations to embed (comma-separated): category, inventory. Excluded ones are returned as null."),
+    svc = Depends(get_product_reader),
     current_user = Depends(get_optional_user)
 ):
-    svc = ProductController(db)
     if current_user:
-        print(f"User {current_user.id} ({current_user.role}) is viewing products.")
+        print(f"User {actor_label(current_user)} ({current_user.role}) is viewing products.")
     else:
         print("A Guest is viewing products.")
-    return svc.list_product(skip=skip, limit=limit)
+    # Cursor mode returns a Page envelope; plain skip/limit keeps the old list response
+    try:
+        if cursor is not None:
+            items, next_cursor = await svc.list_product_page(cursor=cursor, limit=limit, sort=sort, include=include)
+            return {"items": items, "next_cursor": next_cursor}
+        return await svc.list_product(skip=skip, limit=limit, include=include)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/by-category/{category_id}", 
-            response_model=List[ProductResponse],
-            dependencies=[Depends(get_optional_user)]
+            response_model=Union[List[ProductResponse], Page[ProductResponse]],
+            dependencies=[Depends(get_optional_user), Depends(conditional_get(PRODUCT, INVENTORY))]
            )
-def list_products_by_category(
+async def list_products_by_category(
     category_id: int,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(None, description="Keyset cursor; pass an empty value for the first page."),
+    sort: Optional[str] = Query(None, description="Sort column for cursor mode, '-' prefix for descending."),
+    include: str = Query("category,inventory", description="Relations to embed (comma-separated): category, inventory. Excluded ones are returned as null."),
+    svc = Depends(get_product_reader),
     current_user = Depends(get_optional_user)
 ):
-    svc = ProductController(db)
     # Optional: Logic to see what categories are popular with guests vs admins
     # if current_user:
     #     print(f"User {current_user.id} is filtering by category {category_id}")
     try:
-        return svc.list_product_by_category(category_id, skip=skip, limit=limit)
+        if cursor is not None:
+            items, next_cursor = await svc.list_product_by_category_page(
+                category_id, cursor=cursor, limit=limit, sort=sort, include=include
+            )
+            return {"items": items, "next_cursor": next_cursor}
+        return await svc.list_product_by_category(category_id, skip=skip, limit=limit, include=include)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -1,17 +1,25 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional, Union
 
 from src.config.database import get_db
-from src.controller.service_controller import ServiceController
-from src.models.service_model import ServiceCreate, ServiceUpdate, ServiceResponse
-from src.dependency.auth import get_current_admin_user, get_current_user_admin_or_technical
+from src.dependency.database import get_read_db, read_controller
+from src.controller.service_controller import AsyncServiceController, ServiceController
+from src.models.service_model import ServiceCreate, ServiceUpdate, ServiceResponse, ServiceConsumption, ServiceCostRollup
+from src.models.page_model import Page
+from src.dependency.auth import get_current_admin_user, get_current_user_admin_or_technical, actor_label
+from src.dependency.http_cache import conditional_get
+from src.repositories.service_repositories import COST_ROLLUP_VIEW
+from src.service.catalog_cache import PRODUCT, SERVICE
 
 router = APIRouter(
     prefix="/service",
     tags=["Service Management"]
 )
 
+# Listings: AsyncServiceController in async mode, else ServiceController in the threadpool
+get_service_reader = read_controller(ServiceController, AsyncServiceController)
+
 
 @router.post(
     "/",
@@ -37,12 +45,25 @@ def create_service(payload: ServiceCreate, db: Session = Depends(get_db)):
         raise HTTPException(status_code=400, detail=str(e))
 
 
+@router.get(
+    "/cost-rollup",
+    response_model=List[ServiceCostRollup],
+    dependencies=[Depends(get_current_admin_user), Depends(conditional_get(SERVICE, PRODUCT, COST_ROLLUP_VIEW))],
+)
+def get_service_cost_rollup(
+    cached: bool = Query(False, description="Read the materialized rollup (refreshed on catalog changes) instead of computing it now."),
+    db: Session = Depends(get_read_db),
+):
+    """Material cost, margin and missing-cost flags of every service (Admin only)"""
+    return ServiceController(db).cost_rollup(cached=cached)
+
+
 @router.get(
     "/{service_id}",
     response_model=ServiceResponse,
-    dependencies=[Depends(get_current_user_admin_or_technical)],
+    dependencies=[Depends(get_current_user_admin_or_technical), Depends(conditional_get(SERVICE))],
 )
-def get_service(service_id: int, db: Session = Depends(get_db)):
+def get_service(service_id: int, db: Session = Depends(get_read_db)):
     """Get a service by ID"""
     svc = ServiceController(db)
     service = svc.get_service_with_associations(service_id)
@@ -53,32 +74,72 @@ def get_service(service_id: int, db: Session = Depends(get_db)):
 
 @router.get(
     "/",
-    response_model=List[ServiceResponse],
-    dependencies=[Depends(get_current_user_admin_or_technical)],
+    response_model=Union[List[ServiceResponse], Page[ServiceResponse]],
+    dependencies=[Depends(get_current_user_admin_or_technical), Depends(conditional_get(SERVICE))],
 )
-def list_services(
+async def list_services(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = Query(None, description="Keyset cursor; pass an empty value for the first page."),
+    sort: Optional[str] = Query(None, description="Sort column for cursor mode, '-' prefix for descending."),
+    svc = Depends(get_service_reader)
 ):
     """List all services with pagination"""
-    svc = ServiceController(db)
-    return svc.list_services_with_associations(skip=skip, limit=limit)
+    if cursor is not None:
+        try:
+            items, next_cursor = await svc.list_services_with_associations_page(cursor=cursor, limit=limit, sort=sort)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return {"items": items, "next_cursor": next_cursor}
+    return await svc.list_services_with_associations(skip=skip, limit=limit)
 
 
 @router.get(
     "/available/",
-    response_model=List[ServiceResponse],
-    dependencies=[Depends(get_current_user_admin_or_technical)],
+    response_model=Union[List[ServiceResponse], Page[ServiceResponse]],
+    dependencies=[Depends(get_current_user_admin_or_technical), Depends(conditional_get(SERVICE))],
 )
-def list_available_services(
+async def list_available_services(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = Query(None, description="Keyset cursor; pass an empty value for the first page."),
+    sort: Optional[str] = Query(None, description="Sort column for cursor mode, '-' prefix for descending."),
+    stock_aware: bool = Query(False, description="Only services whose required parts are in stock (from the availability index)."),
+    svc = Depends(get_service_reader)
 ):
     """List only available services"""
+    if cursor is not None:
+        try:
+            items, next_cursor = await svc.list_available_services_page(
+                cursor=cursor, limit=limit, sort=sort, stock_aware=stock_aware
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return {"items": items, "next_cursor": next_cursor}
+    return await svc.list_available_services(skip=skip, limit=limit, stock_aware=stock_aware)
+
+
+@router.post(
+    "/{service_id}/consume",
+    response_model=ServiceConsumption,
+)
+def consume_service(
+    service_id: int,
+    include_optional: bool = Query(False, description="Also deduct parts marked is_optional."),
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user_admin_or_technical),
+):
+    """Deduct every part of the service from inventory in one transaction (all or nothing)."""
     svc = ServiceController(db)
-    return svc.list_available_services(skip=skip, limit=limit)
+    try:
+        result = svc.consume_service(
+            service_id, include_optional=include_optional, actor=actor_label(current_user)
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if result is None:
+        raise HTTPException(status_code=404, detail="Service not found")
+    return result
 
 
 @router.put(
@@ -0,0 +1,22 @@
+from sqlalchemy import Column, BigInteger, String, DateTime, func
+from src.config.database import Base
+
+
+class CatalogVersion(Base):
+    """Change counter of one catalog namespace (category, product, service).
+
+    Bumped after every committed write to the namespace (see
+    BaseRepository.invalidate_cache). HTTP validators (ETag/Last-Modified)
+    are derived from these rows, so checking a client's If-None-Match is a
+    primary-key read instead of the route's query.
+    """
+    __tablename__ = "catalog_versions"
+
+    namespace = Column(String(50), primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0, server_default="0")
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    @property
+    def marker(self) -> str:
+        # the version alone repeats when the table is recreated
+        return f"{self.version}@{self.updated_at.timestamp()}"
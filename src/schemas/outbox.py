@@ -0,0 +1,44 @@
+from sqlalchemy import Column, BigInteger, Integer, String, Text, DateTime, Index, JSON, func
+from src.config.database import Base
+
+
+class OutboxEvent(Base):
+    """Transactional outbox: events written in the same transaction as the
+    change that caused them and delivered later by the notification
+    dispatcher (src/service/notifications.py).
+
+    `dispatched_at` is set once every sink accepted the event. Until then
+    `next_attempt_at` doubles as a lease (while a dispatcher holds the row)
+    and as the retry backoff after a failed delivery, and `delivered_sinks`
+    lists the sinks that already accepted it, so a retry only goes to the
+    ones that failed. An event still undelivered after the last attempt is
+    dead-lettered (`dead_lettered_at`) and kept for inspection; dispatched
+    events are purged after the retention period.
+    """
+    __tablename__ = "outbox_events"
+
+    event_id = Column(BigInteger, primary_key=True)
+    event_type = Column(String(50), nullable=False)
+    payload = Column(JSON, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    next_attempt_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    last_error = Column(Text, nullable=True)
+    dispatched_at = Column(DateTime(timezone=True), nullable=True)
+    delivered_sinks = Column(JSON, nullable=False, default=list, server_default="[]")
+    dead_lettered_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        # undelivered events, oldest due first
+        Index(
+            "ix_outbox_events_due",
+            "next_attempt_at",
+            postgresql_where=dispatched_at.is_(None) & dead_lettered_at.is_(None),
+        ),
+        # dispatched events, for the retention purge
+        Index(
+            "ix_outbox_events_dispatched",
+            "dispatched_at",
+            postgresql_where=dispatched_at.isnot(None),
+        ),
+    )
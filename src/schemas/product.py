@@ -1,5 +1,8 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Numeric, Boolean, Date, Text
-from sqlalchemy.orm import relationship
+from sqlalchemy import (
+    Column, Integer, BigInteger, String, ForeignKey, Numeric, Boolean, Date, DateTime, Text, Index,
+    func, select, false,
+)
+from sqlalchemy.orm import relationship, column_property
 from src.config.database import Base
 
 class Category(Base):
@@ -31,13 +34,104 @@ class Inventory(Base):
     __tablename__ = 'inventory'
 
     product_id = Column(Integer, ForeignKey('products.product_id'),primary_key=True)
-    current_stock = Column(Numeric(10,2), nullable=False, default=0)
+    # Stock as of the last compaction; the live value is `current_stock`
+    # (snapshot + not yet compacted StockMovement deltas, defined below).
+    stock_snapshot = Column("current_stock", Numeric(10,2), nullable=False, default=0)
     min_stock_level = Column(Numeric(10,2), nullable=True)
-    last_restock_data = Column(Date, nullable=True)
+    # Restock date entered with the product; later restocks are read from
+    # the ledger (`last_restock_data`, defined below), so a restock never
+    # writes this row
+    restock_date_recorded = Column("last_restock_data", Date, nullable=True)
 
     # relation
     product = relationship("Product",back_populates='inventory')
 
+    __table_args__ = (
+        # Only products with a reorder point can be low on stock. The
+        # low-stock query reads its candidate rows from this partial index;
+        # the stock comparison (snapshot plus pending movements) is still
+        # evaluated per candidate, the index cannot answer it
+        Index(
+            "ix_inventory_reorder_tracked",
+            "product_id",
+            postgresql_where=(min_stock_level.isnot(None)),
+        ),
+    )
+
+
+class StockMovement(Base):
+    """Append-only stock ledger: one row per restock, deduction or adjustment.
+
+    Movements are folded into Inventory.stock_snapshot by the compaction job
+    (src/service/stock_compaction.py), which flags them `compacted` but keeps
+    them as history.
+    """
+    __tablename__ = "stock_movements"
+
+    movement_id = Column(BigInteger, primary_key=True)
+    product_id = Column(
+        Integer, ForeignKey("inventory.product_id", ondelete="CASCADE"), nullable=False
+    )
+    delta = Column(Numeric(10, 2), nullable=False)
+    reason = Column(String(50), nullable=False)
+    actor = Column(String(100), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    compacted = Column(Boolean, nullable=False, default=False, server_default=false())
+
+    __table_args__ = (
+        # history of one product, newest first
+        Index("ix_stock_movements_product_id", "product_id", "movement_id"),
+        # pending deltas summed into current_stock
+        Index(
+            "ix_stock_movements_pending",
+            "product_id",
+            postgresql_where=(compacted.is_(False)),
+            postgresql_include=["delta"],
+        ),
+        # latest restock of a product (Inventory.last_restock_data)
+        Index(
+            "ix_stock_movements_restocks",
+            "product_id",
+            "movement_id",
+            postgresql_where=(reason == "restock"),
+        ),
+    )
+
+
+# Live stock = snapshot + pending deltas, evaluated in SQL so it can be
+# filtered and ordered on (see the low-stock query). Deferred: only loads that
+# serialize the stock undefer it (product_load_options, InventoryRepository
+# reads), so existence checks, locks and RETURNING updates skip the subquery.
+Inventory.current_stock = column_property(
+    Inventory.stock_snapshot
+    + func.coalesce(
+        select(func.sum(StockMovement.delta))
+        .where(
+            StockMovement.product_id == Inventory.product_id,
+            StockMovement.compacted.is_(False),
+        )
+        .correlate_except(StockMovement)
+        .scalar_subquery(),
+        0,
+    ),
+    deferred=True,
+)
+
+# Date of the latest restock movement, or the date recorded with the product
+# when it is later (GREATEST skips NULLs). Deferred like current_stock.
+Inventory.last_restock_data = column_property(
+    func.greatest(
+        Inventory.restock_date_recorded,
+        select(func.cast(StockMovement.created_at, Date))
+        .where(StockMovement.product_id == Inventory.product_id, StockMovement.reason == "restock")
+        .order_by(StockMovement.movement_id.desc())
+        .limit(1)
+        .correlate_except(StockMovement)
+        .scalar_subquery(),
+    ),
+    deferred=True,
+)
+
 
 class Service(Base):
     __tablename__ = "services"
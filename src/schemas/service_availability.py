@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, Boolean, DateTime, ForeignKey, func
+from src.config.database import Base
+
+
+class ServiceAvailability(Base):
+    """Whether a service can be performed with the stock on hand.
+
+    One row per service: `can_perform` is true when every non-optional part
+    has at least `quantity_required` in live stock. Maintained by
+    ServiceAvailabilityRepository after stock and bill-of-materials changes,
+    so GET /service/available/?stock_aware=true is a join on this table
+    instead of a per-request stock check.
+    """
+    __tablename__ = "service_availability"
+
+    service_id = Column(Integer, ForeignKey("services.service_id", ondelete="CASCADE"), primary_key=True)
+    can_perform = Column(Boolean, nullable=False)
+    # non-optional parts with less stock than required
+    short_parts = Column(Integer, nullable=False, default=0, server_default="0")
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
@@ -0,0 +1,408 @@
+# src/service/cache_backends.py
+import fcntl
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Tuple, Type
+
+from pydantic import BaseModel
+
+from src.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+# --- Value codec for the out-of-process backends ---
+# Cached values are JSON scalars, lists, tuples, dicts and registered
+# pydantic models. They are stored as tagged JSON rather than pickles: a
+# shared file or a cache server is not trusted to hand back bytes that are
+# safe to unpickle.
+_MODELS: Dict[str, Type[BaseModel]] = {}
+
+
+def register_model(model: Type[BaseModel]) -> Type[BaseModel]:
+    """Allow `model` instances in cached values (decoded by name)."""
+    _MODELS[model.__qualname__] = model
+    return model
+
+
+def _to_json(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        name = type(value).__qualname__
+        if _MODELS.get(name) is not type(value):
+            raise TypeError(f"{name} is not registered with the cache codec.")
+        return {"m": name, "v": value.model_dump(mode="json")}
+    if isinstance(value, tuple):
+        return {"t": [_to_json(item) for item in value]}
+    if isinstance(value, list):
+        return [_to_json(item) for item in value]
+    if isinstance(value, dict):
+        return {"d": {key: _to_json(item) for key, item in value.items()}}
+    return value
+
+
+def _from_json(value: Any) -> Any:
+    if isinstance(value, list):
+        return [_from_json(item) for item in value]
+    if isinstance(value, dict):
+        if "m" in value:
+            return _MODELS[value["m"]].model_validate(value["v"])
+        if "t" in value:
+            return tuple(_from_json(item) for item in value["t"])
+        return {key: _from_json(item) for key, item in value["d"].items()}
+    return value
+
+
+def encode_value(value: Any) -> bytes:
+    return json.dumps(_to_json(value), separators=(",", ":")).encode()
+
+
+def decode_value(payload: bytes) -> Any:
+    """Inverse of `encode_value`; raises ValueError/KeyError on foreign payloads."""
+    return _from_json(json.loads(payload))
+
+
+class CacheBackend(ABC):
+    """Key/value store behind the catalog cache.
+
+    Keys are strings, values are anything `encode_value` accepts, and
+    every entry has a TTL. Backends may drop entries at any time (eviction, restart), so the
+    cache must treat a missing key as a plain miss. `shared` backends are
+    seen by every worker process, so invalidating there is global; the
+    in-process one relies on the invalidation bus instead. `blocking`
+    backends do network IO, so async callers run them in the threadpool.
+    """
+    name = "backend"
+    shared = False
+    blocking = False
+
+    @abstractmethod
+    def get(self, key: str) -> Tuple[bool, Any]:
+        """(found, value); expired entries count as not found."""
+
+    def get_many(self, keys: List[str]) -> List[Tuple[bool, Any]]:
+        return [self.get(key) for key in keys]
+
+    @abstractmethod
+    def set(self, key: str, value: Any, ttl_seconds: float) -> None:
+        """Store `value` for `ttl_seconds`; may silently drop it (e.g. too large)."""
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Drop every entry."""
+
+    def stats(self) -> Dict[str, Any]:
+        """Occupancy figures: entries, max_entries, evictions (None when unknown)."""
+        return {"entries": None, "max_entries": None, "evictions": None}
+
+
+# --- In-process: bounded LRU dict (one copy per worker) ---
+class MemoryBackend(CacheBackend):
+    name = "memory"
+
+    def __init__(self, max_entries: int = 2048, clock=time.monotonic):
+        self.max_entries = max_entries
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self.evictions = 0
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+            if entry[0] <= self._clock():
+                del self._entries[key]
+                return False, None
+            self._entries.move_to_end(key)
+            return True, entry[1]
+
+    def set(self, key: str, value: Any, ttl_seconds: float) -> None:
+        with self._lock:
+            self._entries[key] = (self._clock() + ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"entries": len(self._entries), "max_entries": self.max_entries, "evictions": self.evictions}
+
+
+# --- Shared memory: fixed-size slots in an mmap'ed file (one host, no server) ---
+class SharedMemoryBackend(CacheBackend):
+    """Hash table of fixed-size slots in a file every worker maps.
+
+    A key hashes to a run of PROBE consecutive slots. A write takes the
+    slot already holding the key, else an empty or expired one, else the
+    one that expires first. Values larger than a slot are not cached.
+    Each slot starts with the key digest (16 bytes), the expiry (wall clock,
+    shared by all processes) and the payload length. Access is serialized
+    with a thread lock plus flock() on the file, which are held for the
+    copy in or out only; encoding happens outside them.
+
+    A missing file, or one with another layout, is never resized in place:
+    other processes may have it mapped, and shrinking a mapped file makes
+    their accesses fault (SIGBUS). A fresh file is built next to it and
+    renamed over it; processes still mapping the old one keep it until
+    they exit.
+    """
+    name = "shared_memory"
+    shared = True
+
+    MAGIC = b"CATCACHE2"  # 2: JSON payloads (was pickle)
+    FILE_HEADER = struct.Struct("<9sII")  # magic, slots, slot_bytes
+    SLOT_HEADER = struct.Struct("<16sdI")  # key digest, expires_at, payload length
+    PROBE = 4
+
+    def __init__(self, path: str, slots: int = 2048, slot_bytes: int = 65536):
+        if slot_bytes <= self.SLOT_HEADER.size:
+            raise ValueError("CATALOG_CACHE_SHM_SLOT_BYTES is too small.")
+        self.path = path
+        self.slots = slots
+        self.slot_bytes = slot_bytes
+        self.size = self.FILE_HEADER.size + slots * slot_bytes
+        self._lock = threading.Lock()
+        self._pid: Optional[int] = None
+        self._fd: Optional[int] = None
+        self._map: Optional[mmap.mmap] = None
+        self.evictions = 0
+        self.oversize = 0
+
+    def _open(self) -> None:
+        # opened lazily per process: a descriptor inherited over fork() would
+        # share its flock() with the parent and not exclude it
+        if self._pid == os.getpid():
+            return
+        expected = self.FILE_HEADER.pack(self.MAGIC, self.slots, self.slot_bytes)
+        while True:
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                stat = os.fstat(fd)
+                try:
+                    current = os.stat(self.path).st_ino == stat.st_ino
+                except FileNotFoundError:
+                    current = False
+                if current and stat.st_size == self.size and os.pread(fd, self.FILE_HEADER.size, 0) == expected:
+                    break
+                if current:
+                    # new file or another layout: swap in an empty one
+                    self._replace_file(expected)
+                # else another process replaced it while we waited for the lock
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+        self._fd = fd
+        self._map = mmap.mmap(fd, self.size)
+        self._pid = os.getpid()
+
+    def _replace_file(self, header: bytes) -> None:
+        directory, name = os.path.split(self.path)
+        fd, tmp_path = tempfile.mkstemp(prefix=f".{name}.", dir=directory or ".")
+        try:
+            os.fchmod(fd, 0o600)
+            os.ftruncate(fd, self.size)
+            os.pwrite(fd, header, 0)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        finally:
+            os.close(fd)
+
+    @contextmanager
+    def _locked(self):
+        with self._lock:
+            self._open()
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _slot_offsets(self, digest: bytes) -> List[int]:
+        start = int.from_bytes(digest[:8], "little") % self.slots
+        return [
+            self.FILE_HEADER.size + ((start + i) % self.slots) * self.slot_bytes
+            for i in range(min(self.PROBE, self.slots))
+        ]
+
+    @staticmethod
+    def _digest(key: str) -> bytes:
+        return hashlib.blake2b(key.encode(), digest_size=16).digest()
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        digest = self._digest(key)
+        payload = None
+        with self._locked():
+            now = time.time()
+            for offset in self._slot_offsets(digest):
+                slot_digest, expires_at, length = self.SLOT_HEADER.unpack_from(self._map, offset)
+                if slot_digest == digest and expires_at > now:
+                    start = offset + self.SLOT_HEADER.size
+                    payload = self._map[start:start + length]
+                    break
+        if payload is None:
+            return False, None
+        return True, decode_value(payload)
+
+    def set(self, key: str, value: Any, ttl_seconds: float) -> None:
+        payload = encode_value(value)
+        if len(payload) > self.slot_bytes - self.SLOT_HEADER.size:
+            self.oversize += 1
+            return
+        digest = self._digest(key)
+        with self._locked():
+            now = time.time()
+            target, target_expiry = None, None
+            for offset in self._slot_offsets(digest):
+                slot_digest, expires_at, _ = self.SLOT_HEADER.unpack_from(self._map, offset)
+                if slot_digest == digest or expires_at <= now:
+                    target, target_expiry = offset, None
+                    break
+                if target is None or expires_at < target_expiry:
+                    target, target_expiry = offset, expires_at
+            if target_expiry is not None:
+                self.evictions += 1
+            self.SLOT_HEADER.pack_into(self._map, target, digest, now + ttl_seconds, len(payload))
+            start = target + self.SLOT_HEADER.size
+            self._map[start:start + len(payload)] = payload
+
+    def clear(self) -> None:
+        empty = bytes(self.SLOT_HEADER.size)
+        with self._locked():
+            for i in range(self.slots):
+                offset = self.FILE_HEADER.size + i * self.slot_bytes
+                self._map[offset:offset + len(empty)] = empty
+
+    def stats(self) -> Dict[str, Any]:
+        with self._locked():
+            now = time.time()
+            entries = sum(
+                1 for i in range(self.slots)
+                if self.SLOT_HEADER.unpack_from(self._map, self.FILE_HEADER.size + i * self.slot_bytes)[1] > now
+            )
+        return {
+            "entries": entries,
+            "max_entries": self.slots,
+            "evictions": self.evictions,
+            "oversize": self.oversize,
+        }
+
+
+# --- Redis protocol (Redis, Valkey, KeyDB, ...) ---
+class RedisBackend(CacheBackend):
+    """Entries as `encode_value` JSON strings with a PX expiry, under `prefix`.
+
+    The server is a cache, not a dependency: when it is unreachable, reads
+    are misses and writes are dropped (logged), so requests fall through to
+    the database instead of failing. After a failure the server is not
+    tried again for `retry_seconds`, so an outage costs one timeout, not
+    one per cache operation.
+    """
+    name = "redis"
+    shared = True
+    blocking = True
+
+    def __init__(
+        self, url: str, prefix: str = "catalog:", socket_timeout: float = 0.5,
+        retry_seconds: float = 5.0, client=None,
+    ):
+        if client is None:
+            try:
+                import redis
+            except ImportError as e:
+                raise ValueError("CATALOG_CACHE_BACKEND=redis needs the 'redis' package.") from e
+            client = redis.Redis.from_url(url, socket_timeout=socket_timeout, socket_connect_timeout=socket_timeout)
+        self.client = client
+        self.prefix = prefix
+        self.retry_seconds = retry_seconds
+        self.errors = 0
+        self._down_until = 0.0
+
+    def _available(self) -> bool:
+        return time.monotonic() >= self._down_until
+
+    def _failed(self, operation: str, error: Exception) -> None:
+        self.errors += 1
+        self._down_until = time.monotonic() + self.retry_seconds
+        logger.warning("Catalog cache %s on redis failed, bypassing it for %.0fs: %s",
+                       operation, self.retry_seconds, error)
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        return self.get_many([key])[0]
+
+    def get_many(self, keys: List[str]) -> List[Tuple[bool, Any]]:
+        if not self._available():
+            return [(False, None)] * len(keys)
+        try:
+            payloads = self.client.mget([self.prefix + key for key in keys])
+        except Exception as e:
+            self._failed("read", e)
+            return [(False, None)] * len(keys)
+        results = []
+        for payload in payloads:
+            try:
+                results.append((False, None) if payload is None else (True, decode_value(payload)))
+            except (ValueError, KeyError, TypeError) as e:
+                # written by another version (or not by us): a miss, not an error
+                logger.warning("Ignoring undecodable catalog cache entry: %s", e)
+                results.append((False, None))
+        return results
+
+    def set(self, key: str, value: Any, ttl_seconds: float) -> None:
+        if not self._available():
+            return
+        payload = encode_value(value)
+        try:
+            self.client.set(self.prefix + key, payload, px=max(int(ttl_seconds * 1000), 1))
+        except Exception as e:
+            self._failed("write", e)
+
+    def clear(self) -> None:
+        try:
+            keys = list(self.client.scan_iter(match=self.prefix + "*", count=1000))
+            for i in range(0, len(keys), 1000):
+                self.client.delete(*keys[i:i + 1000])
+        except Exception as e:
+            self._failed("clear", e)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"entries": None, "max_entries": None, "evictions": None, "errors": self.errors}
+
+
+def default_shm_path() -> str:
+    base = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    return os.path.join(base, "fixing_service_catalog_cache")
+
+
+def build_backend() -> CacheBackend:
+    """Backend named by CATALOG_CACHE_BACKEND; raises ValueError for unknown names."""
+    name = settings.CATALOG_CACHE_BACKEND.strip().lower()
+    if name == "memory":
+        return MemoryBackend(max_entries=settings.CATALOG_CACHE_MAX_ENTRIES)
+    if name == "shared_memory":
+        return SharedMemoryBackend(
+            settings.CATALOG_CACHE_SHM_PATH or default_shm_path(),
+            slots=settings.CATALOG_CACHE_MAX_ENTRIES,
+            slot_bytes=settings.CATALOG_CACHE_SHM_SLOT_BYTES,
+        )
+    if name == "redis":
+        return RedisBackend(settings.CATALOG_CACHE_REDIS_URL, prefix=settings.CATALOG_CACHE_REDIS_PREFIX)
+    raise ValueError(f"Unknown catalog cache backend '{settings.CATALOG_CACHE_BACKEND}'.")
@@ -0,0 +1,75 @@
+# src/service/cache_invalidation.py
+import asyncio
+import logging
+
+from anyio import to_thread
+
+from src.config.database import engine
+from src.service.catalog_cache import CACHE_INVALIDATION_CHANNEL, catalog_cache
+from src.service.principal_cache import principal_cache
+from src.service.inventory_events import INVENTORY_EVENTS_CHANNEL, inventory_events
+
+logger = logging.getLogger(__name__)
+
+
+def _listen_connection():
+    """Dedicated autocommit DBAPI connection (outside the pool) listening on the channels."""
+    cargs, cparams = engine.dialect.create_connect_args(engine.url)
+    conn = engine.dialect.connect(*cargs, **cparams)
+    conn.autocommit = True
+    with conn.cursor() as cursor:
+        cursor.execute(f"LISTEN {CACHE_INVALIDATION_CHANNEL}")
+        cursor.execute(f"LISTEN {INVENTORY_EVENTS_CHANNEL}")
+    return conn
+
+
+async def run_invalidation_listener(reconnect_seconds: float = 5.0) -> None:
+    """Apply catalog invalidations published by other workers.
+
+    They evict the in-process cache backend and tell subscribers such as
+    the catalog snapshot what changed; account updates evict the principal
+    cache. The same connection relays other workers' live inventory events
+    to this worker's WebSocket/SSE clients. Runs on the event loop: the
+    connection's socket is watched with add_reader, so no thread is held
+    while idle (psycopg2 only). Messages sent while disconnected are lost,
+    so everything is treated as changed after every (re)connect. Cancel the
+    task to stop it.
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        conn = None
+        try:
+            conn = await to_thread.run_sync(_listen_connection)
+            if not hasattr(conn, "poll"):
+                logger.warning("Cross-worker cache invalidation needs the psycopg2 driver; "
+                               "other workers' writes reach this cache and the catalog snapshot only through their TTL")
+                return
+            catalog_cache.resync()
+            principal_cache.clear()
+            readable = asyncio.Event()
+            fd = conn.fileno()
+            loop.add_reader(fd, readable.set)
+            try:
+                while True:
+                    await readable.wait()
+                    readable.clear()
+                    conn.poll()
+                    while conn.notifies:
+                        notify = conn.notifies.pop(0)
+                        try:
+                            if notify.channel == INVENTORY_EVENTS_CHANNEL:
+                                inventory_events.apply_message(notify.payload)
+                            elif not principal_cache.apply_message(notify.payload):
+                                catalog_cache.apply_message(notify.payload)
+                        except (ValueError, KeyError):
+                            logger.warning("Ignoring malformed %s message %r", notify.channel, notify.payload)
+            finally:
+                loop.remove_reader(fd)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Catalog cache invalidation listener failed; reconnecting")
+            await asyncio.sleep(reconnect_seconds)
+        finally:
+            if conn is not None:
+                conn.close()
@@ -0,0 +1,335 @@
+# src/service/catalog_cache.py
+import functools
+import inspect
+import json
+import threading
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel
+
+from src.config.database import default_db
+from src.config.settings import settings
+from src.service.cache_backends import CacheBackend, build_backend, register_model
+
+# Namespaces, one per cached entity type
+CATEGORY = "category"
+PRODUCT = "product"
+SERVICE = "service"
+# Stock levels: versioned on their own so stock movements leave the ETags of
+# product-only responses (service costs, ...) alone
+INVENTORY = "inventory"
+
+# Postgres NOTIFY channel that carries invalidations between workers using
+# the in-process backend (see src/service/cache_invalidation.py)
+CACHE_INVALIDATION_CHANNEL = "catalog_cache_invalidation"
+
+# Responses that embed another entity must be dropped when that entity changes
+# (products embed their category; categories embed nothing).
+DEPENDENT_NAMESPACES: Dict[str, Tuple[str, ...]] = {
+    CATEGORY: (PRODUCT,),
+}
+
+# Responses that embed the entity with the same id, so only those entries
+# (and the lists) are dropped: products embed their inventory row.
+EMBEDDING_NAMESPACES: Dict[str, Tuple[str, ...]] = {
+    INVENTORY: (PRODUCT,),
+}
+
+
+def affected_namespaces(namespace: str) -> Tuple[str, ...]:
+    """The namespace plus the ones whose responses embed all of it.
+
+    These are the catalog versions a write bumps. Namespaces in
+    EMBEDDING_NAMESPACES are not among them: routes serving those
+    responses list the embedded namespace in their `conditional_get`.
+    """
+    return (namespace, *DEPENDENT_NAMESPACES.get(namespace, ()))
+
+
+class CatalogCache:
+    """Catalog reads cached in a pluggable CacheBackend, with write invalidation.
+
+    Entry keys embed generation tokens: one per namespace, one for the
+    namespace's lists and one per entity. `invalidate(namespace, *ids)`
+    rotates the tokens of those entities and of the lists (any list may
+    contain them), or the namespace token when no id is given. Entries
+    under old tokens are never read again and simply age out, so the same
+    scheme works on any backend, and on a shared backend one rotation
+    invalidates every worker at once.
+
+    `get_or_load` reads the tokens before loading: if a write rotates them
+    while the value loads, the value is stored under the old key and a
+    read that raced with the write cannot put stale data back. A token the
+    backend lost is recreated with a fresh random value, which drops the
+    entries made under it instead of resurrecting them.
+    """
+
+    TOKEN_TTL_SECONDS = 24 * 3600
+
+    def __init__(self, backend: CacheBackend, ttl_seconds: float = 30.0):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        # identifies this process on the invalidation bus (its own messages are skipped)
+        self.origin = uuid.uuid4().hex
+        self._lock = threading.Lock()
+        self._observed: Dict[str, Tuple[int, Hashable]] = {}
+        self._subscribers: List[Callable[[str, Tuple[Any, ...]], None]] = []
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    # --- tokens ---
+    @staticmethod
+    def _token_key(namespace: str, scope: Any) -> str:
+        return f"gen:{namespace}:{scope}"
+
+    def _tokens(self, keys: List[str]) -> List[str]:
+        tokens = []
+        for key, (found, token) in zip(keys, self.backend.get_many(keys)):
+            if not found:
+                token = uuid.uuid4().hex[:12]
+                self.backend.set(key, token, self.TOKEN_TTL_SECONDS)
+            tokens.append(token)
+        return tokens
+
+    def _rotate(self, keys: List[str]) -> None:
+        for key in keys:
+            self.backend.set(key, uuid.uuid4().hex[:12], self.TOKEN_TTL_SECONDS)
+
+    def _entry_key(self, namespace: str, key: str, entity_id: Any) -> str:
+        scope = "lists" if entity_id is None else f"id:{entity_id}"
+        ns_token, scope_token = self._tokens([
+            self._token_key(namespace, "all"), self._token_key(namespace, scope),
+        ])
+        return f"{namespace}:{ns_token}:{scope_token}:{key}"
+
+    # --- reads ---
+    def _lookup(self, namespace: str, key: str, entity_id: Any) -> Tuple[str, bool, Any]:
+        entry_key = self._entry_key(namespace, key, entity_id)
+        found, value = self.backend.get(entry_key)
+        with self._lock:
+            if found:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return entry_key, found, value
+
+    def get_or_load(self, namespace: str, key: str, loader: Callable[[], Any], entity_id: Any = None) -> Any:
+        entry_key, found, value = self._lookup(namespace, key, entity_id)
+        if found:
+            return value
+        value = loader()
+        self.backend.set(entry_key, value, self.ttl_seconds)
+        return value
+
+    async def get_or_load_async(
+        self, namespace: str, key: str, loader: Callable[[], Awaitable[Any]], entity_id: Any = None,
+    ) -> Any:
+        """`get_or_load` for coroutine loaders."""
+        entry_key, found, value = await self.offload(self._lookup, namespace, key, entity_id)
+        if found:
+            return value
+        value = await loader()
+        await self.offload(self.backend.set, entry_key, value, self.ttl_seconds)
+        return value
+
+    async def offload(self, function: Callable[..., Any], *args: Any) -> Any:
+        """Call a method touching the backend from async code: in the
+        threadpool for `blocking` (network) backends, inline otherwise."""
+        if self.backend.blocking:
+            return await run_in_threadpool(function, *args)
+        return function(*args)
+
+    # --- invalidation ---
+    def invalidate(self, namespace: str, *entity_ids: Any) -> None:
+        """Drop the entities' entries and the namespace's lists (the whole
+        namespace when no id is given); embedding namespaces are dropped whole.
+        Subscribers are told about it."""
+        self._rotate_tokens(namespace, entity_ids)
+        self._notify(namespace, entity_ids)
+
+    def _rotate_tokens(self, namespace: str, entity_ids: Tuple[Any, ...]) -> None:
+        keys = []
+        for ns in (namespace, *EMBEDDING_NAMESPACES.get(namespace, ())):
+            if entity_ids:
+                keys.append(self._token_key(ns, "lists"))
+                keys += [self._token_key(ns, f"id:{entity_id}") for entity_id in entity_ids]
+            else:
+                keys.append(self._token_key(ns, "all"))
+        keys += [self._token_key(ns, "all") for ns in DEPENDENT_NAMESPACES.get(namespace, ())]
+        self._rotate(keys)
+        with self._lock:
+            self.invalidations += 1
+
+    # --- subscribers (e.g. the catalog snapshot) ---
+    def subscribe(self, callback: Callable[[str, Tuple[Any, ...]], None]) -> None:
+        """Call `callback(namespace, entity_ids)` on every invalidation, local or
+        from another worker; empty ids mean the whole namespace."""
+        self._subscribers.append(callback)
+
+    def _notify(self, namespace: str, entity_ids: Tuple[Any, ...]) -> None:
+        for callback in self._subscribers:
+            callback(namespace, entity_ids)
+
+    def invalidation_message(self, namespace: str, entity_ids: Tuple[Any, ...]) -> str:
+        """Payload telling other workers about this invalidation.
+
+        Long id lists are sent as a whole-namespace invalidation (NOTIFY
+        payloads are limited to 8000 bytes).
+        """
+        message = json.dumps({"origin": self.origin, "namespace": namespace, "ids": list(entity_ids) or None}, default=str)
+        if len(message) > 7000:
+            message = json.dumps({"origin": self.origin, "namespace": namespace, "ids": None})
+        return message
+
+    def apply_message(self, message: str) -> None:
+        """Apply an invalidation published by another worker.
+
+        With a shared backend the tokens were already rotated by the writer;
+        only the subscribers still need to hear about it.
+        """
+        data = json.loads(message)
+        if data.get("origin") == self.origin:
+            return
+        namespace, entity_ids = data["namespace"], tuple(data.get("ids") or ())
+        if self.backend.shared:
+            self._notify(namespace, entity_ids)
+        else:
+            self.invalidate(namespace, *entity_ids)
+
+    def resync(self, namespaces: Tuple[str, ...] = (CATEGORY, PRODUCT, SERVICE, INVENTORY)) -> None:
+        """Treat everything as changed, after invalidation messages may have been lost."""
+        if not self.backend.shared:
+            self.backend.clear()
+        for namespace in namespaces:
+            self._notify(namespace, ())
+
+    def observe(self, namespace: str, version: int, marker: Hashable) -> None:
+        """Drop the namespace if its shared change marker moved since last seen.
+
+        The marker comes from the catalog_versions table, which every worker
+        bumps after its writes: a safety net for the in-process backend
+        should an invalidation message be missed. Shared backends do not
+        need it.
+        """
+        if self.backend.shared:
+            return
+        with self._lock:
+            seen = self._observed.get(namespace)
+            if seen is not None and seen[1] == marker:
+                return
+            self._observed[namespace] = (version, marker)
+        self._rotate_tokens(namespace, ())
+
+    def acknowledge(self, namespace: str, version: int, marker: Hashable) -> None:
+        """Record a bump made by this process's own write, which already
+        invalidated exactly the entities it touched, so that `observe` does
+        not drop the whole namespace for it. Only when it directly follows
+        the last observed version: a bump from another worker in between
+        must still be caught.
+        """
+        if self.backend.shared:
+            return
+        with self._lock:
+            seen = self._observed.get(namespace)
+            if seen is not None and seen[0] == version - 1:
+                self._observed[namespace] = (version, marker)
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            counters = {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else None,
+                "invalidations": self.invalidations,
+            }
+        return {
+            "enabled": settings.CATALOG_CACHE_ENABLED,
+            "backend": self.backend.name,
+            "ttl_seconds": self.ttl_seconds,
+            **self.backend.stats(),
+            **counters,
+        }
+
+
+catalog_cache = CatalogCache(build_backend(), ttl_seconds=settings.CATALOG_CACHE_TTL_SECONDS)
+
+
+def _snapshot(result: Any, response_model: type) -> Any:
+    """Copy ORM results into response models, detached from the session."""
+    if result is None or isinstance(result, BaseModel):
+        return result
+    if isinstance(result, tuple):  # (items, next_cursor) from *_page methods
+        items, next_cursor = result
+        return [response_model.model_validate(item) for item in items], next_cursor
+    if isinstance(result, list):
+        return [response_model.model_validate(item) for item in result]
+    return response_model.model_validate(result)
+
+
+def cached(namespace: str, response_model: type, entity_arg: Optional[str] = None):
+    """Cache a controller read method; results are returned as `response_model` instances.
+
+    The key is the method name plus its arguments. `entity_arg` names the
+    argument holding the entity id for single-entity reads, so that
+    `invalidate(namespace, id)` can target them.
+
+    With read replicas configured, misses are loaded by a controller of the
+    same class on a primary session instead of the caller's (replica)
+    session: the tokens read before the load may already be the ones a
+    write rotated to, and a lagging replica would store pre-write data
+    under them until the TTL.
+
+    Coroutine methods (the async controllers) are cached the same way, on
+    AsyncSessions. The key does not say which kind loaded it, so a sync and
+    an async method of the same name and arguments share their entries.
+    """
+    register_model(response_model)
+
+    def decorator(method):
+        signature = inspect.signature(method)
+
+        def cache_key(self, args, kwargs) -> Tuple[str, Any]:
+            bound = signature.bind(self, *args, **kwargs)
+            bound.apply_defaults()
+            arguments = tuple((name, value) for name, value in bound.arguments.items() if name != "self")
+            entity_id = bound.arguments.get(entity_arg) if entity_arg else None
+            return f"{method.__name__}:{arguments!r}", entity_id
+
+        if inspect.iscoroutinefunction(method):
+            @functools.wraps(method)
+            async def async_wrapper(self, *args, **kwargs):
+                if not settings.CATALOG_CACHE_ENABLED:
+                    return await method(self, *args, **kwargs)
+                key, entity_id = cache_key(self, args, kwargs)
+
+                async def load():
+                    if not default_db.AsyncReplicaSessionLocals:
+                        return _snapshot(await method(self, *args, **kwargs), response_model)
+                    async with default_db.AsyncSessionLocal() as db:
+                        return _snapshot(await method(type(self)(db), *args, **kwargs), response_model)
+
+                return await catalog_cache.get_or_load_async(namespace, key, load, entity_id=entity_id)
+            return async_wrapper
+
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            if not settings.CATALOG_CACHE_ENABLED:
+                return method(self, *args, **kwargs)
+            key, entity_id = cache_key(self, args, kwargs)
+
+            def load():
+                if not default_db.ReplicaSessionLocals:
+                    return _snapshot(method(self, *args, **kwargs), response_model)
+                with default_db.SessionLocal() as db:
+                    return _snapshot(method(type(self)(db), *args, **kwargs), response_model)
+
+            return catalog_cache.get_or_load(namespace, key, load, entity_id=entity_id)
+        return wrapper
+    return decorator
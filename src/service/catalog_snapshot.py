@@ -0,0 +1,162 @@
+# src/service/catalog_snapshot.py
+import gzip
+import hashlib
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy.orm import Session
+
+from src.config.settings import settings
+from src.models.category_model import CategoryResponse
+from src.models.product_model import ProductResponse
+from src.models.service_model import ServiceResponse
+from src.repositories.category_repositories import CategoryRepository
+from src.repositories.product_repositories import ProductRepository
+from src.repositories.service_repositories import ServiceRepository
+from src.service.catalog_cache import CATEGORY, INVENTORY, PRODUCT, SERVICE, catalog_cache
+
+# (namespace, key in the JSON document), in output order
+SECTIONS: Tuple[Tuple[str, str], ...] = ((CATEGORY, "categories"), (PRODUCT, "products"), (SERVICE, "services"))
+
+
+@dataclass(frozen=True)
+class SnapshotBlob:
+    version: int
+    body: bytes  # JSON document
+    gzipped: bytes
+    built_at: datetime
+
+
+class CatalogSnapshot:
+    """The whole storefront catalog as one pre-serialized, gzipped document.
+
+    Categories, products (with their inventory, without the embedded
+    category) and available services are kept as JSON fragments per entity.
+    Catalog invalidations, whether from this worker's writes or from other
+    workers over the invalidation bus, mark entities dirty. The next
+    request re-reads and re-serializes only those, then reassembles and
+    compresses the document. `version` is a hash of the content, so every
+    worker holding the same catalog reports the same version. The snapshot
+    is rebuilt in full when it gets older than `max_age_seconds`, as a
+    backstop for changes that never produced an invalidation.
+    """
+
+    def __init__(self, max_age_seconds: float = 300.0, compress_level: int = 6):
+        self.max_age_seconds = max_age_seconds
+        self.compress_level = compress_level
+        self._fragments: Dict[str, Dict[int, bytes]] = {ns: {} for ns, _ in SECTIONS}
+        # category of each product in the snapshot: deleting a category
+        # detaches its products without a product invalidation
+        self._product_category: Dict[int, Optional[int]] = {}
+        self._dirty_lock = threading.Lock()
+        self._dirty: Dict[str, Set[int]] = {ns: set() for ns, _ in SECTIONS}
+        self._dirty_all: Set[str] = {ns for ns, _ in SECTIONS}
+        self._build_lock = threading.Lock()
+        self._blob: Optional[SnapshotBlob] = None
+        self._built_at = 0.0  # monotonic
+        self.full_builds = 0
+        self.partial_builds = 0
+
+    def mark_dirty(self, namespace: str, entity_ids: Tuple[Any, ...]) -> None:
+        """catalog_cache subscriber; empty ids mean the whole namespace."""
+        if namespace == INVENTORY:  # products are served with their inventory
+            namespace = PRODUCT
+        if namespace not in self._dirty:
+            return
+        with self._dirty_lock:
+            if entity_ids:
+                self._dirty[namespace].update(int(entity_id) for entity_id in entity_ids)
+            else:
+                self._dirty_all.add(namespace)
+
+    def _fresh(self) -> bool:
+        if self._blob is None or time.monotonic() - self._built_at >= self.max_age_seconds:
+            return False
+        with self._dirty_lock:
+            return not self._dirty_all and not any(self._dirty.values())
+
+    def current(self, db: Session) -> SnapshotBlob:
+        """The up-to-date snapshot; applies pending changes first (read from `db`)."""
+        if self._fresh():
+            return self._blob
+        with self._build_lock:
+            if self._fresh():  # another request rebuilt it meanwhile
+                return self._blob
+            if self._blob is not None and time.monotonic() - self._built_at >= self.max_age_seconds:
+                self.mark_dirty(CATEGORY, ())
+                self.mark_dirty(PRODUCT, ())
+                self.mark_dirty(SERVICE, ())
+            # take the marks before reading: a write that lands after this
+            # marks again and is applied by the next request
+            with self._dirty_lock:
+                dirty_all, self._dirty_all = self._dirty_all, set()
+                dirty, self._dirty = self._dirty, {ns: set() for ns, _ in SECTIONS}
+            try:
+                self._apply(db, dirty_all, dirty)
+            except Exception:
+                with self._dirty_lock:
+                    self._dirty_all |= dirty_all
+                    for ns, ids in dirty.items():
+                        self._dirty[ns] |= ids
+                raise
+            if len(dirty_all) == len(SECTIONS):
+                self.full_builds += 1
+            else:
+                self.partial_builds += 1
+            self._blob = self._assemble()
+            self._built_at = time.monotonic()
+            return self._blob
+
+    def _apply(self, db: Session, dirty_all: Set[str], dirty: Dict[str, Set[int]]) -> None:
+        if dirty[CATEGORY] and PRODUCT not in dirty_all:
+            dirty[PRODUCT] |= {
+                product_id for product_id, category_id in self._product_category.items()
+                if category_id in dirty[CATEGORY]
+            }
+        loaders = {
+            CATEGORY: (CategoryRepository(db).list_for_snapshot, CategoryResponse, "categoryID", None),
+            PRODUCT: (ProductRepository(db).list_for_snapshot, ProductResponse, "product_id", {"category"}),
+            SERVICE: (ServiceRepository(db).list_available_for_snapshot, ServiceResponse, "service_id", None),
+        }
+        for namespace, (load, model, pk, exclude) in loaders.items():
+            fragments = self._fragments[namespace]
+            if namespace in dirty_all:
+                rows = load()
+                fragments.clear()
+                if namespace == PRODUCT:
+                    self._product_category.clear()
+            elif dirty[namespace]:
+                ids: List[int] = sorted(dirty[namespace])
+                rows = load(ids)
+                # deleted (or no longer available) entities are not returned
+                for entity_id in ids:
+                    fragments.pop(entity_id, None)
+                    if namespace == PRODUCT:
+                        self._product_category.pop(entity_id, None)
+            else:
+                continue
+            for row in rows:
+                entity_id = getattr(row, pk)
+                fragments[entity_id] = model.model_validate(row).model_dump_json(exclude=exclude).encode()
+                if namespace == PRODUCT:
+                    self._product_category[entity_id] = row.category_id
+
+    def _assemble(self) -> SnapshotBlob:
+        sections = []
+        for namespace, name in SECTIONS:
+            fragments = self._fragments[namespace]
+            items = b",".join(fragments[entity_id] for entity_id in sorted(fragments))
+            sections.append(b'"%s":[%s]' % (name.encode(), items))
+        content = b",".join(sections)
+        # 48 bits: still an exact integer in JavaScript clients
+        version = int.from_bytes(hashlib.blake2b(content, digest_size=6).digest(), "big")
+        built_at = datetime.now(timezone.utc)
+        body = b'{"version":%d,"built_at":"%s",%s}' % (version, built_at.isoformat().encode(), content)
+        return SnapshotBlob(version, body, gzip.compress(body, compresslevel=self.compress_level), built_at)
+
+
+catalog_snapshot = CatalogSnapshot(max_age_seconds=settings.CATALOG_SNAPSHOT_MAX_AGE_SECONDS)
+catalog_cache.subscribe(catalog_snapshot.mark_dirty)
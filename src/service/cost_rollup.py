@@ -0,0 +1,65 @@
+# src/service/cost_rollup.py
+import asyncio
+import logging
+from typing import Callable, Optional
+
+from anyio import to_thread
+
+from src.config.database import SessionLocal
+from src.config.settings import settings
+from src.repositories.service_repositories import ServiceRepository
+
+logger = logging.getLogger(__name__)
+
+
+class CostRollupRefresher:
+    """Debounced refresh of the service_cost_rollup materialized view.
+
+    Catalog writes call `request` (from threadpool threads) after their
+    commit instead of refreshing inside the request. The background task
+    waits `delay_seconds` after the first request, so a burst of writes
+    costs one REFRESH, and a request that arrives while a refresh is
+    running schedules another. When the task is not running (or the delay
+    is 0) `request` refreshes inline.
+    """
+
+    def __init__(self, session_factory: Callable = SessionLocal, delay_seconds: float = 2.0):
+        self.session_factory = session_factory
+        self.delay_seconds = delay_seconds
+        self._requested: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def request(self) -> None:
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            self._refresh()
+            return
+        try:
+            loop.call_soon_threadsafe(self._requested.set)
+        except RuntimeError:
+            # loop shut down between the check and the call
+            self._refresh()
+
+    def _refresh(self) -> bool:
+        with self.session_factory() as db:
+            return ServiceRepository(db).refresh_cost_rollup()
+
+    async def run(self) -> None:
+        """Background loop started on app startup; cancel the task to stop it."""
+        self._requested = asyncio.Event()
+        self._loop = asyncio.get_running_loop()
+        try:
+            while True:
+                await self._requested.wait()
+                await asyncio.sleep(self.delay_seconds)
+                self._requested.clear()
+                try:
+                    await to_thread.run_sync(self._refresh)
+                except Exception:
+                    logger.exception("Cost rollup refresh failed")
+        finally:
+            self._loop = None
+
+
+# Module-level refresher shared by the service and product controllers
+cost_rollup_refresher = CostRollupRefresher(delay_seconds=settings.COST_ROLLUP_REFRESH_DELAY_SECONDS)
@@ -0,0 +1,144 @@
+# src/service/inventory_events.py
+import asyncio
+import json
+import logging
+import uuid
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from src.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+STOCK_EVENT = "stock"
+# pg_notify channel carrying events to the other workers
+INVENTORY_EVENTS_CHANNEL = "inventory_events"
+
+
+class Subscription:
+    """One connected client: a bounded queue of already-serialized events."""
+
+    def __init__(self, max_queued: int):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queued)
+        self.overflowed = False
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[str]:
+        """Next event as a JSON string, or None when `timeout` expires first."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class InventoryEventHub:
+    """Fan-out of inventory changes to WebSocket/SSE clients.
+
+    `publish` is called by InventoryController (from threadpool threads)
+    after a commit. Each event is serialized once and the same string is
+    handed to every subscriber's queue on the event loop. A client that
+    falls `max_queued` events behind is marked overflowed and disconnected
+    rather than slowing the others down; it can reconnect and re-read the
+    current state over HTTP.
+
+    With `cross_worker`, published events are also sent with pg_notify on
+    INVENTORY_EVENTS_CHANNEL (by `publish`, or by the caller with
+    `notifications` in a transaction it commits anyway); the LISTEN task (src/service/cache_invalidation.py)
+    hands other workers' events to `apply_message`, so a client sees every
+    worker's changes whichever worker it is connected to.
+    """
+
+    def __init__(self, max_queued: int = 1000, cross_worker: bool = True):
+        self.max_queued = max_queued
+        self.cross_worker = cross_worker
+        self.origin = uuid.uuid4().hex
+        self._subscribers: Set[Subscription] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self) -> Subscription:
+        """Register a client; must be called from the event loop."""
+        self._loop = asyncio.get_running_loop()
+        subscription = Subscription(self.max_queued)
+        self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self._subscribers.discard(subscription)
+
+    def publish(self, events: List[Tuple[str, Dict[str, Any]]], db: Optional[Session] = None) -> None:
+        """Deliver (event_type, data) pairs; thread-safe, call after commit.
+
+        Local subscribers get them on the event loop. When `db` is given
+        (and cross-worker fan-out is on) they are also NOTIFYed to the other
+        workers, in one statement on that session.
+        """
+        if not events:
+            return
+        notify = db is not None and self.cross_worker
+        loop = self._loop
+        local = bool(self._subscribers) and loop is not None and not loop.is_closed()
+        if not (local or notify):
+            return
+        messages = [json.dumps({"type": event_type, "data": data}, default=str) for event_type, data in events]
+        if local:
+            try:
+                loop.call_soon_threadsafe(self._fan_out_all, messages)
+            except RuntimeError:
+                # loop shut down between the check and the call
+                pass
+        if notify:
+            self._notify(db, messages)
+
+    def notifications(self, events: List[Tuple[str, Dict[str, Any]]]) -> List[Tuple[str, str]]:
+        """(channel, payload) pairs that NOTIFY these events to the other
+        workers, for a caller sending them itself (then `publish` without
+        `db`); empty when cross-worker fan-out is off."""
+        if not self.cross_worker:
+            return []
+        return [
+            (INVENTORY_EVENTS_CHANNEL, self._envelope(json.dumps({"type": event_type, "data": data}, default=str)))
+            for event_type, data in events
+        ]
+
+    def _envelope(self, message: str) -> str:
+        return json.dumps({"origin": self.origin, "event": message})
+
+    def _notify(self, db: Session, messages: List[str]) -> None:
+        payloads = [self._envelope(message) for message in messages]
+        try:
+            db.execute(select(*(func.pg_notify(INVENTORY_EVENTS_CHANNEL, payload) for payload in payloads)))
+            db.commit()
+        except Exception:
+            db.rollback()
+            logger.exception("Could not send inventory events to the other workers")
+
+    def apply_message(self, message: str) -> None:
+        """Deliver an event NOTIFYed by another worker; called on the event loop."""
+        data = json.loads(message)
+        if data.get("origin") != self.origin and self._subscribers:
+            self._fan_out(data["event"])
+
+    def _fan_out_all(self, messages: List[str]) -> None:
+        for message in messages:
+            self._fan_out(message)
+
+    def _fan_out(self, message: str) -> None:
+        for subscription in list(self._subscribers):
+            try:
+                subscription.queue.put_nowait(message)
+            except asyncio.QueueFull:
+                subscription.overflowed = True
+                self._subscribers.discard(subscription)
+                logger.warning("Dropping inventory event subscriber that fell behind")
+
+
+# Module-level hub shared by the controller and the inventory router
+inventory_events = InventoryEventHub(
+    max_queued=settings.INVENTORY_STREAM_MAX_QUEUED,
+    cross_worker=settings.INVENTORY_STREAM_CROSS_WORKER,
+)
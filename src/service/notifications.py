@@ -0,0 +1,336 @@
+# src/service/notifications.py
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+from anyio import to_thread
+
+from src.config.database import SessionLocal
+from src.config.settings import settings
+from src.repositories.outbox_repositories import OutboxRepository
+from src.repositories.service_availability_repositories import (
+    AVAILABILITY_REFRESH_EVENT,
+    ServiceAvailabilityRepository,
+    merge_refreshes,
+)
+
+logger = logging.getLogger(__name__)
+
+LOW_STOCK_EVENT = "low_stock"
+
+
+def _event_dict(event) -> Dict[str, Any]:
+    return {
+        "event_id": event.event_id,
+        "event_type": event.event_type,
+        "payload": event.payload,
+        "created_at": event.created_at.isoformat() if event.created_at else None,
+    }
+
+
+def describe(event) -> str:
+    """One-line human readable text for an outbox event."""
+    if event.event_type == LOW_STOCK_EVENT:
+        return f"NOTIFICATION: Product {event.payload.get('product_id')} reached reorder level."
+    return f"NOTIFICATION: {event.event_type} {event.payload}"
+
+
+# --- Sinks: `send` raises to have the events retried (for this sink only) ---
+class NotificationSink(ABC):
+    name = "sink"
+
+    @abstractmethod
+    async def send(self, events: List[Any]) -> None:
+        """Deliver a batch of outbox events; raise to have them retried."""
+
+    async def aclose(self) -> None:
+        pass
+
+
+class LogSink(NotificationSink):
+    name = "log"
+
+    async def send(self, events: List[Any]) -> None:
+        for event in events:
+            logger.warning(describe(event))
+
+
+class WebhookSink(NotificationSink):
+    """POSTs `{"events": [...]}` to a URL; any non-2xx response is a failure.
+
+    Events carry their `event_id`, so receivers can drop the duplicates a
+    retried batch may produce.
+    """
+    name = "webhook"
+    stub: Optional["WebhookStub"] = None  # set when built for NOTIFICATION_WEBHOOK_URL=stub
+
+    def __init__(self, url: str, timeout: float = 5.0, client: Optional[httpx.AsyncClient] = None):
+        self.url = url
+        self.client = client or httpx.AsyncClient(timeout=timeout)
+
+    async def send(self, events: List[Any]) -> None:
+        response = await self.client.post(self.url, json={"events": [_event_dict(e) for e in events]})
+        response.raise_for_status()
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+
+class WebhookStub:
+    """Local stand-in for a webhook receiver (NOTIFICATION_WEBHOOK_URL=stub).
+
+    Plugs into httpx as a transport, so WebhookSink runs its real code path
+    while the requests are only kept in `received`.
+    """
+    url = "http://webhook.stub/notifications"
+
+    def __init__(self):
+        self.received: List[Dict[str, Any]] = []
+        self.transport = httpx.MockTransport(self._handle)
+
+    def _handle(self, request: httpx.Request) -> httpx.Response:
+        self.received.append(httpx.Response(200, content=request.content).json())
+        return httpx.Response(204)
+
+
+class EmailStubSink(NotificationSink):
+    """Stands in for an email provider: logs the mail it would send."""
+    name = "email"
+
+    def __init__(self, recipient: str):
+        self.recipient = recipient
+        self.sent: List[Dict[str, str]] = []
+
+    async def send(self, events: List[Any]) -> None:
+        body = "\n".join(describe(event) for event in events)
+        subject = f"{len(events)} inventory notification(s)"
+        self.sent.append({"to": self.recipient, "subject": subject, "body": body})
+        logger.info("Email to %s: %s\n%s", self.recipient, subject, body)
+
+
+def build_sinks() -> List[NotificationSink]:
+    """Sinks named in NOTIFICATION_SINKS; raises ValueError for unknown names."""
+    sinks: List[NotificationSink] = []
+    for name in settings.notification_sinks:
+        if name == "log":
+            sinks.append(LogSink())
+        elif name == "webhook":
+            url = settings.NOTIFICATION_WEBHOOK_URL
+            if not url:
+                raise ValueError("NOTIFICATION_WEBHOOK_URL is required for the webhook sink.")
+            if url == "stub":
+                stub = WebhookStub()
+                sink = WebhookSink(stub.url, client=httpx.AsyncClient(transport=stub.transport))
+                sink.stub = stub
+                sinks.append(sink)
+            else:
+                sinks.append(WebhookSink(url, timeout=settings.NOTIFICATION_WEBHOOK_TIMEOUT_SECONDS))
+        elif name == "email":
+            if not settings.NOTIFICATION_EMAIL_TO:
+                raise ValueError("NOTIFICATION_EMAIL_TO is required for the email sink.")
+            sinks.append(EmailStubSink(settings.NOTIFICATION_EMAIL_TO))
+        else:
+            raise ValueError(f"Unknown notification sink '{name}'.")
+    return sinks
+
+
+def _refresh_availability(db, payload: Dict[str, Any]) -> None:
+    ServiceAvailabilityRepository(db).apply_event(payload)
+
+
+# --- Dispatcher ---
+class OutboxDispatcher:
+    """Delivers outbox events to the sinks, in batches, off the request path.
+
+    Event types listed in `handlers` are internal work queued through the
+    outbox (e.g. availability refreshes): they are run by their handler,
+    ``handler(db, payload)``, instead of being sent to the sinks, and are
+    retried and dead-lettered the same way. For types listed in `coalesce`
+    the events of one batch are merged, ``coalesce[type](payloads)``, and
+    the handler runs once for all of them; they succeed or fail together.
+
+    Each batch is leased from the table (see OutboxRepository.claim_batch)
+    and sent to every sink that has not accepted it yet. Events every sink
+    accepted are marked dispatched; the rest remember which sinks succeeded
+    and are retried, for the failed sinks only, with exponential backoff up
+    to `max_attempts`, so delivery is at least once per sink. Events still
+    undelivered after that are dead-lettered and logged. Dispatched events
+    older than `retention_seconds` are purged.
+    """
+
+    # how often stale leases are dead-lettered and old events purged
+    housekeeping_interval = 60.0
+
+    def __init__(
+        self,
+        sinks: List[NotificationSink],
+        session_factory: Callable = SessionLocal,
+        batch_size: int = 100,
+        poll_interval: float = 1.0,
+        max_attempts: int = 8,
+        retry_base_seconds: float = 2.0,
+        lease_seconds: float = 60.0,
+        retention_seconds: float = 7 * 24 * 3600,
+        handlers: Optional[Dict[str, Callable[[Any, Dict[str, Any]], Any]]] = None,
+        coalesce: Optional[Dict[str, Callable[[List[Dict[str, Any]]], Dict[str, Any]]]] = None,
+    ):
+        self.sinks = sinks
+        self.handlers = handlers or {}
+        self.coalesce = coalesce or {}
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+        self.lease_seconds = lease_seconds
+        self.retention_seconds = retention_seconds
+
+    @classmethod
+    def from_settings(cls) -> "OutboxDispatcher":
+        return cls(
+            build_sinks(),
+            batch_size=settings.OUTBOX_BATCH_SIZE,
+            poll_interval=settings.OUTBOX_POLL_INTERVAL_SECONDS,
+            max_attempts=settings.OUTBOX_MAX_ATTEMPTS,
+            retry_base_seconds=settings.OUTBOX_RETRY_BASE_SECONDS,
+            lease_seconds=settings.OUTBOX_LEASE_SECONDS,
+            retention_seconds=settings.OUTBOX_RETENTION_HOURS * 3600,
+            handlers={AVAILABILITY_REFRESH_EVENT: _refresh_availability},
+            coalesce={AVAILABILITY_REFRESH_EVENT: merge_refreshes},
+        )
+
+    def _claim(self) -> list:
+        with self.session_factory() as db:
+            return OutboxRepository(db).claim_batch(self.batch_size, self.lease_seconds, self.max_attempts)
+
+    def _handle(self, event_type: str, payloads: List[Dict[str, Any]]) -> None:
+        if event_type in self.coalesce:
+            payloads = [self.coalesce[event_type](payloads)]
+        with self.session_factory() as db:
+            for payload in payloads:
+                self.handlers[event_type](db, payload)
+
+    def _handler_groups(self, events: list) -> List[list]:
+        # coalesced types form one group per type, the others one group per event
+        groups: Dict[Any, list] = {}
+        for event in events:
+            if event.event_type in self.handlers:
+                key = event.event_type if event.event_type in self.coalesce else event.event_id
+                groups.setdefault(key, []).append(event)
+        return list(groups.values())
+
+    def _mark_dispatched(self, event_ids: List[int]) -> None:
+        with self.session_factory() as db:
+            OutboxRepository(db).mark_dispatched(event_ids)
+
+    def _mark_failed(self, failures: List[Dict[str, Any]]) -> None:
+        with self.session_factory() as db:
+            OutboxRepository(db).mark_failed(failures)
+
+    def _dead_letter(self) -> int:
+        with self.session_factory() as db:
+            rows = OutboxRepository(db).dead_letter(self.max_attempts)
+        for row in rows:
+            logger.error(
+                "Outbox event %d (%s) dead-lettered after %d attempts: %s",
+                row.event_id, row.event_type, row.attempts, row.last_error,
+            )
+        return len(rows)
+
+    def _purge(self) -> int:
+        if self.retention_seconds <= 0:
+            return 0
+        older_than = datetime.now(timezone.utc) - timedelta(seconds=self.retention_seconds)
+        with self.session_factory() as db:
+            return OutboxRepository(db).purge_dispatched(older_than)
+
+    def _housekeeping(self) -> None:
+        self._dead_letter()
+        purged = self._purge()
+        if purged:
+            logger.info("Purged %d dispatched outbox events", purged)
+
+    def _retry_in(self, attempts: int) -> float:
+        # the last attempt is not rescheduled: it is dead-lettered right away
+        if attempts >= self.max_attempts:
+            return 0.0
+        return self.retry_base_seconds * 2 ** (attempts - 1)
+
+    async def run_once(self) -> int:
+        """Claim and deliver one batch; returns the number of events claimed."""
+        events = await to_thread.run_sync(self._claim)
+        if not events:
+            return 0
+        delivered = {event.event_id: list(event.delivered_sinks or []) for event in events}
+        errors: Dict[int, List[str]] = {}
+        for group in self._handler_groups(events):
+            event_type = group[0].event_type
+            try:
+                await to_thread.run_sync(self._handle, event_type, [event.payload for event in group])
+            except Exception as e:
+                for event in group:
+                    logger.warning(
+                        "Outbox %s event %d failed (attempt %d/%d): %s",
+                        event_type, event.event_id, event.attempts, self.max_attempts, e,
+                    )
+                    errors[event.event_id] = [f"{event_type}: {e!r}"]
+        for sink in self.sinks:
+            pending = [
+                event for event in events
+                if event.event_type not in self.handlers and sink.name not in delivered[event.event_id]
+            ]
+            if not pending:
+                continue
+            try:
+                await sink.send(pending)
+            except Exception as e:
+                logger.warning(
+                    "Outbox delivery of %d event(s) via %s failed (attempt %d/%d): %s",
+                    len(pending), sink.name, max(event.attempts for event in pending), self.max_attempts, e,
+                )
+                for event in pending:
+                    errors.setdefault(event.event_id, []).append(f"{sink.name}: {e!r}")
+            else:
+                for event in pending:
+                    delivered[event.event_id].append(sink.name)
+
+        done = [event.event_id for event in events if event.event_id not in errors]
+        failures = [
+            {
+                "event_id": event.event_id,
+                "last_error": "; ".join(errors[event.event_id]),
+                "delivered_sinks": delivered[event.event_id],
+                "retry_in_seconds": self._retry_in(event.attempts),
+            }
+            for event in events
+            if event.event_id in errors
+        ]
+        await to_thread.run_sync(self._mark_dispatched, done)
+        await to_thread.run_sync(self._mark_failed, failures)
+        if any(event.attempts >= self.max_attempts for event in events if event.event_id in errors):
+            await to_thread.run_sync(self._dead_letter)
+        return len(events)
+
+    async def run(self) -> None:
+        """Background loop started on app startup; cancel the task to stop it."""
+        loop = asyncio.get_running_loop()
+        next_housekeeping = loop.time()
+        try:
+            while True:
+                try:
+                    if loop.time() >= next_housekeeping:
+                        next_housekeeping = loop.time() + self.housekeeping_interval
+                        await to_thread.run_sync(self._housekeeping)
+                    claimed = await self.run_once()
+                except Exception:
+                    logger.exception("Outbox dispatcher iteration failed")
+                    claimed = 0
+                # a full batch means there is probably more waiting
+                if claimed < self.batch_size:
+                    await asyncio.sleep(self.poll_interval)
+        finally:
+            for sink in self.sinks:
+                await sink.aclose()
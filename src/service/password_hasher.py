@@ -0,0 +1,140 @@
+# src/service/password_hasher.py
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from src.config.settings import settings
+from src.utils.hash_password import hash_password as _bcrypt_hash
+from src.utils.verify_password import verify_password as _bcrypt_verify
+
+# Upper bounds (milliseconds) of the latency histogram buckets.
+LATENCY_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class PasswordHasherBusy(RuntimeError):
+    """More password hashes requested than the pool accepts; retry later (HTTP 503)."""
+
+
+class LatencyHistogram:
+    """Thread-safe count/sum/max and cumulative histogram of durations."""
+
+    def __init__(self, buckets_ms: tuple = LATENCY_BUCKETS_MS):
+        self._lock = threading.Lock()
+        self.buckets_ms = buckets_ms
+        # one extra slot for durations above the largest bucket (+Inf)
+        self._bucket_counts = [0] * (len(buckets_ms) + 1)
+        self.count = 0
+        self.sum_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, seconds: float) -> None:
+        ms = seconds * 1000
+        with self._lock:
+            self.count += 1
+            self.sum_ms += ms
+            self.max_ms = max(self.max_ms, ms)
+            for i, bound in enumerate(self.buckets_ms):
+                if ms <= bound:
+                    self._bucket_counts[i] += 1
+                    break
+            else:
+                self._bucket_counts[-1] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            histogram: List[Dict[str, Any]] = []
+            running = 0
+            for bound, count in zip(list(self.buckets_ms) + ["+Inf"], self._bucket_counts):
+                running += count
+                histogram.append({"le": str(bound), "count": running})
+            return {
+                "count": self.count,
+                "sum_ms": round(self.sum_ms, 3),
+                "max_ms": round(self.max_ms, 3),
+                "histogram": histogram,
+            }
+
+
+class PasswordHasher:
+    """bcrypt hashing and verification on a bounded pool of worker threads.
+
+    bcrypt releases the GIL, so `workers` threads use up to that many cores
+    while the event loop and the request threadpool keep running. At most
+    `max_queued` calls wait for a free worker; beyond that a call raises
+    PasswordHasherBusy at once instead of queueing without bound. Callers
+    are sync routes in the request threadpool and block on the result.
+    """
+
+    def __init__(self, workers: int, max_queued: int = 32):
+        self.workers = workers
+        self.max_queued = max_queued
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._in_flight = 0
+        self.rejected = 0
+        self.queue_wait = LatencyHistogram()
+        self.latency = {"hash": LatencyHistogram(), "verify": LatencyHistogram()}
+
+    def _submit(self, operation: str, fn: Callable[..., Any], *args: Any) -> Future:
+        with self._lock:
+            if self._in_flight >= self.workers + self.max_queued:
+                self.rejected += 1
+                raise PasswordHasherBusy("Too many password operations in progress.")
+            self._in_flight += 1
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="bcrypt")
+            executor = self._executor
+        submitted = time.perf_counter()
+
+        def run():
+            started = time.perf_counter()
+            self.queue_wait.observe(started - submitted)
+            try:
+                return fn(*args)
+            finally:
+                self.latency[operation].observe(time.perf_counter() - started)
+
+        try:
+            future = executor.submit(run)
+        except RuntimeError:  # shut down
+            self._done(None)
+            raise
+        future.add_done_callback(self._done)
+        return future
+
+    def _done(self, _future: Optional[Future]) -> None:
+        with self._lock:
+            self._in_flight -= 1
+
+    def hash_password(self, password: str) -> str:
+        return self._submit("hash", _bcrypt_hash, password).result()
+
+    def verify_password(self, plain_password: str, hashed_password: str) -> bool:
+        return self._submit("verify", _bcrypt_verify, plain_password, hashed_password).result()
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            in_flight, rejected = self._in_flight, self.rejected
+        return {
+            "workers": self.workers,
+            "max_queued": self.max_queued,
+            "in_flight": in_flight,
+            "rejected_total": rejected,
+            "queue_wait": self.queue_wait.snapshot(),
+            "hash": self.latency["hash"].snapshot(),
+            "verify": self.latency["verify"].snapshot(),
+        }
+
+
+password_hasher = PasswordHasher(
+    workers=settings.PASSWORD_HASH_WORKERS or os.cpu_count() or 1,
+    max_queued=settings.PASSWORD_HASH_MAX_QUEUED,
+)
@@ -0,0 +1,106 @@
+# src/service/principal_cache.py
+import json
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from src.config.settings import settings
+from src.service.catalog_cache import CACHE_INVALIDATION_CHANNEL
+
+logger = logging.getLogger(__name__)
+
+# (role claim, subject, iat claim)
+PrincipalKey = Tuple[str, str, Any]
+
+
+class PrincipalCache:
+    """Resolved AdminOut/TechnicalOut per access token, for the auth dependencies.
+
+    Entries are keyed by the token's role, subject and `iat`, and live for
+    `ttl_seconds` at most. Account writes call `invalidate(subject)`, which
+    drops every entry of that subject in this worker and, given a session,
+    tells the other workers over the cache invalidation channel.
+    `get_or_load` remembers the invalidation count before loading, so a
+    lookup that raced with a write does not store the old account.
+    """
+
+    def __init__(self, max_entries: int = 4096, ttl_seconds: float = 60.0, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self.origin = uuid.uuid4().hex
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[PrincipalKey, Tuple[float, Any]]" = OrderedDict()
+        self._invalidations = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_load(self, key: PrincipalKey, loader: Callable[[], Optional[Any]]) -> Optional[Any]:
+        """Cached principal for `key`, else `loader()`; None results are not cached."""
+        if not settings.PRINCIPAL_CACHE_ENABLED:
+            return loader()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > self._clock():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            seen = self._invalidations
+        principal = loader()
+        if principal is None:
+            return None
+        with self._lock:
+            if self._invalidations == seen:
+                self._entries[key] = (self._clock() + self.ttl_seconds, principal)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return principal
+
+    def invalidate(self, subject: Any, db: Optional[Session] = None) -> None:
+        """Drop the subject's entries here, and in the other workers when `db` is given."""
+        self._drop(str(subject))
+        if db is not None:
+            self._publish(db, str(subject))
+
+    def _drop(self, subject: str) -> None:
+        with self._lock:
+            self._invalidations += 1
+            for key in [key for key in self._entries if key[1] == subject]:
+                del self._entries[key]
+
+    def _publish(self, db: Session, subject: str) -> None:
+        message = json.dumps({"origin": self.origin, "principal": subject})
+        try:
+            db.execute(select(func.pg_notify(CACHE_INVALIDATION_CHANNEL, message)))
+            db.commit()
+        except Exception:
+            db.rollback()
+            logger.exception("Could not publish principal invalidation for %s", subject)
+
+    def apply_message(self, message: str) -> bool:
+        """Apply a principal invalidation from another worker; False if `message` is not one."""
+        data = json.loads(message)
+        if "principal" not in data:
+            return False
+        if data.get("origin") != self.origin:
+            self._drop(str(data["principal"]))
+        return True
+
+    def clear(self) -> None:
+        with self._lock:
+            self._invalidations += 1
+            self._entries.clear()
+
+
+principal_cache = PrincipalCache(
+    max_entries=settings.PRINCIPAL_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+)
@@ -0,0 +1,65 @@
+# src/service/stock_compaction.py
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+
+from anyio import to_thread
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from src.config.database import SessionLocal
+from src.config.settings import settings
+from src.repositories.stock_movement_repositories import StockMovementRepository
+from src.schemas.product import Inventory
+
+logger = logging.getLogger(__name__)
+
+
+def compact_stock_movements(db: Session, min_age_seconds: float, batch_size: int = 500) -> int:
+    """Fold settled stock movements into the inventory snapshots.
+
+    Works through the pending products in batches of `batch_size`, one
+    short transaction per batch. The inventory rows are locked (in
+    product_id order, like deductions) so a deduction never sees a
+    half-applied fold. Movements are flagged, not deleted, so the history
+    endpoint keeps them. Returns the number of inventory rows updated.
+    """
+    movements = StockMovementRepository(db)
+    older_than = datetime.now(timezone.utc) - timedelta(seconds=min_age_seconds)
+    folded = 0
+    while True:
+        product_ids = movements.pending_product_ids(older_than, limit=batch_size)
+        if not product_ids:
+            return folded
+        try:
+            lock = (
+                select(Inventory.product_id)
+                .where(Inventory.product_id.in_(product_ids))
+                .order_by(Inventory.product_id)
+                .with_for_update(key_share=True)
+            )
+            db.execute(lock).all()
+            folded += movements.fold_into_snapshot(product_ids, older_than)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        if len(product_ids) < batch_size:
+            return folded
+
+
+def _compact_once() -> int:
+    with SessionLocal() as db:
+        return compact_stock_movements(db, settings.STOCK_COMPACTION_MIN_AGE_SECONDS)
+
+
+async def run_stock_compaction(interval_seconds: float) -> None:
+    """Background loop started on app startup; cancel the task to stop it."""
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            folded = await to_thread.run_sync(_compact_once)
+            if folded:
+                logger.info("Compacted stock movements of %d products", folded)
+        except Exception:
+            logger.exception("Stock movement compaction failed")
@@ -4,15 +4,19 @@ import pytest
 from starlette.testclient import TestClient
 from src.app.app import app # Import your main FastAPI app instance
 from src.config.database import Base, engine, SessionLocal, get_db
+from src.repositories.service_repositories import create_cost_rollup_view, drop_cost_rollup_view
 from sqlalchemy.orm import sessionmaker
 
 # 1. Create a clean, isolated database for testing
 @pytest.fixture(scope="session")
 def db_engine():
     # This fixture yields the database engine bound to the test database
+    drop_cost_rollup_view(engine)  # the materialized view depends on the tables
     Base.metadata.drop_all(bind=engine)  # Clean previous test tables (optional but recommended)
     Base.metadata.create_all(bind=engine) # Create all tables needed for tests
+    create_cost_rollup_view(engine)
     yield engine
+    drop_cost_rollup_view(engine)
     Base.metadata.drop_all(bind=engine)  # Teardown: Drop all tables after testing
 
 # 2. Create a test session fixture
@@ -62,9 +66,14 @@ def setup_test_admin(db_engine):
     db = SessionLocal()
     try:
         from src.repositories import AdminRepository
+        from src.app.app import DEFAULT_ADMIN_USERNAME, DEFAULT_ADMIN_PASSWORD
         repo = AdminRepository(db)
-        # You need a method in your repository to create the default user.
-        # repo.create_default_admin_for_tests() 
+        # Same default admin init_db creates (module-level TestClients skip startup)
+        repo.create_default_admin(
+            username=DEFAULT_ADMIN_USERNAME,
+            password=DEFAULT_ADMIN_PASSWORD,
+            email_phone="default@service.com",
+        )
         db.commit()
     except Exception as e:
         db.rollback()
@@ -0,0 +1,211 @@
+import asyncio
+import json
+import os
+import subprocess
+import sys
+from decimal import Decimal
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+
+from src.app.app import app, DEFAULT_ADMIN_USERNAME, DEFAULT_ADMIN_PASSWORD
+from src.config.database import Database, SessionLocal
+from src.controller.product_controller import AsyncProductController, ProductController
+from src.repositories import (
+    AsyncInventoryRepository,
+    AsyncProductRepository,
+    AsyncServiceRepository,
+    ProductRepository,
+)
+from src.repositories.service_repositories import AVAILABILITY_REFRESH_EVENT
+from src.schemas.outbox import OutboxEvent
+from src.service.catalog_cache import catalog_cache
+
+client = TestClient(app)
+ADMIN_AUTH_TOKEN = None
+CATEGORY_ID = None
+PRODUCT_IDS = []
+
+
+# --- UTILITY FUNCTIONS ---
+def get_admin_auth_header():
+    """Returns the Authorization header dictionary for the default admin."""
+    if ADMIN_AUTH_TOKEN is None:
+        raise ValueError("ADMIN_AUTH_TOKEN is not set. Run the admin login test first.")
+    return {"Authorization": f"Bearer {ADMIN_AUTH_TOKEN}"}
+
+
+def run(scenario):
+    """Run `scenario(session)` on an AsyncSession of a fresh async engine
+    (asyncpg connections belong to the event loop that opened them)."""
+    async def main():
+        db = Database(async_enabled=True, replica_urls=[])
+        try:
+            async with db.AsyncSessionLocal() as session:
+                return await scenario(session)
+        finally:
+            await db.dispose()
+    return asyncio.run(main())
+
+
+# Routes pick the async controllers when the app is imported with
+# DB_ASYNC_ENABLED=true, so they are exercised in a separate interpreter,
+# on one event loop and without the startup tasks.
+ASYNC_APP_SCRIPT = """
+import asyncio, json, sys
+import httpx
+from src.app.app import app
+from src.config.database import default_db
+
+async def main():
+    transport = httpx.ASGITransport(app=app)
+    results = {"async_enabled": default_db.async_enabled}
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        for url in sys.argv[1:]:
+            checkouts = default_db.engine.pool.metrics.checkouts
+            response = await client.get(url)
+            not_modified = await client.get(url, headers={"If-None-Match": response.headers["ETag"]})
+            results[url] = {
+                "status": response.status_code,
+                "body": response.json(),
+                "not_modified": not_modified.status_code,
+                "sync_checkouts": default_db.engine.pool.metrics.checkouts - checkouts,
+            }
+    await default_db.dispose()
+    print(json.dumps(results))
+
+asyncio.run(main())
+"""
+
+
+# =========================================================================
+# 1. ASYNC REPOSITORIES
+# =========================================================================
+
+def test_1_setup_catalog():
+    """Log in and create a category with three stocked products."""
+    global ADMIN_AUTH_TOKEN, CATEGORY_ID, PRODUCT_IDS
+    response = client.post(
+        "/admin/login",
+        json={"username": DEFAULT_ADMIN_USERNAME, "password": DEFAULT_ADMIN_PASSWORD},
+    )
+    assert response.status_code == 200
+    ADMIN_AUTH_TOKEN = response.json()["access_token"]
+
+    CATEGORY_ID = client.post("/category/", json={"name": "async-category"}, headers=get_admin_auth_header()).json()["categoryID"]
+    rows = [
+        {"name": f"async-product-{i}", "selling_price": 3 + i, "category_id": CATEGORY_ID, "initial_stock": 10}
+        for i in range(3)
+    ]
+    response = client.post("/product/bulk", json=rows, headers=get_admin_auth_header())
+    PRODUCT_IDS = [product["product_id"] for product in response.json()["created"]]
+
+
+def test_2_reads_match_the_sync_repositories():
+    """Keyset pages (and their cursors) and category listings are the same as
+    the sync repository's, with the embedded stock loaded."""
+    with SessionLocal() as db:
+        expected = ProductRepository(db).list_by_category_keyset(CATEGORY_ID, limit=2, sort="-selling_price")
+        expected_ids = [p.product_id for p in expected[0]]
+
+    async def scenario(db):
+        repo = AsyncProductRepository(db)
+        items, next_cursor = await repo.list_by_category_keyset(CATEGORY_ID, limit=2, sort="-selling_price")
+        rest, _ = await repo.list_by_category_keyset(CATEGORY_ID, cursor=next_cursor, limit=2, sort="-selling_price")
+        listed = await repo.list_by_category(CATEGORY_ID)
+        return [p.product_id for p in items], next_cursor, [p.product_id for p in rest], listed
+
+    ids, next_cursor, rest, listed = run(scenario)
+    assert (ids, next_cursor) == (expected_ids, expected[1])
+    assert rest == [PRODUCT_IDS[0]]
+    assert [p.product_id for p in listed] == PRODUCT_IDS
+    assert listed[0].inventory.current_stock == 10
+
+
+def test_3_controllers_share_cache_entries():
+    """A listing cached by the sync controller is a hit for the async one."""
+    with SessionLocal() as db:
+        expected = ProductController(db).list_product_by_category(CATEGORY_ID)
+    hits = catalog_cache.hits
+    listed = run(lambda db: AsyncProductController(db).list_product_by_category(CATEGORY_ID))
+    assert listed == expected
+    assert catalog_cache.hits == hits + 1
+
+
+# =========================================================================
+# 2. ASYNC WRITES
+# =========================================================================
+
+def test_4_writes_invalidate_the_cache_and_bump_versions():
+    """An async update is visible to the next (cached, conditional) read."""
+    url = f"/product/by-category/{CATEGORY_ID}"
+    before = client.get(url)
+    assert before.status_code == 200
+
+    renamed = run(lambda db: AsyncProductRepository(db).update(PRODUCT_IDS[0], name="async-product-renamed"))
+    assert renamed.name == "async-product-renamed"
+    assert renamed.inventory.current_stock == 10
+
+    response = client.get(url, headers={"If-None-Match": before.headers["ETag"]})
+    assert response.status_code == 200
+    assert response.json()[0]["name"] == "async-product-renamed"
+
+
+def test_5_service_writes_queue_the_availability_refresh():
+    """Creating a service queues its availability refresh in the same
+    transaction, for the outbox dispatcher."""
+    async def scenario(db):
+        return await AsyncServiceRepository(db).create(
+            name="async-service", image_url="http://img", price=Decimal("20"), duration_minutes=30,
+            associations=[{"product_id": PRODUCT_IDS[1], "quantity_required": 2}],
+        )
+
+    service = run(scenario)
+    assert [a.product_id for a in service.associations] == [PRODUCT_IDS[1]]
+    with SessionLocal() as db:
+        queued = db.execute(
+            select(OutboxEvent).where(OutboxEvent.event_type == AVAILABILITY_REFRESH_EVENT)
+        ).scalars().all()
+    assert any(event.payload["service_ids"] == [service.service_id] for event in queued)
+
+    names = [s["name"] for s in client.get("/service/", headers=get_admin_auth_header()).json()]
+    assert "async-service" in names
+
+
+def test_6_stock_is_not_written_directly():
+    """Stock goes through the ledger: the async repository refuses it, and
+    other fields come back with the live stock loaded."""
+    async def scenario(db):
+        repo = AsyncInventoryRepository(db)
+        with pytest.raises(ValueError):
+            await repo.update_inventory_fields(PRODUCT_IDS[2], current_stock=99)
+        return await repo.update_inventory_fields(PRODUCT_IDS[2], min_stock_level=4)
+
+    inventory = run(scenario)
+    assert (inventory.current_stock, inventory.min_stock_level) == (10, 4)
+
+
+# =========================================================================
+# 3. ROUTES IN ASYNC MODE
+# =========================================================================
+
+def test_7_hot_routes_read_on_the_async_engine():
+    """With DB_ASYNC_ENABLED the listings answer (and validate ETags) on the
+    async engine without checking out a sync connection."""
+    urls = [f"/product/by-category/{CATEGORY_ID}", "/product/?cursor=", "/category/"]
+    completed = subprocess.run(
+        [sys.executable, "-c", ASYNC_APP_SCRIPT, *urls],
+        env={**os.environ, "DB_ASYNC_ENABLED": "true"},
+        capture_output=True, text=True, timeout=120,
+    )
+    assert completed.returncode == 0, completed.stderr
+    results = json.loads(completed.stdout.strip().splitlines()[-1])
+    assert results["async_enabled"]
+    for url in urls:
+        assert results[url]["status"] == 200
+        assert results[url]["not_modified"] == 304
+        assert results[url]["sync_checkouts"] == 0
+    listed = results[urls[0]]["body"]
+    assert [p["product_id"] for p in listed] == PRODUCT_IDS
+    assert listed[0]["inventory"]["current_stock"] == 10
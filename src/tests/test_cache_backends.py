@@ -0,0 +1,154 @@
+import os
+import pickle
+
+import fakeredis
+import pytest
+
+from src.models.product_model import ProductResponse
+from src.service.cache_backends import (
+    MemoryBackend,
+    RedisBackend,
+    SharedMemoryBackend,
+    decode_value,
+    encode_value,
+    register_model,
+)
+from src.service.catalog_cache import PRODUCT, CatalogCache
+
+register_model(ProductResponse)
+
+
+class DownRedis:
+    """Redis client whose server is unreachable."""
+    calls = 0
+
+    def mget(self, keys):
+        DownRedis.calls += 1
+        raise ConnectionError("connection refused")
+
+    def set(self, *args, **kwargs):
+        DownRedis.calls += 1
+        raise ConnectionError("connection refused")
+
+
+def product(product_id):
+    return ProductResponse.model_validate({
+        "product_id": product_id, "name": f"backend-{product_id}", "selling_price": "3.50",
+        "unit_cost": None, "category_id": None, "category": None, "inventory": None,
+    })
+
+
+# =========================================================================
+# 1. VALUE CODEC
+# =========================================================================
+
+def test_1_codec_round_trip():
+    """Models, tuples, lists and dicts survive encoding as JSON."""
+    value = ([product(1), product(2)], "next-cursor", {"total": 2})
+    assert decode_value(encode_value(value)) == value
+    assert isinstance(decode_value(encode_value(value))[0][0], ProductResponse)
+
+
+def test_2_unregistered_models_are_refused():
+    """Only models registered with the codec can be cached."""
+    from pydantic import BaseModel
+
+    class Unregistered(BaseModel):
+        x: int
+
+    with pytest.raises(TypeError):
+        encode_value(Unregistered(x=1))
+
+
+# =========================================================================
+# 2. SHARED MEMORY
+# =========================================================================
+
+def test_3_workers_share_entries_and_invalidations(tmp_path):
+    """Two caches on the same file (two workers) see each other's entries, and
+    an invalidation in one is a miss in the other."""
+    path = str(tmp_path / "catalog")
+    first = CatalogCache(SharedMemoryBackend(path, slots=64, slot_bytes=4096), ttl_seconds=60)
+    second = CatalogCache(SharedMemoryBackend(path, slots=64, slot_bytes=4096), ttl_seconds=60)
+    loads = []
+
+    def read(cache):
+        return cache.get_or_load(PRODUCT, "get:1", lambda: loads.append(cache) or product(1), entity_id=1)
+
+    assert read(first) == read(second) == product(1)
+    assert loads == [first]
+
+    first.invalidate(PRODUCT, 1)
+    read(second)
+    assert loads == [first, second]
+
+
+def test_4_layout_change_replaces_the_file(tmp_path):
+    """A backend with another layout swaps in a fresh file instead of resizing
+    the one other processes have mapped; their mapping stays readable."""
+    path = str(tmp_path / "catalog")
+    old = SharedMemoryBackend(path, slots=8, slot_bytes=1024)
+    old.set("key", "value", 60)
+    old_inode = os.stat(path).st_ino
+
+    new = SharedMemoryBackend(path, slots=16, slot_bytes=1024)
+    assert new.get("key") == (False, None)
+    assert os.stat(path).st_ino != old_inode
+    assert os.path.getsize(path) == new.size
+    assert old.get("key") == (True, "value")
+
+
+def test_5_oversize_values_are_skipped(tmp_path):
+    """Values larger than a slot are not cached."""
+    backend = SharedMemoryBackend(str(tmp_path / "catalog"), slots=8, slot_bytes=128)
+    backend.set("key", "x" * 500, 60)
+    assert backend.get("key") == (False, None)
+    assert backend.oversize == 1
+
+
+# =========================================================================
+# 3. REDIS
+# =========================================================================
+
+def test_6_redis_round_trip_and_foreign_payloads():
+    """Entries round-trip through the server; pickles (or anything else not
+    written by the codec) are read as misses."""
+    server = fakeredis.FakeRedis()
+    backend = RedisBackend("redis://unused", client=server)
+    backend.set("key", [product(1)], 60)
+    assert backend.get("key") == (True, [product(1)])
+    assert server.pttl("catalog:key") > 0
+
+    server.set("catalog:pickled", pickle.dumps({"x": 1}))
+    assert backend.get("pickled") == (False, None)
+
+
+def test_7_unreachable_redis_is_bypassed():
+    """With the server down reads are misses and writes are dropped, and it is
+    not retried until retry_seconds have passed."""
+    DownRedis.calls = 0
+    cache = CatalogCache(RedisBackend("redis://unused", client=DownRedis(), retry_seconds=60), ttl_seconds=60)
+    assert cache.get_or_load(PRODUCT, "list", lambda: "loaded") == "loaded"
+    assert cache.get_or_load(PRODUCT, "list", lambda: "loaded") == "loaded"
+    assert DownRedis.calls == 1
+    assert cache.backend.errors == 1
+
+
+def test_8_in_process_backends_apply_peer_messages():
+    """Without a shared backend, another worker's invalidation message drops the
+    entry here; a process ignores its own messages."""
+    here = CatalogCache(MemoryBackend(), ttl_seconds=60)
+    peer = CatalogCache(MemoryBackend(), ttl_seconds=60)
+    loads = []
+
+    def read():
+        return here.get_or_load(PRODUCT, "get:1", lambda: loads.append(1), entity_id=1)
+
+    read()
+    here.apply_message(here.invalidation_message(PRODUCT, (1,)))
+    read()
+    assert len(loads) == 1
+
+    here.apply_message(peer.invalidation_message(PRODUCT, (1,)))
+    read()
+    assert len(loads) == 2
@@ -0,0 +1,151 @@
+from fastapi.testclient import TestClient
+
+from src.app.app import app, DEFAULT_ADMIN_USERNAME, DEFAULT_ADMIN_PASSWORD
+from src.service.cache_backends import MemoryBackend
+from src.service.catalog_cache import CATEGORY, PRODUCT, CatalogCache, catalog_cache
+
+client = TestClient(app)
+ADMIN_AUTH_TOKEN = None
+PRODUCT_IDS = []
+
+
+# --- UTILITY FUNCTION ---
+def get_admin_auth_header():
+    """Returns the Authorization header dictionary for the default admin."""
+    if ADMIN_AUTH_TOKEN is None:
+        raise ValueError("ADMIN_AUTH_TOKEN is not set. Run the admin login test first.")
+    return {"Authorization": f"Bearer {ADMIN_AUTH_TOKEN}"}
+
+
+def counters():
+    return catalog_cache.hits, catalog_cache.misses
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+# =========================================================================
+# 1. CACHED CONTROLLER READS
+# =========================================================================
+
+def test_1_setup_catalog():
+    """Log in and create a category with two products."""
+    global ADMIN_AUTH_TOKEN
+    response = client.post(
+        "/admin/login",
+        json={"username": DEFAULT_ADMIN_USERNAME, "password": DEFAULT_ADMIN_PASSWORD},
+    )
+    assert response.status_code == 200
+    ADMIN_AUTH_TOKEN = response.json()["access_token"]
+
+    category_id = client.post("/category/", json={"name": "cache-category"}, headers=get_admin_auth_header()).json()["categoryID"]
+    rows = [{"name": f"cache-{i}", "selling_price": 3, "category_id": category_id, "initial_stock": 5} for i in range(2)]
+    response = client.post("/product/bulk", json=rows, headers=get_admin_auth_header())
+    PRODUCT_IDS.extend(p["product_id"] for p in response.json()["created"])
+
+
+def test_2_repeated_read_is_a_hit():
+    """The first read of a product loads it, the second is served from the cache."""
+    hits, misses = counters()
+    first = client.get(f"/product/{PRODUCT_IDS[0]}")
+    assert counters() == (hits, misses + 1)
+    second = client.get(f"/product/{PRODUCT_IDS[0]}")
+    assert counters() == (hits + 1, misses + 1)
+    assert first.json() == second.json()
+
+
+def test_3_write_invalidates_the_entry():
+    """After an update the next read misses and returns the new data; other
+    products' entries survive."""
+    client.get(f"/product/{PRODUCT_IDS[1]}")
+    response = client.put(f"/product/{PRODUCT_IDS[0]}", json={"name": "cache-renamed"}, headers=get_admin_auth_header())
+    assert response.status_code == 200
+
+    hits, misses = counters()
+    response = client.get(f"/product/{PRODUCT_IDS[0]}")
+    assert counters() == (hits, misses + 1)
+    assert response.json()["name"] == "cache-renamed"
+
+    client.get(f"/product/{PRODUCT_IDS[1]}")
+    assert counters() == (hits + 1, misses + 1)
+
+
+def test_4_stats_endpoint():
+    """GET /admin/cache reports the counters."""
+    response = client.get("/admin/cache", headers=get_admin_auth_header())
+    assert response.status_code == 200
+    stats = response.json()
+    assert stats["hits"] == catalog_cache.hits and stats["misses"] == catalog_cache.misses
+    assert stats["invalidations"] >= 1
+
+
+# =========================================================================
+# 2. CACHE MECHANICS
+# =========================================================================
+
+def test_5_entries_expire_and_are_bounded():
+    """Entries expire after the TTL, and the least recently used one is evicted
+    once the backend is full."""
+    clock = FakeClock()
+    backend = MemoryBackend(max_entries=2, clock=clock)
+    backend.set("a", 1, ttl_seconds=10)
+    backend.set("b", 2, ttl_seconds=10)
+    assert backend.get("a") == (True, 1)
+    backend.set("c", 3, ttl_seconds=10)  # "b" is the least recently used
+    assert backend.get("b") == (False, None)
+    assert backend.evictions == 1
+
+    clock.now = 10
+    assert backend.get("a") == (False, None)
+
+
+def test_6_invalidation_scopes():
+    """An id invalidation drops that entity and the lists; a category change drops
+    every product entry, since products embed their category."""
+    cache = CatalogCache(MemoryBackend(), ttl_seconds=60)
+    loads = []
+
+    def read(namespace, key, entity_id=None):
+        return cache.get_or_load(namespace, key, lambda: loads.append(key) or key, entity_id=entity_id)
+
+    for entity_id in (1, 2):
+        read(PRODUCT, f"get:{entity_id}", entity_id)
+    read(PRODUCT, "list")
+    cache.invalidate(PRODUCT, 1)
+    loads.clear()
+    for entity_id in (1, 2):
+        read(PRODUCT, f"get:{entity_id}", entity_id)
+    read(PRODUCT, "list")
+    assert loads == ["get:1", "list"]
+
+    cache.invalidate(CATEGORY, 7)
+    loads.clear()
+    read(PRODUCT, "get:2", 2)
+    assert loads == ["get:2"]
+
+
+def test_7_version_check_catches_other_workers_writes():
+    """A version bump made by this process's own write keeps the cache; one from
+    another worker (a version this process did not write) drops the namespace."""
+    cache = CatalogCache(MemoryBackend(), ttl_seconds=60)
+    loads = []
+
+    def read():
+        return cache.get_or_load(PRODUCT, "list", lambda: loads.append("list"))
+
+    cache.observe(PRODUCT, 1, "1@a")
+    read()
+    cache.acknowledge(PRODUCT, 2, "2@b")  # our write
+    cache.observe(PRODUCT, 2, "2@b")
+    read()
+    assert loads == ["list"]
+
+    cache.acknowledge(PRODUCT, 4, "4@d")  # version 3 came from elsewhere
+    cache.observe(PRODUCT, 4, "4@d")
+    read()
+    assert loads == ["list", "list"]
@@ -0,0 +1,80 @@
+from fastapi.testclient import TestClient
+
+from src.app.app import app, DEFAULT_ADMIN_USERNAME, DEFAULT_ADMIN_PASSWORD
+from src.service.catalog_snapshot import catalog_snapshot
+
+client = TestClient(app)
+ADMIN_AUTH_TOKEN = None
+PRODUCT_ID = None
+VERSION = None
+
+
+# --- UTILITY FUNCTION ---
+def get_admin_auth_header():
+    """Returns the Authorization header dictionary for the default admin."""
+    if ADMIN_AUTH_TOKEN is None:
+        raise ValueError("ADMIN_AUTH_TOKEN is not set. Run the admin login test first.")
+    return {"Authorization": f"Bearer {ADMIN_AUTH_TOKEN}"}
+
+
+def snapshot_product(snapshot):
+    return next(p for p in snapshot["products"] if p["product_id"] == PRODUCT_ID)
+
+
+# =========================================================================
+# 1. SNAPSHOT AND VERSIONS
+# =========================================================================
+
+def test_1_setup_catalog():
+    """Log in and create a stocked product."""
+    global ADMIN_AUTH_TOKEN, PRODUCT_ID
+    response = client.post(
+        "/admin/login",
+        json={"username": DEFAULT_ADMIN_USERNAME, "password": DEFAULT_ADMIN_PASSWORD},
+    )
+    assert response.status_code == 200
+    ADMIN_AUTH_TOKEN = response.json()["access_token"]
+
+    rows = [{"name": "snapshot-product", "selling_price": 3, "initial_stock": 10}]
+    PRODUCT_ID = client.post("/product/bulk", json=rows, headers=get_admin_auth_header()).json()["created"][0]["product_id"]
+
+
+def test_2_snapshot_requires_authentication():
+    """The snapshot has the same access rules as the available services list."""
+    assert client.get("/catalog/snapshot").status_code in (401, 403)
+
+
+def test_3_snapshot_contains_the_catalog():
+    """One gzipped document with categories, products (with stock) and services."""
+    global VERSION
+    response = client.get("/catalog/snapshot", headers={**get_admin_auth_header(), "Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["Content-Encoding"] == "gzip"
+    snapshot = response.json()
+    assert {"version", "built_at", "categories", "products", "services"} <= snapshot.keys()
+    assert snapshot_product(snapshot)["inventory"]["current_stock"] == 10
+    VERSION = snapshot["version"]
+    assert response.headers["X-Catalog-Version"] == str(VERSION)
+
+
+def test_4_current_version_is_not_modified():
+    """Sending the current version back (as ?version= or If-None-Match) gets a 304."""
+    response = client.get("/catalog/snapshot", params={"version": VERSION}, headers=get_admin_auth_header())
+    assert response.status_code == 304
+    response = client.get("/catalog/snapshot", headers={**get_admin_auth_header(), "If-None-Match": f'"{VERSION}"'})
+    assert response.status_code == 304
+
+
+def test_5_stock_change_patches_the_snapshot():
+    """A deduction produces a new version with the new stock, rebuilt from the
+    changed product alone."""
+    full_builds = catalog_snapshot.full_builds
+    response = client.post(f"/inventory/{PRODUCT_ID}/deduct", params={"quantity": 3}, headers=get_admin_auth_header())
+    assert response.status_code == 200
+
+    response = client.get("/catalog/snapshot", params={"version": VERSION}, headers=get_admin_auth_header())
+    assert response.status_code == 200
+    snapshot = response.json()
+    assert snapshot["version"] != VERSION
+    assert snapshot_product(snapshot)["inventory"]["current_stock"] == 7
+    assert catalog_snapshot.full_builds == full_builds
@@ -0,0 +1,187 @@
+import asyncio
+import logging
+import time
+
+import pytest
+from fastapi import Request
+from fastapi.testclient import TestClient
+from sqlalchemy import exc, func, select
+
+from src.app.app import app, DEFAULT_ADMIN_USERNAME, DEFAULT_ADMIN_PASSWORD
+from src.config.database import Database, engine
+from src.config.pool_metrics import pool_status
+from src.config.query_metrics import QueryStats, current_query_stats, warn_repeated_statements
+from src.config.settings import settings
+from src.dependency.database import PRIMARY_PIN_COOKIE, is_pinned_to_primary
+from src.schemas.admin import adminModel
+
+client = TestClient(app)
+ADMIN_AUTH_TOKEN = None
+
+
+# --- UTILITY FUNCTION ---
+def get_admin_auth_header():
+    """Returns the Authorization header dictionary for the default admin."""
+    if ADMIN_AUTH_TOKEN is None:
+        raise ValueError("ADMIN_AUTH_TOKEN is not set. Run the admin login test first.")
+    return {"Authorization": f"Bearer {ADMIN_AUTH_TOKEN}"}
+
+
+# =========================================================================
+# 1. ENGINES & SESSIONS
+# =========================================================================
+
+def test_1_admin_login():
+    """Log in as the default admin and store the token."""
+    global ADMIN_AUTH_TOKEN
+    response = client.post(
+        "/admin/login",
+        json={"username": DEFAULT_ADMIN_USERNAME, "password": DEFAULT_ADMIN_PASSWORD},
+    )
+    assert response.status_code == 200
+    ADMIN_AUTH_TOKEN = response.json()["access_token"]
+
+
+def test_2_async_session_reads_the_same_tables():
+    """With async mode enabled, get_async_db yields an AsyncSession on the same schema."""
+    db = Database(async_enabled=True)
+
+    async def count_admins():
+        try:
+            async for session in db.get_async_db():
+                return (await session.execute(select(func.count()).select_from(adminModel))).scalar_one()
+        finally:
+            await db.dispose()
+
+    assert asyncio.run(count_admins()) >= 1
+
+
+def test_3_async_session_disabled():
+    """Without async mode, asking for an async session is a configuration error."""
+    db = Database(async_enabled=False)
+
+    async def open_session():
+        async for _ in db.get_async_db():
+            pass
+
+    try:
+        asyncio.run(open_session())
+    except RuntimeError as e:
+        assert "DB_ASYNC_ENABLED" in str(e)
+    else:
+        raise AssertionError("get_async_db should refuse to run with async mode disabled")
+
+
+# =========================================================================
+# 2. CONNECTION POOL
+# =========================================================================
+
+def test_4_pool_status_reports_settings_and_checkouts():
+    """/admin/db/pool shows the configured pool and counts checkouts."""
+    first = client.get("/admin/db/pool", headers=get_admin_auth_header())
+    assert first.status_code == 200
+    data = first.json()
+    assert data["pool_size"] == settings.DB_POOL_SIZE
+    assert data["max_overflow"] == settings.DB_MAX_OVERFLOW
+    assert data["checked_out"] + data["idle"] >= 1
+
+    client.get("/category/")  # any request that queries the database
+    second = client.get("/admin/db/pool", headers=get_admin_auth_header()).json()
+    assert second["checkouts_total"] > data["checkouts_total"]
+    assert second["wait_histogram"][-1] == {"le": "+Inf", "count": second["checkouts_total"]}
+
+
+def test_5_pool_timeout_is_counted():
+    """A checkout that gives up on an exhausted pool is recorded as a timeout."""
+    db = Database(pool_size=1, max_overflow=0, pool_timeout=0.1)
+    held = db.engine.connect()
+    try:
+        with pytest.raises(exc.TimeoutError):
+            db.engine.connect()
+    finally:
+        held.close()
+    status = pool_status(db.engine.pool)
+    assert status["max_overflow"] == 0
+    assert status["timeouts_total"] == 1
+    # the failed attempt's wait is observed too, and it waited the whole timeout
+    assert status["checkouts_total"] == 2
+    assert status["wait_max_ms"] >= 100
+    db.engine.dispose()
+
+
+def test_6_async_pool_is_reported():
+    """With async mode on, the async engine's pool is listed with its own limits."""
+    db = Database(async_enabled=True, pool_size=2, max_overflow=3)
+    status = db.pool_status()
+    assert status["async_pool"]["pool_size"] == 2
+    assert status["async_pool"]["max_overflow"] == 3
+    assert Database(async_enabled=False).pool_status().get("async_pool") is None
+
+
+# =========================================================================
+# 3. READ REPLICAS
+# =========================================================================
+
+def _bound_engine(db: Database, use_primary: bool = False):
+    sessions = db.get_read_db(use_primary=use_primary)
+    session = next(sessions)
+    try:
+        return session.get_bind()
+    finally:
+        sessions.close()
+
+
+def test_7_reads_rotate_over_replicas():
+    """Round-robin hands out each replica in turn; writes keep the primary."""
+    db = Database(replica_urls=[settings.DATABASE_URL, settings.DATABASE_URL])
+    bound = [_bound_engine(db) for _ in range(4)]
+    assert bound == [db.replica_engines[0], db.replica_engines[1], db.replica_engines[0], db.replica_engines[1]]
+    assert _bound_engine(db, use_primary=True) is db.engine
+    assert next(db.get_db()).get_bind() is db.engine
+
+
+def test_8_reads_use_primary_without_replicas():
+    """No replicas configured: reads fall back to the primary."""
+    db = Database(replica_urls=[])
+    assert _bound_engine(db) is db.engine
+
+
+def test_9_primary_pin_cookie():
+    """A client holding an unexpired pin cookie reads from the primary."""
+    def request_with(cookie: str) -> Request:
+        return Request({"type": "http", "headers": [(b"cookie", cookie.encode())]})
+
+    assert is_pinned_to_primary(request_with(f"{PRIMARY_PIN_COOKIE}={time.time() + 30}"))
+    assert not is_pinned_to_primary(request_with(f"{PRIMARY_PIN_COOKIE}={time.time() - 1}"))
+    assert not is_pinned_to_primary(request_with(f"{PRIMARY_PIN_COOKIE}=garbage"))
+    assert not is_pinned_to_primary(request_with("other=1"))
+
+
+# =========================================================================
+# 4. PER-REQUEST SQL INSTRUMENTATION
+# =========================================================================
+
+def test_10_query_stats_headers():
+    """Every response reports its statement count and DB time."""
+    response = client.get("/category/")
+    assert response.status_code == 200
+    assert int(response.headers["X-DB-Queries"]) >= 1
+    assert response.headers["Server-Timing"].startswith("db;dur=")
+
+
+def test_11_repeated_statements_are_flagged(caplog):
+    """A statement shape run more often than the threshold is logged as a possible N+1."""
+    stats = QueryStats()
+    token = current_query_stats.set(stats)
+    try:
+        with engine.connect() as conn:
+            for username in ("a", "b", "c", "d"):
+                conn.execute(select(adminModel).where(adminModel.username == username))
+            conn.execute(select(func.count()).select_from(adminModel))
+    finally:
+        current_query_stats.reset(token)
+    assert stats.count == 5
+    with caplog.at_level(logging.WARNING, logger="src.config.query_metrics"):
+        warn_repeated_statements(stats, threshold=3, where="GET /test")
+    assert len(caplog.records) == 1
+    assert "ran 4 times" in caplog.records[0].getMessage()
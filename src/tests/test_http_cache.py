@@ -0,0 +1,122 @@
+import time
+
+from fastapi.testclient import TestClient
+
+from src.app.app import app, DEFAULT_ADMIN_USERNAME, DEFAULT_ADMIN_PASSWORD
+from src.config.database import Database, default_db
+from src.config.settings import settings
+from src.dependency.database import PRIMARY_PIN_COOKIE
+
+client = TestClient(app)
+ADMIN_AUTH_TOKEN = None
+CATEGORY_ID = None
+PRODUCT_ID = None
+
+
+# --- UTILITY FUNCTION ---
+def get_admin_auth_header():
+    """Returns the Authorization header dictionary for the default admin."""
+    if ADMIN_AUTH_TOKEN is None:
+        raise ValueError("ADMIN_AUTH_TOKEN is not set. Run the admin login test first.")
+    return {"Authorization": f"Bearer {ADMIN_AUTH_TOKEN}"}
+
+
+def etag(url):
+    response = client.get(url, headers=get_admin_auth_header())
+    assert response.status_code == 200
+    return response.headers["ETag"]
+
+
+# =========================================================================
+# 1. VALIDATORS AND 304s
+# =========================================================================
+
+def test_1_setup_catalog():
+    """Log in and create a category with one stocked product."""
+    global ADMIN_AUTH_TOKEN, CATEGORY_ID, PRODUCT_ID
+    response = client.post(
+        "/admin/login",
+        json={"username": DEFAULT_ADMIN_USERNAME, "password": DEFAULT_ADMIN_PASSWORD},
+    )
+    assert response.status_code == 200
+    ADMIN_AUTH_TOKEN = response.json()["access_token"]
+
+    CATEGORY_ID = client.post("/category/", json={"name": "etag-category"}, headers=get_admin_auth_header()).json()["categoryID"]
+    rows = [{"name": "etag-product", "selling_price": 3, "category_id": CATEGORY_ID, "initial_stock": 10}]
+    PRODUCT_ID = client.post("/product/bulk", json=rows, headers=get_admin_auth_header()).json()["created"][0]["product_id"]
+
+
+def test_2_matching_etag_is_not_modified():
+    """GETs carry ETag, Last-Modified and Cache-Control; sending the ETag back
+    gets an empty 304 answered with the version lookup alone."""
+    response = client.get(f"/category/{CATEGORY_ID}")
+    assert response.status_code == 200
+    assert response.headers["Cache-Control"] == settings.HTTP_CACHE_CONTROL
+    assert "Last-Modified" in response.headers
+
+    response = client.get(f"/category/{CATEGORY_ID}", headers={"If-None-Match": response.headers["ETag"]})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["X-DB-Queries"] == "1"
+
+    response = client.get(f"/category/{CATEGORY_ID}", headers={"If-Modified-Since": response.headers["Last-Modified"]})
+    assert response.status_code == 304
+
+
+def test_3_write_changes_the_etag():
+    """After an update the old ETag no longer matches and the new data is sent."""
+    old = etag(f"/category/{CATEGORY_ID}")
+    response = client.patch(f"/category/{CATEGORY_ID}", json={"name": "etag-category-renamed"}, headers=get_admin_auth_header())
+    assert response.status_code == 200
+
+    response = client.get(f"/category/{CATEGORY_ID}", headers={"If-None-Match": old})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != old
+    assert response.json()["name"] == "etag-category-renamed"
+
+
+def test_4_stock_changes_only_touch_stock_responses():
+    """A deduction changes the product and inventory ETags but not the service
+    cost rollup's, which does not embed stock."""
+    urls = ["/service/cost-rollup", f"/product/{PRODUCT_ID}", f"/inventory/{PRODUCT_ID}"]
+    before = {url: etag(url) for url in urls}
+    response = client.post(f"/inventory/{PRODUCT_ID}/deduct", params={"quantity": 2}, headers=get_admin_auth_header())
+    assert response.status_code == 200
+    after = {url: etag(url) for url in urls}
+
+    assert after["/service/cost-rollup"] == before["/service/cost-rollup"]
+    assert after[f"/product/{PRODUCT_ID}"] != before[f"/product/{PRODUCT_ID}"]
+    assert after[f"/inventory/{PRODUCT_ID}"] != before[f"/inventory/{PRODUCT_ID}"]
+
+
+def test_5_cache_control_per_route(monkeypatch):
+    """HTTP_CACHE_CONTROL_ROUTES overrides Cache-Control for the named endpoint only."""
+    monkeypatch.setattr(settings, "HTTP_CACHE_CONTROL_ROUTES", {"list_categories": "public, max-age=60"})
+    assert client.get("/category/").headers["Cache-Control"] == "public, max-age=60"
+    assert client.get(f"/category/{CATEGORY_ID}").headers["Cache-Control"] == settings.HTTP_CACHE_CONTROL
+
+
+def test_6_versions_are_read_from_a_replica_unless_pinned(monkeypatch):
+    """The 304 lookup goes to a replica; a client pinned to the primary after a
+    write reads the versions there."""
+    replica = Database(replica_urls=[settings.DATABASE_URL])
+    monkeypatch.setattr(default_db, "replica_engines", replica.replica_engines)
+    monkeypatch.setattr(default_db, "ReplicaSessionLocals", replica.ReplicaSessionLocals)
+    replica_checkouts = lambda: replica.replica_engines[0].pool.metrics.checkouts
+    primary_checkouts = lambda: default_db.engine.pool.metrics.checkouts
+    tag = etag(f"/category/{CATEGORY_ID}")
+
+    before = replica_checkouts(), primary_checkouts()
+    response = client.get(f"/category/{CATEGORY_ID}", headers={"If-None-Match": tag})
+    assert response.status_code == 304
+    assert (replica_checkouts(), primary_checkouts()) == (before[0] + 1, before[1])
+
+    client.cookies.set(PRIMARY_PIN_COOKIE, str(time.time() + 30))
+    try:
+        before = replica_checkouts(), primary_checkouts()
+        response = client.get(f"/category/{CATEGORY_ID}", headers={"If-None-Match": tag})
+        assert response.status_code == 304
+        assert (replica_checkouts(), primary_checkouts()) == (before[0], before[1] + 1)
+    finally:
+        client.cookies.delete(PRIMARY_PIN_COOKIE)
+        replica.replica_engines[0].dispose()
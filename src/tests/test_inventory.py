@@ -0,0 +1,279 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+from fastapi.testclient import TestClient
+from sqlalchemy import func, select, text
+
+from src.app.app import app, DEFAULT_ADMIN_USERNAME, DEFAULT_ADMIN_PASSWORD
+from src.config.database import SessionLocal
+from src.controller.inventory_controller import InventoryController
+from src.schemas.product import Inventory, StockMovement
+from src.service.stock_compaction import compact_stock_movements
+
+client = TestClient(app)
+ADMIN_AUTH_TOKEN = None
+PRODUCT_ID = None
+
+
+# --- UTILITY FUNCTIONS ---
+def get_admin_auth_header():
+    """Returns the Authorization header dictionary for the default admin."""
+    if ADMIN_AUTH_TOKEN is None:
+        raise ValueError("ADMIN_AUTH_TOKEN is not set. Run the admin login test first.")
+    return {"Authorization": f"Bearer {ADMIN_AUTH_TOKEN}"}
+
+
+def create_products(rows):
+    response = client.post("/product/bulk", json=rows, headers=get_admin_auth_header())
+    assert response.status_code == 200, response.text
+    return [p["product_id"] for p in response.json()["created"]]
+
+
+def current_stock(product_id):
+    return client.get(f"/inventory/{product_id}", headers=get_admin_auth_header()).json()["current_stock"]
+
+
+# =========================================================================
+# 1. ATOMIC DEDUCTION & RESTOCK
+# =========================================================================
+
+def test_1_admin_login():
+    """Log in as the default admin and create the product the stock tests use."""
+    global ADMIN_AUTH_TOKEN, PRODUCT_ID
+    response = client.post(
+        "/admin/login",
+        json={"username": DEFAULT_ADMIN_USERNAME, "password": DEFAULT_ADMIN_PASSWORD},
+    )
+    assert response.status_code == 200
+    ADMIN_AUTH_TOKEN = response.json()["access_token"]
+    PRODUCT_ID = create_products([{"name": "stock-item", "selling_price": 2, "initial_stock": 10}])[0]
+
+
+def test_2_deduct_and_restock():
+    """Deductions and restocks return the new level; restocks stamp the restock date."""
+    response = client.post(f"/inventory/{PRODUCT_ID}/deduct", params={"quantity": 3}, headers=get_admin_auth_header())
+    assert response.status_code == 200
+    assert response.json()["current_stock"] == 7
+
+    response = client.post(f"/inventory/{PRODUCT_ID}/restock", params={"quantity": 5}, headers=get_admin_auth_header())
+    assert response.status_code == 200
+    assert response.json()["current_stock"] == 12
+    assert response.json()["last_restock_data"] is not None
+
+
+def test_3_insufficient_stock_changes_nothing():
+    """Deducting more than is in stock is rejected and leaves the level as it was."""
+    response = client.post(f"/inventory/{PRODUCT_ID}/deduct", params={"quantity": 30}, headers=get_admin_auth_header())
+    assert response.status_code == 400
+    assert "Insufficient stock" in response.json()["detail"]
+    assert current_stock(PRODUCT_ID) == 12
+
+    response = client.post("/inventory/999999/deduct", params={"quantity": 1}, headers=get_admin_auth_header())
+    assert response.status_code == 400
+
+
+def test_4_concurrent_deductions_never_go_negative():
+    """Racing deductions: exactly as many succeed as the stock allows, the rest are rejected."""
+    product_id = create_products([{"name": "stock-race", "selling_price": 2, "initial_stock": 10}])[0]
+
+    def deduct(_):
+        return client.post(
+            f"/inventory/{product_id}/deduct", params={"quantity": 1}, headers=get_admin_auth_header()
+        ).status_code
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        codes = list(pool.map(deduct, range(25)))
+
+    assert codes.count(200) == 10
+    assert codes.count(400) == 15
+    assert current_stock(product_id) == 0
+
+
+def test_5_concurrent_deductions_and_restocks_add_up():
+    """Interleaved restocks and deductions lose no update."""
+    product_id = create_products([{"name": "stock-mixed", "selling_price": 2, "initial_stock": 20}])[0]
+
+    def operate(i):
+        if i % 2:
+            url, quantity = f"/inventory/{product_id}/deduct", 3
+        else:
+            url, quantity = f"/inventory/{product_id}/restock", 1
+        return i % 2, client.post(url, params={"quantity": quantity}, headers=get_admin_auth_header()).status_code
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(operate, range(40)))
+
+    deducted = sum(1 for is_deduct, code in results if is_deduct and code == 200)
+    assert all(code == 200 for is_deduct, code in results if not is_deduct)
+    stock = current_stock(product_id)
+    assert stock == 20 + 20 - 3 * deducted
+    assert stock >= 0
+
+
+# =========================================================================
+# 2. LOW-STOCK ALERTS
+# =========================================================================
+
+def test_6_low_stock_alerts_in_sql():
+    """Tracked products at or below their reorder point, largest shortfall first,
+    including stock changes not yet compacted into the snapshot."""
+    low, at_level, healthy, untracked = create_products([
+        {"name": "alert-low", "selling_price": 2, "initial_stock": 2, "min_stock_level": 5},
+        {"name": "alert-at-level", "selling_price": 2, "initial_stock": 5, "min_stock_level": 5},
+        {"name": "alert-healthy", "selling_price": 2, "initial_stock": 9, "min_stock_level": 5},
+        {"name": "alert-untracked", "selling_price": 2, "initial_stock": 0},
+    ])
+
+    def alerts():
+        response = client.get("/inventory/alerts/low-stock", headers=get_admin_auth_header())
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/json"
+        assert "ETag" in response.headers and "content-length" not in response.headers
+        return {a["product_id"]: a for a in response.json() if a["name"].startswith("alert-")}, response.json()
+
+    mine, everything = alerts()
+    assert set(mine) == {low, at_level}
+    assert mine[low]["shortfall"] == 3 and mine[at_level]["shortfall"] == 0
+    shortfalls = [a["shortfall"] for a in everything]
+    assert shortfalls == sorted(shortfalls, reverse=True)
+
+    client.post(f"/inventory/{healthy}/deduct", params={"quantity": 6}, headers=get_admin_auth_header())
+    mine, _ = alerts()
+    assert set(mine) == {low, at_level, healthy}
+    assert mine[healthy]["current_stock"] == 3
+    assert untracked not in mine
+
+
+def test_7_reorder_check_has_no_row_cap():
+    """check_for_reorder returns every low product id, not a first page."""
+    ids = create_products([
+        {"name": f"reorder-{i}", "selling_price": 1, "initial_stock": 0, "min_stock_level": 1} for i in range(150)
+    ])
+    with SessionLocal() as db:
+        reorder = InventoryController(db).check_for_reorder()
+    assert set(ids) <= set(reorder)
+    assert reorder == sorted(reorder)
+
+
+# =========================================================================
+# 3. CONSUMING A SERVICE'S BILL OF MATERIALS
+# =========================================================================
+
+def create_service(name, associations):
+    response = client.post(
+        "/service/",
+        json={"name": name, "image_url": "x", "price": 10, "duration_minutes": 5, "associations": associations},
+        headers=get_admin_auth_header(),
+    )
+    assert response.status_code in (200, 201), response.text
+    return response.json()["service_id"]
+
+
+def test_8_consume_service_parts():
+    """Consuming a service deducts every required part in one call; optional ones on request."""
+    bolt, filter_, optional = create_products([
+        {"name": f"bom-{i}", "selling_price": 3, "initial_stock": 10, "min_stock_level": 6} for i in range(3)
+    ])
+    service_id = create_service("bom-service", [
+        {"product_id": bolt, "quantity_required": 2},
+        {"product_id": filter_, "quantity_required": 5},
+        {"product_id": optional, "quantity_required": 1, "is_optional": True},
+    ])
+
+    response = client.post(f"/service/{service_id}/consume", headers=get_admin_auth_header())
+    assert response.status_code == 200, response.text
+    data = response.json()
+    assert {i["product_id"]: i["current_stock"] for i in data["inventory"]} == {bolt: 8, filter_: 5}
+    assert [a["product_id"] for a in data["low_stock"]] == [filter_]
+
+    response = client.post(
+        f"/service/{service_id}/consume", params={"include_optional": True}, headers=get_admin_auth_header()
+    )
+    assert response.status_code == 200
+    assert [current_stock(p) for p in (bolt, filter_, optional)] == [6, 0, 9]
+
+
+def test_9_consume_is_all_or_nothing():
+    """If one part is short, no part is deducted."""
+    plenty, scarce = create_products([
+        {"name": "bom-plenty", "selling_price": 3, "initial_stock": 10},
+        {"name": "bom-scarce", "selling_price": 3, "initial_stock": 1},
+    ])
+    service_id = create_service("bom-short-service", [
+        {"product_id": plenty, "quantity_required": 4},
+        {"product_id": scarce, "quantity_required": 2},
+    ])
+
+    response = client.post(f"/service/{service_id}/consume", headers=get_admin_auth_header())
+    assert response.status_code == 400
+    assert str(scarce) in response.json()["detail"]
+    assert [current_stock(plenty), current_stock(scarce)] == [10, 1]
+
+    assert client.post("/service/999999/consume", headers=get_admin_auth_header()).status_code == 404
+
+
+# =========================================================================
+# 4. STOCK MOVEMENT LEDGER & COMPACTION
+# =========================================================================
+
+def test_10_every_change_is_a_movement():
+    """Restocks, deductions and adjustments are appended to the ledger, newest first."""
+    product_id = create_products([{"name": "ledger-item", "selling_price": 2, "initial_stock": 10}])[0]
+    client.post(f"/inventory/{product_id}/deduct", params={"quantity": 4}, headers=get_admin_auth_header())
+    client.post(f"/inventory/{product_id}/restock", params={"quantity": 2}, headers=get_admin_auth_header())
+    response = client.patch(
+        f"/inventory/{product_id}/stock", json={"current_stock": 3}, headers=get_admin_auth_header()
+    )
+    assert response.json()["current_stock"] == 3
+
+    first = client.get(f"/inventory/{product_id}/movements", params={"limit": 2}, headers=get_admin_auth_header()).json()
+    rest = client.get(
+        f"/inventory/{product_id}/movements",
+        params={"limit": 2, "cursor": first["next_cursor"]},
+        headers=get_admin_auth_header(),
+    ).json()
+    movements = first["items"] + rest["items"]
+    assert [m["delta"] for m in movements] == [-5, 2, -4]
+    assert movements[0]["actor"] is not None
+    ids = [m["movement_id"] for m in movements]
+    assert ids == sorted(ids, reverse=True)
+
+
+def test_11_compaction_keeps_current_stock():
+    """Folding movements into the snapshot leaves current_stock unchanged and keeps the history."""
+    product_ids = create_products([
+        {"name": f"compact-{i}", "selling_price": 2, "initial_stock": 10} for i in range(3)
+    ])
+    for product_id in product_ids:
+        client.post(f"/inventory/{product_id}/deduct", params={"quantity": 3}, headers=get_admin_auth_header())
+        client.post(f"/inventory/{product_id}/restock", params={"quantity": 1}, headers=get_admin_auth_header())
+    before = [current_stock(p) for p in product_ids]
+
+    with SessionLocal() as db:
+        # other products may have pending movements too; only ours are checked
+        assert compact_stock_movements(db, 0, batch_size=2) >= len(product_ids)
+        pending = db.execute(
+            select(func.count()).select_from(StockMovement)
+            .where(StockMovement.product_id.in_(product_ids), StockMovement.compacted.is_(False))
+        ).scalar_one()
+        snapshots = db.execute(
+            select(Inventory.stock_snapshot).where(Inventory.product_id.in_(product_ids)).order_by(Inventory.product_id)
+        ).scalars().all()
+    assert pending == 0
+    assert snapshots == [8, 8, 8]
+    assert [current_stock(p) for p in product_ids] == before == [8, 8, 8]
+    history = client.get(f"/inventory/{product_ids[0]}/movements", headers=get_admin_auth_header()).json()
+    assert len(history["items"]) == 2
+
+
+def test_12_restock_does_not_wait_for_deductions():
+    """A restock only appends to the ledger: it completes while a deduction holds
+    the inventory row lock, and its date comes from the movement."""
+    product_id = create_products([{"name": "restock-unlocked", "selling_price": 2, "initial_stock": 1}])[0]
+    with SessionLocal() as holder, SessionLocal() as db:
+        InventoryController(holder).inventory_repo.lock_for_update([product_id])
+        db.execute(text("SET lock_timeout = '2s'"))
+        inventory = InventoryController(db).record_incoming_stock(product_id, 4)
+        holder.rollback()
+    assert inventory.current_stock == 5
+    assert inventory.last_restock_data == date.today()
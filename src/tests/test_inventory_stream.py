@@ -0,0 +1,120 @@
+import asyncio
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from src.app.app import app, DEFAULT_ADMIN_USERNAME, DEFAULT_ADMIN_PASSWORD
+from src.config.settings import settings
+from src.service.inventory_events import InventoryEventHub
+
+client = TestClient(app)
+ADMIN_AUTH_TOKEN = None
+PRODUCT_ID = None
+
+
+# --- UTILITY FUNCTIONS ---
+def get_admin_auth_header():
+    """Returns the Authorization header dictionary for the default admin."""
+    if ADMIN_AUTH_TOKEN is None:
+        raise ValueError("ADMIN_AUTH_TOKEN is not set. Run the admin login test first.")
+    return {"Authorization": f"Bearer {ADMIN_AUTH_TOKEN}"}
+
+
+def new_ticket():
+    response = client.post("/inventory/stream/ticket", headers=get_admin_auth_header())
+    assert response.status_code == 200
+    return response.json()
+
+
+# =========================================================================
+# 1. STREAM AUTHENTICATION
+# =========================================================================
+
+def test_1_admin_login():
+    """Log in and create a product with a reorder point."""
+    global ADMIN_AUTH_TOKEN, PRODUCT_ID
+    response = client.post(
+        "/admin/login",
+        json={"username": DEFAULT_ADMIN_USERNAME, "password": DEFAULT_ADMIN_PASSWORD},
+    )
+    assert response.status_code == 200
+    ADMIN_AUTH_TOKEN = response.json()["access_token"]
+    response = client.post(
+        "/product/bulk",
+        json=[{"name": "stream-item", "selling_price": 2, "initial_stock": 10, "min_stock_level": 6}],
+        headers=get_admin_auth_header(),
+    )
+    PRODUCT_ID = response.json()["created"][0]["product_id"]
+
+
+def test_2_tickets_only_open_streams():
+    """A stream ticket is short-lived and is not accepted as an access token."""
+    ticket = new_ticket()
+    assert ticket["expires_in"] == settings.INVENTORY_STREAM_TICKET_SECONDS
+    response = client.get(f"/inventory/{PRODUCT_ID}", headers={"Authorization": f"Bearer {ticket['ticket']}"})
+    assert response.status_code in (401, 403)
+
+
+def test_3_access_tokens_are_not_accepted_in_the_url():
+    """?token= is not an authentication method; the socket is closed before accepting."""
+    with pytest.raises(WebSocketDisconnect):
+        with client.websocket_connect(f"/inventory/ws?token={ADMIN_AUTH_TOKEN}") as websocket:
+            websocket.receive_text()
+    with pytest.raises(WebSocketDisconnect):
+        with client.websocket_connect("/inventory/ws?ticket=not-a-ticket") as websocket:
+            websocket.receive_text()
+
+
+# =========================================================================
+# 2. LIVE EVENTS
+# =========================================================================
+
+def test_4_websocket_receives_stock_changes(monkeypatch):
+    """A ticket-authenticated socket gets the stock change and the reorder crossing."""
+    monkeypatch.setattr(settings, "INVENTORY_STREAM_HEARTBEAT_SECONDS", 0.2)
+    ticket = new_ticket()["ticket"]
+    with client.websocket_connect(f"/inventory/ws?ticket={ticket}") as websocket:
+        # the first heartbeat proves the socket is subscribed
+        assert websocket.receive_json() == {"type": "ping"}
+        client.post(f"/inventory/{PRODUCT_ID}/deduct", params={"quantity": 5}, headers=get_admin_auth_header())
+        messages = []
+        while len(messages) < 2:
+            message = websocket.receive_json()
+            if message["type"] != "ping":
+                messages.append(message)
+    assert {m["type"] for m in messages} == {"stock", "low_stock"}
+    stock = next(m for m in messages if m["type"] == "stock")
+    assert stock["data"]["product_id"] == PRODUCT_ID and stock["data"]["current_stock"] == 5
+
+
+def test_5_other_workers_events_are_relayed():
+    """Events NOTIFYed by another worker reach local subscribers; the hub's own are skipped."""
+    hub = InventoryEventHub(max_queued=2)
+
+    async def relay():
+        subscription = hub.subscribe()
+        event = json.dumps({"type": "stock", "data": {"product_id": 1}})
+        hub.apply_message(json.dumps({"origin": "another-worker", "event": event}))
+        hub.apply_message(json.dumps({"origin": hub.origin, "event": event}))
+        received = [await subscription.get(timeout=0.1), await subscription.get(timeout=0.1)]
+        return received, event
+
+    received, event = asyncio.run(relay())
+    assert received == [event, None]
+
+
+def test_6_slow_subscribers_are_dropped():
+    """A subscriber that falls max_queued events behind is marked overflowed and removed."""
+    hub = InventoryEventHub(max_queued=2)
+
+    async def flood():
+        subscription = hub.subscribe()
+        hub.publish([("stock", {"product_id": i}) for i in range(3)])
+        await asyncio.sleep(0)  # let the loop run the fan-out
+        return subscription
+
+    subscription = asyncio.run(flood())
+    assert subscription.overflowed
+    assert hub.subscriber_count == 0
@@ -0,0 +1,162 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+
+from src.app.app import app, DEFAULT_ADMIN_USERNAME, DEFAULT_ADMIN_PASSWORD
+from src.config.database import SessionLocal
+from src.repositories.outbox_repositories import OutboxRepository
+from src.repositories.service_availability_repositories import AVAILABILITY_REFRESH_EVENT, merge_refreshes
+from src.schemas.outbox import OutboxEvent
+from src.service.notifications import NotificationSink, OutboxDispatcher, _refresh_availability
+
+client = TestClient(app)
+ADMIN_AUTH_TOKEN = None
+
+
+# --- UTILITY FUNCTIONS ---
+def get_admin_auth_header():
+    """Returns the Authorization header dictionary for the default admin."""
+    if ADMIN_AUTH_TOKEN is None:
+        raise ValueError("ADMIN_AUTH_TOKEN is not set. Run the admin login test first.")
+    return {"Authorization": f"Bearer {ADMIN_AUTH_TOKEN}"}
+
+
+def low_stock_events(product_id):
+    with SessionLocal() as db:
+        events = db.execute(select(OutboxEvent).where(OutboxEvent.event_type == "low_stock")).scalars().all()
+        return [event for event in events if event.payload["product_id"] == product_id]
+
+
+def enqueue(payload):
+    with SessionLocal() as db:
+        event = OutboxRepository(db).enqueue("test_event", payload)
+        db.commit()
+        return event.event_id
+
+
+def load_event(event_id):
+    with SessionLocal() as db:
+        return db.get(OutboxEvent, event_id)
+
+
+class RecordingSink(NotificationSink):
+    """Accepts every batch; fails the first `failures` calls when set."""
+
+    def __init__(self, name, failures=0):
+        self.name = name
+        self.failures = failures
+        self.received = []
+
+    async def send(self, events):
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError(f"{self.name} is down")
+        self.received += [event.event_id for event in events]
+
+
+# =========================================================================
+# 1. LOW-STOCK EVENTS IN THE OUTBOX
+# =========================================================================
+
+def test_1_admin_login():
+    """Log in as the default admin and store the token."""
+    global ADMIN_AUTH_TOKEN
+    response = client.post(
+        "/admin/login",
+        json={"username": DEFAULT_ADMIN_USERNAME, "password": DEFAULT_ADMIN_PASSWORD},
+    )
+    assert response.status_code == 200
+    ADMIN_AUTH_TOKEN = response.json()["access_token"]
+
+
+def test_2_crossing_enqueues_exactly_one_event():
+    """Only the deduction that crosses the reorder point enqueues a low_stock event."""
+    response = client.post(
+        "/product/bulk",
+        json=[{"name": "outbox-item", "selling_price": 2, "initial_stock": 10, "min_stock_level": 6}],
+        headers=get_admin_auth_header(),
+    )
+    product_id = response.json()["created"][0]["product_id"]
+
+    def deduct(quantity):
+        response = client.post(
+            f"/inventory/{product_id}/deduct", params={"quantity": quantity}, headers=get_admin_auth_header()
+        )
+        assert response.status_code == 200
+
+    deduct(2)  # 8: above the reorder point
+    assert low_stock_events(product_id) == []
+    deduct(3)  # 5: crosses it
+    events = low_stock_events(product_id)
+    assert len(events) == 1
+    assert events[0].payload["current_stock"] == 5 and events[0].payload["shortfall"] == 1
+    deduct(1)  # 4: already below, no new alert
+    assert len(low_stock_events(product_id)) == 1
+
+    client.post(f"/inventory/{product_id}/restock", params={"quantity": 6}, headers=get_admin_auth_header())
+    deduct(5)  # back above, then below again: a new crossing
+    assert len(low_stock_events(product_id)) == 2
+
+
+# =========================================================================
+# 2. DISPATCHER
+# =========================================================================
+
+def drain():
+    """Dispatch what earlier tests queued, so the next batch holds this test's events."""
+    dispatcher = OutboxDispatcher(
+        [],
+        handlers={AVAILABILITY_REFRESH_EVENT: _refresh_availability},
+        coalesce={AVAILABILITY_REFRESH_EVENT: merge_refreshes},
+    )
+    while asyncio.run(dispatcher.run_once()):
+        pass
+
+
+def test_3_retries_go_only_to_the_failed_sink():
+    """A sink that failed gets the event again; the one that accepted it does not."""
+    drain()
+    event_id = enqueue({"product_id": 0})
+    healthy, flaky = RecordingSink("healthy"), RecordingSink("flaky", failures=1)
+    dispatcher = OutboxDispatcher([healthy, flaky], retry_base_seconds=0)
+
+    asyncio.run(dispatcher.run_once())
+    event = load_event(event_id)
+    assert event.dispatched_at is None
+    assert event.delivered_sinks == ["healthy"]
+    assert "flaky is down" in event.last_error
+
+    asyncio.run(dispatcher.run_once())
+    assert healthy.received.count(event_id) == 1
+    assert flaky.received.count(event_id) == 1
+    assert load_event(event_id).dispatched_at is not None
+
+
+def test_4_undeliverable_events_are_dead_lettered():
+    """After max_attempts the event is dead-lettered and no longer claimed."""
+    event_id = enqueue({"product_id": 0})
+    broken = RecordingSink("broken", failures=100)
+    dispatcher = OutboxDispatcher([broken], retry_base_seconds=0, max_attempts=2)
+
+    asyncio.run(dispatcher.run_once())
+    asyncio.run(dispatcher.run_once())
+    event = load_event(event_id)
+    assert event.attempts == 2
+    assert event.dead_lettered_at is not None and event.dispatched_at is None
+
+    asyncio.run(dispatcher.run_once())
+    assert load_event(event_id).attempts == 2
+
+
+def test_5_dispatched_events_are_purged():
+    """Dispatched events older than the retention period are deleted; pending ones are kept."""
+    delivered_id, pending_id = enqueue({"product_id": 0}), enqueue({"product_id": 0})
+    with SessionLocal() as db:
+        repo = OutboxRepository(db)
+        repo.mark_dispatched([delivered_id])
+        cutoff = datetime.now(timezone.utc) + timedelta(seconds=1)
+        assert repo.purge_dispatched(cutoff) >= 1
+    assert load_event(delivered_id) is None
+    assert load_event(pending_id) is not None
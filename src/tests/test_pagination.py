@@ -0,0 +1,129 @@
+from decimal import Decimal
+
+from fastapi.testclient import TestClient
+
+from src.app.app import app, DEFAULT_ADMIN_USERNAME, DEFAULT_ADMIN_PASSWORD
+from src.utils.cursor import decode_cursor, encode_cursor
+
+client = TestClient(app)
+ADMIN_AUTH_TOKEN = None
+CATEGORY_ID = None
+PRODUCT_IDS = []
+
+
+# --- UTILITY FUNCTIONS ---
+def get_admin_auth_header():
+    """Returns the Authorization header dictionary for the default admin."""
+    if ADMIN_AUTH_TOKEN is None:
+        raise ValueError("ADMIN_AUTH_TOKEN is not set. Run the admin login test first.")
+    return {"Authorization": f"Bearer {ADMIN_AUTH_TOKEN}"}
+
+
+def collect_pages(sort=None, limit=3):
+    """Follow next_cursor from the first page to the last; returns the items in order."""
+    items, cursor = [], ""
+    while cursor is not None:
+        params = {"cursor": cursor, "limit": limit}
+        if sort:
+            params["sort"] = sort
+        response = client.get(f"/product/by-category/{CATEGORY_ID}", params=params)
+        assert response.status_code == 200, response.text
+        page = response.json()
+        assert len(page["items"]) <= limit
+        items += page["items"]
+        cursor = page["next_cursor"]
+    return items
+
+
+# =========================================================================
+# 1. KEYSET (CURSOR) PAGINATION
+# =========================================================================
+
+def test_1_setup_catalog():
+    """Log in and create 7 products sharing 2 prices, so most sort keys tie."""
+    global ADMIN_AUTH_TOKEN, CATEGORY_ID
+    response = client.post(
+        "/admin/login",
+        json={"username": DEFAULT_ADMIN_USERNAME, "password": DEFAULT_ADMIN_PASSWORD},
+    )
+    assert response.status_code == 200
+    ADMIN_AUTH_TOKEN = response.json()["access_token"]
+
+    response = client.post("/category/", json={"name": "paging-category"}, headers=get_admin_auth_header())
+    assert response.status_code == 201, response.text
+    CATEGORY_ID = response.json()["categoryID"]
+    for i in range(7):
+        response = client.post(
+            "/product/",
+            json={"name": f"paging-{i}", "selling_price": 2 + i % 2, "category_id": CATEGORY_ID},
+            headers=get_admin_auth_header(),
+        )
+        assert response.status_code in (200, 201), response.text
+        PRODUCT_IDS.append(response.json()["product_id"])
+
+
+def test_2_cursor_round_trip():
+    """Cursors are opaque URL-safe strings that decode to what was encoded."""
+    payload = {"sort": "selling_price", "after": ["2.00", 17]}
+    cursor = encode_cursor(payload)
+    assert "=" not in cursor and "/" not in cursor and "+" not in cursor
+    assert decode_cursor(cursor) == payload
+
+
+def test_3_pages_cover_every_row_once():
+    """Paging by primary key returns every product exactly once, in id order."""
+    ids = [item["product_id"] for item in collect_pages()]
+    assert ids == sorted(PRODUCT_IDS)
+
+
+def test_4_ties_are_broken_by_primary_key():
+    """Rows with the same sort value are ordered by id and are not skipped across pages."""
+    items = collect_pages(sort="selling_price")
+    keys = [(Decimal(item["selling_price"]), item["product_id"]) for item in items]
+    assert keys == sorted(keys)
+    assert sorted(item["product_id"] for item in items) == sorted(PRODUCT_IDS)
+
+    items = collect_pages(sort="-selling_price", limit=2)
+    keys = [(Decimal(item["selling_price"]), item["product_id"]) for item in items]
+    assert keys == sorted(keys, reverse=True)
+    assert len(keys) == len(PRODUCT_IDS)
+
+
+def test_5_invalid_cursors_are_rejected():
+    """Malformed cursors, cursors issued for another sort and unknown sorts are 400s."""
+    url = f"/product/by-category/{CATEGORY_ID}"
+    assert client.get(url, params={"cursor": "not-a-cursor!"}).status_code == 400
+
+    first = client.get(url, params={"cursor": "", "limit": 2, "sort": "name"}).json()
+    other_sort = client.get(url, params={"cursor": first["next_cursor"], "sort": "selling_price"})
+    assert other_sort.status_code == 400
+
+    assert client.get(url, params={"cursor": "", "sort": "unit_cost"}).status_code == 400
+
+
+def test_6_technical_accounts_are_paged():
+    """GET /admin/technical pages the staff accounts by username; it is admin only."""
+    usernames = [f"paging_tech_{i}" for i in range(3)]
+    for i, username in enumerate(usernames):
+        response = client.post(
+            "/admin/technical",
+            json={"username": username, "password": "pagingpass", "name": f"Paging Tech {i}", "phone_number": f"+1555000700{i}"},
+            headers=get_admin_auth_header(),
+        )
+        assert response.status_code == 201, response.text
+
+    seen, cursor = [], ""
+    while cursor is not None:
+        response = client.get(
+            "/admin/technical", params={"cursor": cursor, "limit": 2, "sort": "username"}, headers=get_admin_auth_header()
+        )
+        assert response.status_code == 200, response.text
+        page = response.json()
+        assert len(page["items"]) <= 2
+        seen += [item["username"] for item in page["items"]]
+        cursor = page["next_cursor"]
+    assert seen == sorted(seen)
+    assert [name for name in seen if name.startswith("paging_tech_")] == usernames
+
+    assert client.get("/admin/technical", params={"cursor": "", "sort": "password"}, headers=get_admin_auth_header()).status_code == 400
+    assert client.get("/admin/technical").status_code in (401, 403)
@@ -0,0 +1,147 @@
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+import src.service.password_hasher as password_hasher_module
+from src.app.app import app, DEFAULT_ADMIN_USERNAME, DEFAULT_ADMIN_PASSWORD
+from src.config.database import SessionLocal
+from src.config.settings import settings
+from src.repositories.technical_repositorie import TechnicalRepository
+from src.service.password_hasher import PasswordHasher, PasswordHasherBusy, password_hasher
+from src.utils.hash_password import hash_password, hash_rounds, needs_rehash
+
+client = TestClient(app)
+ADMIN_AUTH_TOKEN = None
+
+
+# --- UTILITY FUNCTION ---
+def get_admin_auth_header():
+    """Returns the Authorization header dictionary for the default admin."""
+    if ADMIN_AUTH_TOKEN is None:
+        raise ValueError("ADMIN_AUTH_TOKEN is not set. Run the admin login test first.")
+    return {"Authorization": f"Bearer {ADMIN_AUTH_TOKEN}"}
+
+
+# =========================================================================
+# 1. LOGIN ON THE HASHER POOL
+# =========================================================================
+
+def test_1_login_verifies_on_the_pool():
+    """Logins still work, and their bcrypt verification is timed by the pool."""
+    global ADMIN_AUTH_TOKEN
+    verified = password_hasher.latency["verify"].count
+    response = client.post(
+        "/admin/login",
+        json={"username": DEFAULT_ADMIN_USERNAME, "password": DEFAULT_ADMIN_PASSWORD},
+    )
+    assert response.status_code == 200
+    ADMIN_AUTH_TOKEN = response.json()["access_token"]
+    assert password_hasher.latency["verify"].count == verified + 1
+
+    response = client.post("/admin/login", json={"username": DEFAULT_ADMIN_USERNAME, "password": "wrong-password"})
+    assert response.status_code == 401
+
+
+def test_2_stats_endpoint():
+    """GET /admin/password-hasher reports the pool and its latency histograms."""
+    response = client.get("/admin/password-hasher", headers=get_admin_auth_header())
+    assert response.status_code == 200
+    stats = response.json()
+    assert stats["workers"] == password_hasher.workers
+    assert stats["verify"]["count"] >= 1
+    assert stats["verify"]["histogram"][-1] == {"le": "+Inf", "count": stats["verify"]["count"]}
+
+
+def test_3_overloaded_pool_answers_503(monkeypatch):
+    """When the pool is full, login is refused with 503 and Retry-After."""
+    def busy(*args):
+        raise PasswordHasherBusy("Too many password operations in progress.")
+
+    monkeypatch.setattr(password_hasher, "verify_password", busy)
+    response = client.post(
+        "/admin/login",
+        json={"username": DEFAULT_ADMIN_USERNAME, "password": DEFAULT_ADMIN_PASSWORD},
+    )
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+
+# =========================================================================
+# 2. POOL BOUNDS
+# =========================================================================
+
+def test_4_queue_depth_is_bounded(monkeypatch):
+    """At most workers + max_queued calls are in flight; the next one is rejected
+    at once, and capacity comes back as calls finish."""
+    release = threading.Event()
+    monkeypatch.setattr(password_hasher_module, "_bcrypt_hash", lambda password: release.wait(5) and password)
+    hasher = PasswordHasher(workers=1, max_queued=1)
+    results = []
+    callers = [threading.Thread(target=lambda: results.append(hasher.hash_password("pw"))) for _ in range(2)]
+    try:
+        for caller in callers:
+            caller.start()
+        deadline = time.monotonic() + 5
+        while hasher.stats()["in_flight"] < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        with pytest.raises(PasswordHasherBusy):
+            hasher.hash_password("pw")
+        assert hasher.stats()["rejected_total"] == 1
+
+        release.set()
+        for caller in callers:
+            caller.join(5)
+        assert results == ["pw", "pw"]
+        while hasher.stats()["in_flight"] and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert hasher.hash_password("pw") == "pw"
+        assert hasher.stats()["hash"]["count"] == 3
+    finally:
+        release.set()
+        hasher.shutdown()
+
+
+# =========================================================================
+# 3. WORK FACTOR AND REHASH ON LOGIN
+# =========================================================================
+
+def stored_rounds(username):
+    with SessionLocal() as db:
+        return hash_rounds(TechnicalRepository(db).get_by_username(username).password)
+
+
+def test_5_hashes_use_the_configured_cost(monkeypatch):
+    """New hashes use BCRYPT_ROUNDS; needs_rehash flags hashes of any other cost."""
+    monkeypatch.setattr(settings, "BCRYPT_ROUNDS", 5)
+    hashed = hash_password("secret-password")
+    assert hash_rounds(hashed) == 5
+    assert not needs_rehash(hashed)
+    monkeypatch.setattr(settings, "BCRYPT_ROUNDS", 6)
+    assert needs_rehash(hashed)
+    assert hash_rounds("not-a-bcrypt-hash") is None
+
+
+def test_6_login_rehashes_with_the_new_cost(monkeypatch):
+    """After the cost changes, a successful login stores a hash of the new cost
+    and the password keeps working; a failed login leaves the hash alone."""
+    monkeypatch.setattr(settings, "BCRYPT_ROUNDS", 4)
+    response = client.post(
+        "/admin/technical",
+        json={"username": "rehash_tech", "password": "rehashpass", "name": "Rehash Tech", "phone_number": "+15550004321"},
+        headers=get_admin_auth_header(),
+    )
+    assert response.status_code == 201
+    assert stored_rounds("rehash_tech") == 4
+
+    monkeypatch.setattr(settings, "BCRYPT_ROUNDS", 5)
+    response = client.post("/technical/login", json={"username": "rehash_tech", "password": "wrong-password"})
+    assert response.status_code == 401
+    assert stored_rounds("rehash_tech") == 4
+
+    response = client.post("/technical/login", json={"username": "rehash_tech", "password": "rehashpass"})
+    assert response.status_code == 200
+    assert stored_rounds("rehash_tech") == 5
+    response = client.post("/technical/login", json={"username": "rehash_tech", "password": "rehashpass"})
+    assert response.status_code == 200
@@ -0,0 +1,148 @@
+from fastapi.testclient import TestClient
+
+from src.app.app import app, DEFAULT_ADMIN_USERNAME, DEFAULT_ADMIN_PASSWORD
+from src.service.principal_cache import PrincipalCache, principal_cache
+
+client = TestClient(app)
+ADMIN_AUTH_TOKEN = None
+TECH_AUTH_TOKEN = None
+TECH_USERNAME = "principal_tech"
+TECH_PASSWORD = "principalpass"
+
+
+# --- UTILITY FUNCTIONS ---
+def get_admin_auth_header():
+    """Returns the Authorization header dictionary for the default admin."""
+    if ADMIN_AUTH_TOKEN is None:
+        raise ValueError("ADMIN_AUTH_TOKEN is not set. Run the admin login test first.")
+    return {"Authorization": f"Bearer {ADMIN_AUTH_TOKEN}"}
+
+
+def get_tech_auth_header():
+    """Returns the Authorization header dictionary for the Technical user."""
+    if TECH_AUTH_TOKEN is None:
+        raise ValueError("TECH_AUTH_TOKEN is not set. Run the technical login test first.")
+    return {"Authorization": f"Bearer {TECH_AUTH_TOKEN}"}
+
+
+def counters():
+    return principal_cache.hits, principal_cache.misses
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+# =========================================================================
+# 1. CACHED PRINCIPALS
+# =========================================================================
+
+def test_1_setup_accounts():
+    """Log in as the admin, provision a technical account and log in with it."""
+    global ADMIN_AUTH_TOKEN, TECH_AUTH_TOKEN
+    response = client.post(
+        "/admin/login",
+        json={"username": DEFAULT_ADMIN_USERNAME, "password": DEFAULT_ADMIN_PASSWORD},
+    )
+    assert response.status_code == 200
+    ADMIN_AUTH_TOKEN = response.json()["access_token"]
+
+    response = client.post(
+        "/admin/technical",
+        json={"username": TECH_USERNAME, "password": TECH_PASSWORD, "name": "Principal Tech", "phone_number": "+15550001234"},
+        headers=get_admin_auth_header(),
+    )
+    assert response.status_code == 201
+    response = client.post("/technical/login", json={"username": TECH_USERNAME, "password": TECH_PASSWORD})
+    assert response.status_code == 200
+    TECH_AUTH_TOKEN = response.json()["access_token"]
+
+
+def test_2_repeated_requests_skip_the_account_lookup():
+    """The first request with a token loads the account, later ones are served
+    from the cache without touching the database."""
+    hits, misses = counters()
+    first = client.get("/technical/me", headers=get_tech_auth_header())
+    assert counters() == (hits, misses + 1)
+    second = client.get("/technical/me", headers=get_tech_auth_header())
+    assert counters() == (hits + 1, misses + 1)
+    assert first.json() == second.json()
+    assert second.headers["X-DB-Queries"] == "0"
+
+
+def test_3_account_update_evicts_the_principal():
+    """After an update the next request reloads the account."""
+    response = client.put("/technical/me", json={"name": "Renamed Tech"}, headers=get_tech_auth_header())
+    assert response.status_code == 200
+
+    hits, misses = counters()
+    response = client.get("/technical/me", headers=get_tech_auth_header())
+    assert counters() == (hits, misses + 1)
+    assert response.json()["name"] == "Renamed Tech"
+
+
+def test_4_status_change_evicts_the_principal():
+    """A status change is visible on the next request."""
+    response = client.patch("/technical/me/status", json={"status": "busy"}, headers=get_tech_auth_header())
+    assert response.status_code == 200
+    assert client.get("/technical/me", headers=get_tech_auth_header()).json()["status"] == "busy"
+
+
+def test_5_wrong_role_is_still_rejected():
+    """A cached technical principal does not satisfy an admin-only route."""
+    response = client.get("/admin/me", headers=get_tech_auth_header())
+    assert response.status_code == 401
+
+
+# =========================================================================
+# 2. CACHE MECHANICS
+# =========================================================================
+
+def test_6_entries_expire_and_misses_are_not_cached():
+    """Entries live for the TTL; unknown accounts (None) are looked up every time."""
+    clock = FakeClock()
+    cache = PrincipalCache(ttl_seconds=10, clock=clock)
+    loads = []
+
+    def load(value):
+        return lambda: loads.append(value) or value
+
+    cache.get_or_load(("admin", "a", 1), load("account"))
+    cache.get_or_load(("admin", "a", 1), load("account"))
+    assert loads == ["account"]
+    clock.now = 10
+    cache.get_or_load(("admin", "a", 1), load("account"))
+    assert loads == ["account", "account"]
+
+    cache.get_or_load(("admin", "b", 1), load(None))
+    cache.get_or_load(("admin", "b", 1), load(None))
+    assert loads == ["account", "account", None, None]
+
+
+def test_7_invalidation_drops_every_token_of_the_subject():
+    """An invalidation drops the subject's entries for all its tokens, here or
+    from another worker's message; a worker ignores its own messages."""
+    here, peer = PrincipalCache(), PrincipalCache()
+    loads = []
+
+    def read(issued_at):
+        here.get_or_load(("technical", "t", issued_at), lambda: loads.append(issued_at) or "account")
+
+    read(1)
+    read(2)
+    here.invalidate("t")
+    read(1)
+    read(2)
+    assert loads == [1, 2, 1, 2]
+
+    assert here.apply_message('{"origin": "%s", "principal": "t"}' % here.origin)
+    read(1)
+    assert loads == [1, 2, 1, 2]
+    assert here.apply_message('{"origin": "%s", "principal": "t"}' % peer.origin)
+    read(1)
+    assert loads == [1, 2, 1, 2, 1]
+    assert not here.apply_message('{"namespace": "product", "ids": null}')
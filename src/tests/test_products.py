@@ -0,0 +1,65 @@
+from fastapi.testclient import TestClient
+
+from src.app.app import app, DEFAULT_ADMIN_USERNAME, DEFAULT_ADMIN_PASSWORD
+
+client = TestClient(app)
+ADMIN_AUTH_TOKEN = None
+CATEGORY_IDS = []
+
+
+# --- UTILITY FUNCTION ---
+def get_admin_auth_header():
+    """Returns the Authorization header dictionary for the default admin."""
+    if ADMIN_AUTH_TOKEN is None:
+        raise ValueError("ADMIN_AUTH_TOKEN is not set. Run the admin login test first.")
+    return {"Authorization": f"Bearer {ADMIN_AUTH_TOKEN}"}
+
+
+# =========================================================================
+# 1. PRODUCT LISTING (EAGER LOADING)
+# =========================================================================
+
+def test_1_setup_catalog():
+    """Log in and create 3 categories with 12 stocked products."""
+    global ADMIN_AUTH_TOKEN
+    response = client.post(
+        "/admin/login",
+        json={"username": DEFAULT_ADMIN_USERNAME, "password": DEFAULT_ADMIN_PASSWORD},
+    )
+    assert response.status_code == 200
+    ADMIN_AUTH_TOKEN = response.json()["access_token"]
+
+    for i in range(3):
+        response = client.post("/category/", json={"name": f"listing-category-{i}"}, headers=get_admin_auth_header())
+        CATEGORY_IDS.append(response.json()["categoryID"])
+    rows = [
+        {"name": f"listing-{i}", "selling_price": 3, "category_id": CATEGORY_IDS[i % 3], "initial_stock": i}
+        for i in range(12)
+    ]
+    response = client.post("/product/bulk", json=rows, headers=get_admin_auth_header())
+    assert len(response.json()["created"]) == 12
+
+
+def test_2_query_count_does_not_grow_with_rows():
+    """Relations are loaded in bulk: 1 or 4 products cost the same number of statements."""
+    url = f"/product/by-category/{CATEGORY_IDS[2]}"
+    small = client.get(url, params={"limit": 1})
+    large = client.get(url, params={"limit": 4})
+    assert small.status_code == large.status_code == 200
+    assert len(large.json()) == 4
+    assert small.headers["X-DB-Queries"] == large.headers["X-DB-Queries"]
+    assert all(p["category"] is not None and p["inventory"] is not None for p in large.json())
+
+
+def test_3_include_selects_relations():
+    """Relations left out of include= are returned as null; unknown ones are a 400."""
+    response = client.get(f"/product/by-category/{CATEGORY_IDS[0]}", params={"include": "inventory"})
+    assert response.status_code == 200
+    products = response.json()
+    assert len(products) == 4
+    assert all(p["category"] is None and p["inventory"] is not None for p in products)
+
+    response = client.get(f"/product/by-category/{CATEGORY_IDS[1]}", params={"include": ""})
+    assert all(p["category"] is None and p["inventory"] is None for p in response.json())
+
+    assert client.get("/product/", params={"include": "bogus"}).status_code == 400
@@ -0,0 +1,120 @@
+from fastapi.testclient import TestClient
+
+from src.app.app import app, DEFAULT_ADMIN_USERNAME, DEFAULT_ADMIN_PASSWORD
+from src.config.database import SessionLocal
+from src.config.query_metrics import QueryStats, current_query_stats
+from src.repositories.catalog_version_repositories import CatalogVersionRepository
+from src.repositories.category_repositories import CategoryRepository
+from src.schemas.product import Category
+from src.service.catalog_cache import CATEGORY, catalog_cache
+
+client = TestClient(app)
+
+
+# --- UTILITY FUNCTIONS ---
+def category_version(db):
+    row = CatalogVersionRepository(db).read([CATEGORY]).get(CATEGORY)
+    return row.version if row else 0
+
+
+def statements(stats: QueryStats, prefix: str):
+    return [sql for sql in stats.fingerprints.elements() if sql.startswith(prefix)]
+
+
+# =========================================================================
+# 1. UPDATE / DELETE ... RETURNING
+# =========================================================================
+
+def test_1_update_is_one_round_trip():
+    """update() writes and reads back the row with one UPDATE ... RETURNING, then invalidates."""
+    with SessionLocal() as db:
+        repo = CategoryRepository(db)
+        category = repo.add(Category(name="returning-category"))
+        version = category_version(db)
+
+        stats = QueryStats()
+        token = current_query_stats.set(stats)
+        try:
+            updated = repo.update(category.categoryID, name="returning-renamed")
+        finally:
+            current_query_stats.reset(token)
+
+        assert updated.name == "returning-renamed"
+        assert len(statements(stats, "UPDATE categories")) == 1
+        assert "RETURNING" in statements(stats, "UPDATE categories")[0]
+        assert statements(stats, "SELECT categories") == []
+        assert category_version(db) == version + 1
+
+
+def test_2_missing_rows_do_not_invalidate():
+    """Updating or deleting an id that does not exist returns None/False and bumps nothing."""
+    with SessionLocal() as db:
+        repo = CategoryRepository(db)
+        version = category_version(db)
+        invalidations = catalog_cache.invalidations
+
+        assert repo.update(999999, name="ghost") is None
+        assert repo.delete(999999) is False
+        assert category_version(db) == version
+        assert catalog_cache.invalidations == invalidations
+
+
+def test_3_delete_returns_true_once():
+    """delete() reports whether a row was removed."""
+    with SessionLocal() as db:
+        repo = CategoryRepository(db)
+        category = repo.add(Category(name="returning-delete"))
+        assert repo.delete(category.categoryID) is True
+        assert repo.delete(category.categoryID) is False
+        assert repo.get(category.categoryID) is None
+
+
+# =========================================================================
+# 2. BULK OPERATIONS
+# =========================================================================
+
+def test_4_bulk_insert_update_delete():
+    """add_many keeps input order; update_many and delete_many are one statement each."""
+    with SessionLocal() as db:
+        repo = CategoryRepository(db)
+        created = repo.add_many([{"name": "bulk-a"}, {"name": "bulk-b", "description": None}, {"name": "bulk-c"}])
+        assert [c.name for c in created] == ["bulk-a", "bulk-b", "bulk-c"]
+        ids = [c.categoryID for c in created]
+
+        stats = QueryStats()
+        token = current_query_stats.set(stats)
+        try:
+            sent = repo.update_many([
+                {"categoryID": ids[0], "name": "bulk-a2"},
+                {"categoryID": ids[1], "name": "bulk-b2"},
+            ])
+        finally:
+            current_query_stats.reset(token)
+        assert sent == 2
+        # executemany: batched statements are counted but not fingerprinted
+        assert statements(stats, "UPDATE categories") == []
+        assert sorted(c.name for c in repo.list_by_ids(ids)) == ["bulk-a2", "bulk-b2", "bulk-c"]
+
+        assert repo.delete_many(ids + [999999]) == 3
+        assert repo.list_by_ids(ids) == []
+        assert repo.delete_many([]) == 0
+
+
+def test_5_bulk_product_endpoint_reports_rejected_rows():
+    """POST /product/bulk creates the valid rows and lists the invalid ones by index."""
+    token = client.post(
+        "/admin/login",
+        json={"username": DEFAULT_ADMIN_USERNAME, "password": DEFAULT_ADMIN_PASSWORD},
+    ).json()["access_token"]
+    rows = [
+        {"name": "bulk-product-0", "selling_price": 4, "initial_stock": 3, "min_stock_level": 1},
+        {"name": "bulk-product-bad", "selling_price": -1},
+        {"name": "bulk-product-1", "selling_price": 5, "category_id": 999999},
+        {"name": "bulk-product-2", "selling_price": 6},
+    ]
+    response = client.post("/product/bulk", json=rows, headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200, response.text
+    data = response.json()
+    assert [p["name"] for p in data["created"]] == ["bulk-product-0", "bulk-product-2"]
+    assert data["created"][0]["inventory"]["current_stock"] == 3
+    assert [error["index"] for error in data["errors"]] == [1, 2]
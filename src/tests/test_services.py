@@ -0,0 +1,322 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+from sqlalchemy.exc import OperationalError
+
+from src.app.app import app, DEFAULT_ADMIN_USERNAME, DEFAULT_ADMIN_PASSWORD
+from src.config.database import SessionLocal
+from src.repositories.service_availability_repositories import (
+    AVAILABILITY_REFRESH_EVENT,
+    ServiceAvailabilityRepository,
+    merge_refreshes,
+)
+from src.schemas.outbox import OutboxEvent
+from src.service.cost_rollup import CostRollupRefresher
+from src.service.notifications import OutboxDispatcher, _refresh_availability
+
+client = TestClient(app)
+ADMIN_AUTH_TOKEN = None
+PRODUCT_IDS = []
+
+
+# --- UTILITY FUNCTIONS ---
+def get_admin_auth_header():
+    """Returns the Authorization header dictionary for the default admin."""
+    if ADMIN_AUTH_TOKEN is None:
+        raise ValueError("ADMIN_AUTH_TOKEN is not set. Run the admin login test first.")
+    return {"Authorization": f"Bearer {ADMIN_AUTH_TOKEN}"}
+
+
+def create_products(rows):
+    response = client.post("/product/bulk", json=rows, headers=get_admin_auth_header())
+    assert response.status_code == 200, response.text
+    return [p["product_id"] for p in response.json()["created"]]
+
+
+def create_service(name, associations=(), price=10, **fields):
+    response = client.post(
+        "/service/",
+        json={
+            "name": name, "image_url": "x", "price": price, "duration_minutes": 5,
+            "associations": list(associations), **fields,
+        },
+        headers=get_admin_auth_header(),
+    )
+    assert response.status_code in (200, 201), response.text
+    return response.json()
+
+
+def availability_dispatcher(**options):
+    return OutboxDispatcher(
+        [],
+        handlers={AVAILABILITY_REFRESH_EVENT: _refresh_availability},
+        coalesce={AVAILABILITY_REFRESH_EVENT: merge_refreshes},
+        **options,
+    )
+
+
+def run_refreshes():
+    """Run the queued outbox events (availability refreshes) until none are due."""
+    dispatcher = availability_dispatcher()
+    while asyncio.run(dispatcher.run_once()):
+        pass
+
+
+def parts(service):
+    return sorted(
+        (a["product_id"], a["quantity_required"], a["is_optional"]) for a in service["associations"]
+    )
+
+
+# =========================================================================
+# 1. ASSOCIATION UPDATES
+# =========================================================================
+
+def test_1_setup():
+    """Log in and create the parts the services use."""
+    global ADMIN_AUTH_TOKEN
+    response = client.post(
+        "/admin/login",
+        json={"username": DEFAULT_ADMIN_USERNAME, "password": DEFAULT_ADMIN_PASSWORD},
+    )
+    assert response.status_code == 200
+    ADMIN_AUTH_TOKEN = response.json()["access_token"]
+    PRODUCT_IDS.extend(create_products([
+        {"name": f"service-part-{i}", "selling_price": 3, "initial_stock": 10} for i in range(4)
+    ]))
+
+
+def test_2_associations_are_replaced_by_diff():
+    """PUT associations updates kept parts, adds new ones and removes the missing ones."""
+    a, b, c, _ = PRODUCT_IDS
+    service = create_service("diff-service", [
+        {"product_id": a, "quantity_required": 2},
+        {"product_id": b, "quantity_required": 5},
+    ])
+    response = client.put(
+        f"/service/{service['service_id']}",
+        json={"associations": [
+            {"product_id": b, "quantity_required": 6},
+            {"product_id": c, "quantity_required": 1, "is_optional": True},
+            {"product_id": a, "quantity_required": 2},
+        ]},
+        headers=get_admin_auth_header(),
+    )
+    assert response.status_code == 200
+    assert parts(response.json()) == sorted([(a, 2, False), (b, 6, False), (c, 1, True)])
+
+    response = client.put(
+        f"/service/{service['service_id']}",
+        json={"associations": [{"product_id": c, "quantity_required": 3}]},
+        headers=get_admin_auth_header(),
+    )
+    assert parts(response.json()) == [(c, 3, False)]
+
+    response = client.put(f"/service/{service['service_id']}", json={"name": "diff-renamed"}, headers=get_admin_auth_header())
+    assert response.json()["name"] == "diff-renamed"
+    assert parts(response.json()) == [(c, 3, False)]
+
+
+def test_3_invalid_associations_are_rejected():
+    """Duplicate or unknown parts are a 400 and leave the service unchanged."""
+    a = PRODUCT_IDS[0]
+    service = create_service("diff-invalid", [{"product_id": a, "quantity_required": 1}])
+    url = f"/service/{service['service_id']}"
+    duplicate = [{"product_id": a, "quantity_required": 3}, {"product_id": a, "quantity_required": 1}]
+    assert client.put(url, json={"associations": duplicate}, headers=get_admin_auth_header()).status_code == 400
+    unknown = [{"product_id": 999999, "quantity_required": 1}]
+    assert client.put(url, json={"associations": unknown}, headers=get_admin_auth_header()).status_code == 400
+    assert parts(client.get(url, headers=get_admin_auth_header()).json()) == [(a, 1, False)]
+
+
+# =========================================================================
+# 2. SERVICE LISTING
+# =========================================================================
+
+def test_4_limit_counts_services_not_association_rows():
+    """Each page holds `limit` whole services, associations included, in a fixed number of queries."""
+    for k in range(6):
+        create_service(
+            f"listing-service-{k}",
+            [{"product_id": p, "quantity_required": 1} for p in PRODUCT_IDS[:3]],
+            price=100 + k,
+        )
+    small = client.get("/service/", params={"limit": 2, "cursor": "", "sort": "-price"}, headers=get_admin_auth_header())
+    large = client.get("/service/", params={"limit": 6, "cursor": "", "sort": "-price"}, headers=get_admin_auth_header())
+    assert small.headers["X-DB-Queries"] == large.headers["X-DB-Queries"]
+
+    services = large.json()["items"]
+    assert [float(s["price"]) for s in services] == [105, 104, 103, 102, 101, 100]
+    assert all(len(s["associations"]) == 3 for s in services)
+
+
+def test_5_offset_listing_pages_services():
+    """skip/limit page over services, not over joined rows."""
+    first = client.get("/service/", params={"limit": 3}, headers=get_admin_auth_header()).json()
+    second = client.get("/service/", params={"limit": 3, "skip": 3}, headers=get_admin_auth_header()).json()
+    assert len(first) == len(second) == 3
+    assert not {s["service_id"] for s in first} & {s["service_id"] for s in second}
+
+
+# =========================================================================
+# 3. COST & MARGIN ROLLUP
+# =========================================================================
+
+def rollup(cached=False):
+    response = client.get("/service/cost-rollup", params={"cached": cached}, headers=get_admin_auth_header())
+    assert response.status_code == 200
+    return {row["service_id"]: row for row in response.json()}
+
+
+def test_6_cost_rollup_computed_in_sql():
+    """Material cost sums quantity * unit_cost; parts without a cost are counted, not summed."""
+    costed, uncosted = create_products([
+        {"name": "rollup-costed", "selling_price": 3, "unit_cost": 2.5},
+        {"name": "rollup-uncosted", "selling_price": 3},
+    ])
+    service = create_service("rollup-service", [
+        {"product_id": costed, "quantity_required": 2},
+        {"product_id": uncosted, "quantity_required": 1},
+    ], price=20)
+    empty = create_service("rollup-empty", price=10)
+
+    rows = rollup()
+    row = rows[service["service_id"]]
+    assert float(row["material_cost"]) == 5
+    assert float(row["margin"]) == 15
+    assert float(row["margin_ratio"]) == 0.75
+    assert (row["part_count"], row["parts_missing_cost"]) == (2, 1)
+    assert float(rows[empty["service_id"]]["material_cost"]) == 0
+
+
+def test_7_materialized_rollup_follows_cost_changes():
+    """The materialized rollup is refreshed after a product's unit cost changes."""
+    product_id = create_products([{"name": "rollup-repriced", "selling_price": 3, "unit_cost": 1}])[0]
+    service = create_service("rollup-repriced-service", [{"product_id": product_id, "quantity_required": 3}], price=10)
+    assert float(rollup(cached=True)[service["service_id"]]["material_cost"]) == 3
+
+    response = client.put(f"/product/{product_id}", json={"unit_cost": 2}, headers=get_admin_auth_header())
+    assert response.status_code == 200
+    assert float(rollup(cached=True)[service["service_id"]]["material_cost"]) == 6
+
+
+def test_8_rollup_refreshes_are_debounced():
+    """A burst of refresh requests costs one refresh once the background task runs."""
+    class CountingRefresher(CostRollupRefresher):
+        refreshes = 0
+
+        def _refresh(self):
+            CountingRefresher.refreshes += 1
+            return True
+
+    refresher = CountingRefresher(delay_seconds=0.05)
+
+    async def burst():
+        task = asyncio.create_task(refresher.run())
+        await asyncio.sleep(0)  # let the task start
+        for _ in range(3):
+            await asyncio.to_thread(refresher.request)
+        await asyncio.sleep(0.3)
+        task.cancel()
+
+    asyncio.run(burst())
+    assert CountingRefresher.refreshes == 1
+
+    refresher.request()  # no task running: refreshed inline
+    assert CountingRefresher.refreshes == 2
+
+
+# =========================================================================
+# 4. STOCK-AWARE AVAILABILITY
+# =========================================================================
+
+def available_ids(service_ids):
+    response = client.get("/service/available/", params={"stock_aware": True, "limit": 1000}, headers=get_admin_auth_header())
+    assert response.status_code == 200
+    return {s["service_id"] for s in response.json()} & set(service_ids)
+
+
+def test_9_availability_follows_stock():
+    """Services drop out of the stock-aware list when a required part runs short and
+    come back on restock, once the dispatcher ran the queued refresh; optional
+    parts do not count."""
+    shared, other, optional = create_products([
+        {"name": f"availability-part-{i}", "selling_price": 3, "initial_stock": 5} for i in range(3)
+    ])
+    light = create_service("availability-light", [
+        {"product_id": shared, "quantity_required": 2},
+        {"product_id": optional, "quantity_required": 50, "is_optional": True},
+    ])["service_id"]
+    heavy = create_service("availability-heavy", [
+        {"product_id": shared, "quantity_required": 4},
+        {"product_id": other, "quantity_required": 1},
+    ])["service_id"]
+    assert available_ids([light, heavy]) == {light, heavy}
+
+    client.post(f"/inventory/{shared}/deduct", params={"quantity": 2}, headers=get_admin_auth_header())
+    assert available_ids([light, heavy]) == {light, heavy}  # not refreshed on the request path
+    run_refreshes()
+    assert available_ids([light, heavy]) == {light}
+
+    client.post(f"/inventory/{shared}/restock", params={"quantity": 10}, headers=get_admin_auth_header())
+    run_refreshes()
+    assert available_ids([light, heavy]) == {light, heavy}
+
+    client.put(
+        f"/service/{light}",
+        json={"associations": [{"product_id": other, "quantity_required": 100}]},
+        headers=get_admin_auth_header(),
+    )
+    assert available_ids([light, heavy]) == {heavy}
+
+
+def test_10_failed_refresh_is_retried_from_the_outbox(monkeypatch):
+    """A refresh that fails in the dispatcher stays queued and is retried, and
+    the index catches up then."""
+    part = create_products([{"name": "availability-retry-part", "selling_price": 3, "initial_stock": 3}])[0]
+    service_id = create_service("availability-retry", [{"product_id": part, "quantity_required": 2}])["service_id"]
+    run_refreshes()
+    assert available_ids([service_id]) == {service_id}
+
+    def fail(self, payload):
+        raise OperationalError("refresh", {}, Exception("database went away"))
+
+    response = client.post(f"/inventory/{part}/deduct", params={"quantity": 2}, headers=get_admin_auth_header())
+    assert response.status_code == 200
+    with monkeypatch.context() as patch:
+        patch.setattr(ServiceAvailabilityRepository, "apply_event", fail)
+        asyncio.run(availability_dispatcher(retry_base_seconds=0).run_once())
+    assert available_ids([service_id]) == {service_id}  # stale until the retry
+
+    with SessionLocal() as db:
+        event = db.execute(
+            select(OutboxEvent)
+            .where(OutboxEvent.event_type == AVAILABILITY_REFRESH_EVENT, OutboxEvent.dispatched_at.is_(None))
+            .order_by(OutboxEvent.event_id.desc())
+        ).scalars().first()
+        assert event.payload["product_ids"] == [part]
+        assert "database went away" in event.last_error
+
+    run_refreshes()
+    assert available_ids([service_id]) == set()
+
+
+def test_11_queued_refreshes_are_merged(monkeypatch):
+    """The refreshes the dispatcher claims in one batch run as a single pass."""
+    products = create_products([
+        {"name": f"availability-merge-part-{i}", "selling_price": 3, "initial_stock": 5} for i in range(3)
+    ])
+    run_refreshes()
+    for product_id in products:
+        response = client.post(f"/inventory/{product_id}/deduct", params={"quantity": 1}, headers=get_admin_auth_header())
+        assert response.status_code == 200
+
+    payloads = []
+    apply_event = ServiceAvailabilityRepository.apply_event
+    monkeypatch.setattr(
+        ServiceAvailabilityRepository, "apply_event", lambda self, payload: payloads.append(payload) or apply_event(self, payload)
+    )
+    run_refreshes()
+    assert len(payloads) == 1
+    assert set(products) <= set(payloads[0]["product_ids"])
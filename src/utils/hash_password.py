@@ -1,5 +1,19 @@
 import bcrypt
+from typing import Optional
+from src.config.settings import settings
 
-def hash_password(password: str) -> str:
-    """Hash a password using bcrypt."""
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+def hash_password(password: str, rounds: Optional[int] = None) -> str:
+    """Hash a password using bcrypt with `rounds` (default: settings.BCRYPT_ROUNDS)."""
+    salt = bcrypt.gensalt(rounds=rounds or settings.BCRYPT_ROUNDS)
+    return bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
+
+def hash_rounds(hashed_password: str) -> Optional[int]:
+    """Work factor of a bcrypt hash ('$2b$12$...' -> 12), None if it is not one."""
+    parts = hashed_password.split("$")
+    if len(parts) < 4 or not parts[2].isdigit():
+        return None
+    return int(parts[2])
+
+def needs_rehash(hashed_password: str) -> bool:
+    """True when the hash was made with another work factor than settings.BCRYPT_ROUNDS."""
+    return hash_rounds(hashed_password) != settings.BCRYPT_ROUNDS